@@ -0,0 +1,174 @@
+# alert_dispatcher.py
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import discord
+
+import metrics
+from config import ALERT_FRESHNESS_SECONDS, ALERT_QUEUE_SIZE, ALERT_STALE_POLICY
+
+logger = logging.getLogger("alert_dispatcher")
+
+# Discord limits per message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+# how often to look for a channel that is not in the client's cache (yet)
+CHANNEL_RETRY_SECONDS = 5.0
+
+# (monotonic time queued, trade idea)
+QueuedAlert = Tuple[float, Dict]
+
+
+def stale_summary_embed(ideas: List[Dict], max_age: float) -> discord.Embed:
+    """One compact embed standing in for alerts that missed the freshness deadline."""
+    embed = discord.Embed(title=f"Delayed alerts ({len(ideas)})",
+                          description=f"Signalled up to {max_age:.0f}s ago; levels may be stale.",
+                          color=discord.Color.dark_grey())
+    value = "\n".join(f"{idea['symbol']} @ ${idea['price']:.4f} (entry {idea['entry']}, stop {idea['stop']})"
+                      for idea in ideas)
+    if len(value) > 1024:
+        value = value[:1000].rsplit("\n", 1)[0] + "\n..."
+    embed.add_field(name="Symbols", value=value, inline=False)
+    return embed
+
+
+class AlertDispatcher:
+    """Decouples alert posting from scanning: submit() queues and returns at once, and a
+    background task drains the queue, packing up to 10 embeds (6000 characters) per message.
+    - repeats of a symbol still queued collapse to the newest idea
+    - alerts older than 'freshness_seconds' when their turn comes are dropped, or with
+      stale_policy "merge" collapsed into one "Delayed alerts" embed
+    - discord.py waits out 429s itself; only when it gives up (its retries exhausted, or a
+      Cloudflare block) do the unsent alerts go back to the front while this backs off
+      (1s, doubling up to 60s); other send errors drop the message
+    - while get_channel() returns None the alerts stay queued, stale ones dropping out
+    - a full queue drops its oldest alert"""
+    def __init__(self, get_channel: Callable[[], Optional[discord.abc.Messageable]],
+                 build_embed: Callable[[Dict], discord.Embed],
+                 freshness_seconds: float = ALERT_FRESHNESS_SECONDS, max_queue: int = ALERT_QUEUE_SIZE,
+                 stale_policy: str = ALERT_STALE_POLICY):
+        self.get_channel = get_channel
+        self.build_embed = build_embed
+        self.freshness_seconds = freshness_seconds
+        self.max_queue = max(1, max_queue)
+        self.stale_policy = stale_policy
+        self._pending: Deque[QueuedAlert] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._backoff = 0.0
+        self._channel_missing = False
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, idea: Dict):
+        """Queue one trade idea for posting; never waits."""
+        self._pending.append((time.monotonic(), idea))
+        if len(self._pending) > self.max_queue:
+            self._pending.popleft()
+            metrics.ALERTS_DROPPED.inc(label_value="queue_full")
+        self._wakeup.set()
+
+    def _take_batch(self) -> Tuple[List[QueuedAlert], List[QueuedAlert]]:
+        """Empty the queue into (fresh, stale) alerts, in queue order, newest idea per symbol."""
+        latest: Dict[str, QueuedAlert] = {}
+        while self._pending:
+            queued = self._pending.popleft()
+            latest.pop(queued[1]["symbol"], None)
+            latest[queued[1]["symbol"]] = queued
+        now = time.monotonic()
+        fresh, stale = [], []
+        for queued in latest.values():
+            (fresh if now - queued[0] <= self.freshness_seconds else stale).append(queued)
+        return fresh, stale
+
+    def _pack(self, fresh: List[QueuedAlert], stale: List[QueuedAlert]) -> List[List[Tuple[discord.Embed, List[QueuedAlert]]]]:
+        """Group embeds into messages within Discord's per-message limits; each embed is paired
+        with the queued alerts it carries so they can be requeued if the send is rate limited."""
+        embeds = [(self.build_embed(queued[1]), [queued]) for queued in fresh]
+        if stale:
+            if self.stale_policy == "merge":
+                oldest = time.monotonic() - min(queued_at for queued_at, _ in stale)
+                embeds.append((stale_summary_embed([idea for _, idea in stale], oldest), stale))
+            else:
+                metrics.ALERTS_DROPPED.inc(len(stale), label_value="stale")
+                logger.info(f"Dropped {len(stale)} alerts older than {self.freshness_seconds:.0f}s")
+        messages, current, chars = [], [], 0
+        for embed, carried in embeds:
+            size = len(embed)
+            if current and (len(current) == MAX_EMBEDS_PER_MESSAGE or chars + size > MAX_EMBED_CHARS_PER_MESSAGE):
+                messages.append(current)
+                current, chars = [], 0
+            current.append((embed, carried))
+            chars += size
+        if current:
+            messages.append(current)
+        return messages
+
+    def _hold_for_channel(self):
+        """No channel to post to: keep the fresh alerts queued and drop the stale ones."""
+        metrics.ERRORS.inc(label_value="discord_channel")
+        if not self._channel_missing:
+            logger.warning(f"Alert channel unavailable; holding {len(self._pending)} alerts")
+            self._channel_missing = True
+        fresh, stale = self._take_batch()
+        self._pending.extend(fresh)
+        if stale:
+            metrics.ALERTS_DROPPED.inc(len(stale), label_value="stale")
+            logger.info(f"Dropped {len(stale)} alerts older than {self.freshness_seconds:.0f}s")
+
+    async def _send(self, channel, message: List[Tuple[discord.Embed, List[QueuedAlert]]]) -> bool:
+        """Send one packed message. False only when rate limited."""
+        try:
+            with metrics.timer("discord_send"):
+                await channel.send(embeds=[embed for embed, _ in message])
+        except discord.HTTPException as e:
+            if e.status == 429:
+                # discord.py already slept through its own retries before raising this
+                self._backoff = min(60.0, self._backoff * 2 or 1.0)
+                metrics.ERRORS.inc(label_value="discord_429")
+                logger.warning(f"Discord rate limited; backing off {self._backoff:.1f}s")
+                return False
+            metrics.ERRORS.inc(label_value="discord")
+            logger.warning(f"Failed to send alerts: {e}")
+        except Exception as e:
+            metrics.ERRORS.inc(label_value="discord")
+            logger.warning(f"Failed to send alerts: {e}")
+        else:
+            self._backoff = 0.0
+            metrics.ALERTS.inc(sum(len(carried) for _, carried in message))
+        return True
+
+    async def run(self):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            channel = self.get_channel()
+            if channel is None:
+                self._hold_for_channel()
+                await asyncio.sleep(CHANNEL_RETRY_SECONDS)
+                continue
+            if self._channel_missing:
+                logger.info("Alert channel is available again")
+                self._channel_missing = False
+            messages = self._pack(*self._take_batch())
+            for i, message in enumerate(messages):
+                if not await self._send(channel, message):
+                    # put everything unsent back in front of newer alerts; freshness is re-checked next pass
+                    unsent = [queued for later in messages[i:] for _, carried in later for queued in carried]
+                    self._pending.extendleft(reversed(unsent))
+                    await asyncio.sleep(self._backoff)
+                    break
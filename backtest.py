@@ -0,0 +1,274 @@
+# backtest.py
+"""Offline replay of stored minute bars through the scanner's signal rule and trade levels.
+
+    python backtest.py data/2025-03-06.csv data/2025-03-07.parquet --workers 4 --out alerts.csv
+    python backtest.py data/*.csv --mode cycles
+
+One file per trading day with columns timestamp, open, high, low, close, volume and
+optionally symbol (defaults to the file name, as in replay_server.py). No network is used.
+
+--mode bars (default) feeds every bar of every symbol to StreamingIndicators and applies
+scanner.is_signal after each one, the way the streaming mode sees the market. Symbols are
+split across worker processes. --mode cycles drives the real scanner.scan_candidates
+(scheduler, snapshot prefilter, bar cache, screen) once per SCAN_INTERVAL_SECONDS of
+simulated time against ReplayDataClient, one worker process per day. Either way a symbol
+alerts at most once per day, like the bot's single-channel subscription.
+
+No news is replayed, so both modes apply only the market-data part of the signal rule
+(signal_rules.MARKET_PLAN): news conditions such as has_catalyst are not checked and the
+alerts are a superset of what the bot would post (run_backtest logs a warning).
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from bar_cache import BAR_COLUMNS
+from config import SCAN_INTERVAL_SECONDS, MAX_RESULTS_PER_SCAN
+from signal_rules import NEWS_PLAN
+
+logger = logging.getLogger("backtest")
+
+MINUTE_NS = 60 * 10**9
+
+
+def load_day(path: str) -> pd.DataFrame:
+    """One day of bars from a CSV or Parquet file, sorted by symbol then timestamp."""
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    if 'symbol' not in df.columns:
+        df['symbol'] = os.path.splitext(os.path.basename(path))[0].upper()
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    return df.sort_values(['symbol', 'timestamp'], kind='stable', ignore_index=True)
+
+
+def split_symbols(bars: pd.DataFrame) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """{symbol: (timestamps as UTC epoch ns, N x 5 OHLCV array)} from a load_day frame."""
+    timestamps = bars['timestamp'].dt.as_unit('ns').astype('int64').to_numpy()
+    values = bars[BAR_COLUMNS].to_numpy(float)
+    codes, uniques = pd.factorize(bars['symbol'])
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1, [len(codes)]))
+    return {uniques[codes[start]]: (timestamps[start:end], values[start:end])
+            for start, end in zip(bounds[:-1], bounds[1:]) if end > start}
+
+
+class _BarSet:
+    """Stands in for alpaca's BarSet; only .df is used by the scanner."""
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+
+class ReplayDataClient:
+    """Offline stand-in for StockHistoricalDataClient serving stored bars up to a simulated
+    clock: a bar stamped t is visible once 'now' reaches t + 1 minute, as it would be live.
+    Supports the get_stock_bars / get_stock_snapshot calls made by the scanner."""
+    def __init__(self, bars: Dict[str, Tuple[np.ndarray, np.ndarray]], now: Optional[pd.Timestamp] = None):
+        self.bars = bars
+        self.now = now if now is not None else pd.Timestamp.now(tz="UTC")
+        self.requests = 0
+
+    def _visible(self, symbol: str) -> int:
+        timestamps = self.bars[symbol][0]
+        return int(np.searchsorted(timestamps, self.now.value - MINUTE_NS, side="right"))
+
+    def get_stock_bars(self, request) -> _BarSet:
+        self.requests += 1
+        symbols = request.symbol_or_symbols
+        symbols = [symbols] if isinstance(symbols, str) else symbols
+        start = pd.Timestamp(request.start).value if request.start is not None else None
+        end = pd.Timestamp(request.end).value if request.end is not None else None
+        keys, stamps, rows = [], [], []
+        for symbol in symbols:
+            if symbol not in self.bars:
+                continue
+            timestamps, values = self.bars[symbol]
+            stop = self._visible(symbol)
+            if end is not None:
+                stop = min(stop, int(np.searchsorted(timestamps, end, side="right")))
+            first = int(np.searchsorted(timestamps, start, side="left")) if start is not None else 0
+            if stop <= first:
+                continue
+            keys.extend([symbol] * (stop - first))
+            stamps.append(timestamps[first:stop])
+            rows.append(values[first:stop])
+        if not keys:
+            return _BarSet(pd.DataFrame(columns=BAR_COLUMNS))
+        index = pd.MultiIndex.from_arrays(
+            [keys, pd.DatetimeIndex(np.concatenate(stamps), tz="UTC")], names=["symbol", "timestamp"])
+        df = pd.DataFrame(np.concatenate(rows), index=index, columns=BAR_COLUMNS)
+        if request.limit is not None:
+            df = df.iloc[:request.limit]
+        return _BarSet(df)
+
+    def get_stock_snapshot(self, request) -> Dict[str, SimpleNamespace]:
+        self.requests += 1
+        symbols = request.symbol_or_symbols
+        symbols = [symbols] if isinstance(symbols, str) else symbols
+        snapshots = {}
+        for symbol in symbols:
+            if symbol not in self.bars:
+                continue
+            stop = self._visible(symbol)
+            if not stop:
+                continue
+            values = self.bars[symbol][1][:stop]
+            open_, high, low, close, volume = values[-1]
+            snapshots[symbol] = SimpleNamespace(
+                latest_trade=SimpleNamespace(price=float(close)),
+                minute_bar=SimpleNamespace(open=float(open_), high=float(high), low=float(low),
+                                           close=float(close), volume=float(volume)),
+                daily_bar=SimpleNamespace(volume=float(values[:, 4].sum())),
+                previous_daily_bar=None)
+        return snapshots
+
+
+def _alert(values: Dict, timestamp_ns: int) -> Dict:
+    import scanner
+    alert = {"timestamp": pd.Timestamp(timestamp_ns, tz="UTC"), "symbol": values["symbol"],
+             "price": values["close"], "vwap": values["vwap"], "ma20": values["ma20"], "ma50": values["ma50"],
+             "last_volume": int(values["last_volume"]), "avg_volume": int(values["avg_volume"])}
+    alert.update(scanner.trade_levels(values))
+    return alert
+
+
+def replay_bars(bars: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> Tuple[List[Dict], int]:
+    """Bar-by-bar replay of the given symbols. Returns (alerts, bars processed)."""
+    import scanner
+    from indicators import StreamingIndicators
+    alerts, processed = [], 0
+    for symbol, (timestamps, values) in bars.items():
+        state = StreamingIndicators()
+        closes = values[:, 3].tolist()
+        volumes = values[:, 4].tolist()
+        for i, ts in enumerate(pd.DatetimeIndex(timestamps, tz="UTC")):
+            state.update(ts, closes[i], volumes[i])
+            processed += 1
+            latest = scanner.indicator_values(symbol, state)
+            if scanner.is_signal(latest):
+                alerts.append(_alert(latest, int(timestamps[i]) + MINUTE_NS))
+                break  # posted once per day
+    return alerts, processed
+
+
+def replay_cycles(bars: Dict[str, Tuple[np.ndarray, np.ndarray]], interval_seconds: int = SCAN_INTERVAL_SECONDS,
+                  max_results: int = MAX_RESULTS_PER_SCAN) -> Tuple[List[Dict], Dict]:
+    """Run scanner.scan_candidates once per 'interval_seconds' of the day against a
+    ReplayDataClient. Returns (alerts, stats); each call needs a fresh process."""
+    import scanner
+    from market_data import AsyncDataClient
+
+    if not bars:
+        return [], {"cycles": 0, "cycle_seconds": [], "requests": 0}
+    first = min(timestamps[0] for timestamps, _ in bars.values())
+    last = max(timestamps[-1] for timestamps, _ in bars.values())
+    client = ReplayDataClient(bars, pd.Timestamp(int(first) + MINUTE_NS, tz="UTC"))
+    scanner._data = AsyncDataClient(client, requests_per_minute=10**9, clock=lambda: client.now.to_pydatetime())
+    scanner.now_utc = lambda: client.now.to_pydatetime()
+    universe = sorted(bars)
+    posted = set()
+    subscriptions = SimpleNamespace(wants=lambda values: values["symbol"] not in posted)
+    alerts, cycle_seconds = [], []
+
+    async def run():
+        while client.now.value <= last + MINUTE_NS:
+            started = time.perf_counter()
+            signals = await scanner.scan_candidates(universe)
+            for values in scanner.select_fresh(signals, subscriptions, max_results):
+                posted.add(values["symbol"])
+                alerts.append(_alert(values, client.now.value))
+            cycle_seconds.append(time.perf_counter() - started)
+            client.now += datetime.timedelta(seconds=interval_seconds)
+
+    asyncio.run(run())
+    return alerts, {"cycles": len(cycle_seconds), "cycle_seconds": cycle_seconds, "requests": client.requests}
+
+
+def _bars_job(path: str, symbols: List[str]) -> Tuple[List[Dict], int]:
+    logging.getLogger("scanner").setLevel(logging.WARNING)
+    bars = split_symbols(load_day(path))
+    return replay_bars({symbol: bars[symbol] for symbol in symbols})
+
+
+def _cycles_job(path: str, interval_seconds: int, max_results: int) -> Tuple[List[Dict], Dict, int]:
+    logging.getLogger("scanner").setLevel(logging.WARNING)
+    bars = split_symbols(load_day(path))
+    alerts, stats = replay_cycles(bars, interval_seconds, max_results)
+    return alerts, stats, sum(len(timestamps) for timestamps, _ in bars.values())
+
+
+def run_backtest(paths: List[str], mode: str = "bars", workers: int = 0,
+                 interval_seconds: int = SCAN_INTERVAL_SECONDS, max_results: int = MAX_RESULTS_PER_SCAN) -> Tuple[pd.DataFrame, Dict]:
+    """Replay every day file and return (alerts frame, throughput stats)."""
+    if NEWS_PLAN:
+        logger.warning(f"No news is replayed; ignoring the news conditions of the signal rule: {NEWS_PLAN}")
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    alerts: List[Dict] = []
+    stats = {"days": len(paths), "bars": 0, "symbols": 0, "simulated_minutes": 0}
+    cycle_seconds: List[float] = []
+    requests = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for path in paths:
+            day = load_day(path)
+            symbols = list(day['symbol'].unique())
+            stats["symbols"] += len(symbols)
+            stats["simulated_minutes"] += int((day['timestamp'].max() - day['timestamp'].min()).total_seconds() // 60) + 1
+            if mode == "cycles":
+                futures.append(pool.submit(_cycles_job, path, interval_seconds, max_results))
+            else:
+                size = max(1, -(-len(symbols) // workers))
+                futures.extend(pool.submit(_bars_job, path, symbols[i:i + size]) for i in range(0, len(symbols), size))
+        for future in futures:
+            if mode == "cycles":
+                day_alerts, day_stats, processed = future.result()
+                cycle_seconds.extend(day_stats["cycle_seconds"])
+                requests += day_stats["requests"]
+            else:
+                day_alerts, processed = future.result()
+            alerts.extend(day_alerts)
+            stats["bars"] += processed
+    elapsed = time.perf_counter() - started
+    stats.update(alerts=len(alerts), elapsed_seconds=elapsed, bars_per_second=stats["bars"] / elapsed if elapsed else 0.0,
+                 speedup=stats["simulated_minutes"] * 60 / elapsed if elapsed else 0.0)
+    if mode == "cycles":
+        stats.update(cycles=len(cycle_seconds), requests=requests,
+                     cycle_ms_p50=float(np.percentile(cycle_seconds, 50) * 1000) if cycle_seconds else 0.0,
+                     cycle_ms_max=float(max(cycle_seconds) * 1000) if cycle_seconds else 0.0)
+    frame = pd.DataFrame(alerts)
+    if not frame.empty:
+        frame = frame.sort_values(["timestamp", "symbol"], ignore_index=True)
+    return frame, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay stored minute bars through the scanner rule")
+    parser.add_argument("paths", nargs="+", help="one CSV or Parquet file per trading day")
+    parser.add_argument("--mode", choices=["bars", "cycles"], default="bars")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: CPU count)")
+    parser.add_argument("--interval", type=int, default=SCAN_INTERVAL_SECONDS, help="scan interval in cycles mode")
+    parser.add_argument("--out", help="write the alerts to this CSV file")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    alerts, stats = run_backtest(args.paths, args.mode, args.workers, args.interval)
+    if args.out:
+        alerts.to_csv(args.out, index=False)
+    elif not alerts.empty:
+        print(alerts.to_string(index=False))
+    for key, value in stats.items():
+        logger.info(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
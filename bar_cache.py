@@ -0,0 +1,267 @@
+# bar_cache.py
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import BAR_CACHE_CAPACITY
+
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(len(BAR_COLUMNS))
+
+# symbol rows allocated up front; the buffers double when they run out
+INITIAL_SYMBOLS = 1024
+
+# (UTC epoch ns, old close, old volume, new close, new volume, inserted by a back-fill)
+Revision = Tuple[int, float, float, float, float, bool]
+
+
+def _timestamps_ns(index: pd.Index) -> np.ndarray:
+    """UTC epoch nanoseconds for a DatetimeIndex (unit-independent)."""
+    if not isinstance(index, pd.DatetimeIndex):
+        index = pd.DatetimeIndex(index)
+    return index.as_unit('ns').asi8
+
+
+class SymbolBars:
+    """Handle on one symbol's row of the shared BarCache buffers. Its bars sit left-aligned in
+    timestamp order in row 'sid'; the accessors return zero-copy views that stay valid until the
+    next write to the cache (appending may shift the row, growing reallocates the buffers).
+    Revised and back-filled bars are logged in 'revisions' until BarCache.take_revisions."""
+    __slots__ = ('cache', 'sid', 'length', 'revisions')
+
+    def __init__(self, cache: 'BarCache', sid: int):
+        self.cache = cache
+        self.sid = sid
+        self.length = 0
+        # (UTC epoch ns, old close, old volume, new close, new volume, inserted)
+        self.revisions: List[Revision] = []
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self.cache._timestamps[self.sid, self.length - 1]) if self.length else None
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """int64 UTC epoch ns."""
+        return self.cache._timestamps[self.sid, :self.length]
+
+    @property
+    def values(self) -> np.ndarray:
+        """float32 (5, n) view: open, high, low, close, volume."""
+        return self.cache._values[:, self.sid, :self.length]
+
+    @property
+    def closes(self) -> np.ndarray:
+        return self.cache._values[CLOSE, self.sid, :self.length]
+
+    @property
+    def volumes(self) -> np.ndarray:
+        return self.cache._values[VOLUME, self.sid, :self.length]
+
+    def _append(self, timestamps: np.ndarray, values: np.ndarray):
+        """Append ordered bars ('values' is (5, n)), dropping the oldest beyond capacity."""
+        capacity = self.cache.capacity
+        n = len(timestamps)
+        if n >= capacity:
+            timestamps, values, n = timestamps[-capacity:], values[:, -capacity:], capacity
+        ts_row, value_rows = self.cache._timestamps[self.sid], self.cache._values[:, self.sid]
+        overflow = self.length + n - capacity
+        if overflow > 0:
+            keep = self.length - overflow
+            ts_row[:keep] = ts_row[overflow:self.length]
+            value_rows[:, :keep] = value_rows[:, overflow:self.length]
+            self.length = keep
+        ts_row[self.length:self.length + n] = timestamps
+        value_rows[:, self.length:self.length + n] = values
+        self.length += n
+
+    def _replace(self, ts: int, values: np.ndarray) -> bool:
+        """Revise or back-fill one bar at or before the last timestamp. Returns whether it changed anything."""
+        ts_row, value_rows = self.cache._timestamps[self.sid], self.cache._values[:, self.sid]
+        # late or revised bars land within the last few minutes
+        pos = int(np.searchsorted(ts_row[:self.length], ts))
+        if ts_row[pos] == ts:
+            if (value_rows[:, pos] == values).all():
+                return False
+            self.revisions.append((ts, float(value_rows[CLOSE, pos]), float(value_rows[VOLUME, pos]),
+                                   float(values[CLOSE]), float(values[VOLUME]), False))
+            value_rows[:, pos] = values
+            return True
+        if self.length == self.cache.capacity:
+            if pos == 0:
+                # older than everything we keep
+                return False
+            ts_row[:pos - 1] = ts_row[1:pos]
+            value_rows[:, :pos - 1] = value_rows[:, 1:pos]
+            pos -= 1
+        else:
+            ts_row[pos + 1:self.length + 1] = ts_row[pos:self.length].copy()
+            value_rows[:, pos + 1:self.length + 1] = value_rows[:, pos:self.length].copy()
+            self.length += 1
+        ts_row[pos] = ts
+        value_rows[:, pos] = values
+        self.revisions.append((ts, 0.0, 0.0, float(values[CLOSE]), float(values[VOLUME]), True))
+        return True
+
+    def upsert(self, ts: int, row: Sequence[float]) -> Tuple[bool, bool]:
+        """Insert or replace one bar. Returns (appended, revised)."""
+        values = np.asarray(row, dtype=np.float32)
+        if not self.length or ts > self.cache._timestamps[self.sid, self.length - 1]:
+            self._append(np.array([ts], dtype=np.int64), values.reshape(-1, 1))
+            return True, False
+        return False, self._replace(ts, values)
+
+    def merge(self, df: pd.DataFrame) -> Tuple[int, bool]:
+        """Merge bars (any order, may overlap the cached range) into the buffer.
+        Returns (number of bars appended at the end, whether any earlier bar was revised or back-filled)."""
+        if df is None or df.empty:
+            return 0, False
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        timestamps = _timestamps_ns(df.index)
+        values = df.to_numpy(dtype=np.float32).T
+        if list(df.columns) != BAR_COLUMNS:
+            values = values[df.columns.get_indexer(BAR_COLUMNS)]
+        revised = False
+        split = 0
+        if self.length:
+            split = int(np.searchsorted(timestamps, self.cache._timestamps[self.sid, self.length - 1], side='right'))
+            for i in range(split):
+                revised = self._replace(int(timestamps[i]), values[:, i]) or revised
+        if split == len(timestamps):
+            return 0, revised
+        # duplicate timestamps in one response keep the later bar
+        new_ts, new_values = timestamps[split:], values[:, split:]
+        unique = np.append(new_ts[1:] != new_ts[:-1], True)
+        if not unique.all():
+            new_ts, new_values = new_ts[unique], new_values[:, unique]
+        self._append(new_ts, new_values)
+        return len(new_ts), revised
+
+    def to_frame(self, last: Optional[int] = None) -> pd.DataFrame:
+        """Cached bars (or only the 'last' N) as a float64 OHLCV DataFrame indexed by UTC timestamp ascending."""
+        start = 0 if last is None else max(0, self.length - last)
+        index = pd.to_datetime(self.timestamps[start:], unit='ns', utc=True)
+        return pd.DataFrame(self.values[:, start:].T.astype(np.float64), index=index, columns=BAR_COLUMNS)
+
+
+class BarCache:
+    """Process-wide per-symbol minute-bar cache. Each symbol is seeded once with a full
+    history request and then topped up with delta requests for bars newer than its last
+    cached timestamp.
+
+    Storage is columnar: one int64 timestamp buffer (symbols x capacity) and one float32 OHLCV
+    buffer (5 x symbols x capacity) shared by every symbol, indexed by a per-symbol row id.
+    Discarded rows are reused."""
+    def __init__(self, capacity: int = BAR_CACHE_CAPACITY, initial_symbols: int = INITIAL_SYMBOLS):
+        self.capacity = capacity
+        self._bars: Dict[str, SymbolBars] = {}
+        self._free: List[int] = []
+        self._allocate(max(1, initial_symbols))
+
+    def _allocate(self, rows: int):
+        timestamps = np.zeros((rows, self.capacity), dtype=np.int64)
+        values = np.zeros((len(BAR_COLUMNS), rows, self.capacity), dtype=np.float32)
+        used = getattr(self, '_rows', 0)
+        if used:
+            timestamps[:used] = self._timestamps
+            values[:, :used] = self._values
+        self._timestamps, self._values = timestamps, values
+        self._free.extend(range(rows - 1, used - 1, -1))
+        self._rows = rows
+
+    def _handle(self, symbol: str) -> SymbolBars:
+        bars = self._bars.get(symbol)
+        if bars is None:
+            if not self._free:
+                self._allocate(self._rows * 2)
+            bars = self._bars[symbol] = SymbolBars(self, self._free.pop())
+        return bars
+
+    def __contains__(self, symbol: str) -> bool:
+        bars = self._bars.get(symbol)
+        return bars is not None and bars.length > 0
+
+    def __len__(self) -> int:
+        return len(self._bars)
+
+    @property
+    def allocated(self) -> int:
+        """Symbol rows allocated in the shared buffers (in use or free)."""
+        return self._rows
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the shared bar buffers."""
+        return self._timestamps.nbytes + self._values.nbytes
+
+    def last_timestamp(self, symbol: str) -> Optional[pd.Timestamp]:
+        bars = self._bars.get(symbol)
+        if bars is None or not bars.length:
+            return None
+        return pd.Timestamp(bars.last_timestamp, unit='ns', tz='UTC')
+
+    def merge(self, symbol: str, df: pd.DataFrame) -> Tuple[int, bool]:
+        return self._handle(symbol).merge(df)
+
+    def push(self, symbol: str, ts: int, row: Tuple) -> Tuple[int, bool]:
+        """Insert or replace a single bar (UTC epoch-ns timestamp, OHLCV tuple), e.g. from a live stream."""
+        appended, revised = self._handle(symbol).upsert(ts, row)
+        return int(appended), revised
+
+    def load(self, symbol: str, timestamps: Sequence[int], rows):
+        """Replace a symbol's bars with already ordered bars (restoring a snapshot); 'rows' is
+        anything np.asarray turns into (n, 5) OHLCV."""
+        bars = self._handle(symbol)
+        bars.length = 0
+        bars.revisions.clear()
+        if len(timestamps):
+            bars._append(np.asarray(timestamps, dtype=np.int64), np.asarray(rows, dtype=np.float32).reshape(-1, 5).T)
+
+    def take_revisions(self, symbol: str) -> List[Revision]:
+        """The symbol's revised and back-filled bars since the last call, oldest change first."""
+        bars = self._bars.get(symbol)
+        if bars is None or not bars.revisions:
+            return []
+        revisions, bars.revisions = bars.revisions, []
+        return revisions
+
+    def items(self) -> Iterator[Tuple[str, SymbolBars]]:
+        """(symbol, SymbolBars) pairs."""
+        return iter(self._bars.items())
+
+    def view(self, symbol: str) -> Optional[SymbolBars]:
+        """The symbol's handle (zero-copy array accessors), None if nothing is cached."""
+        bars = self._bars.get(symbol)
+        return bars if bars is not None and bars.length else None
+
+    def get(self, symbol: str, last: Optional[int] = None) -> Optional[pd.DataFrame]:
+        bars = self.view(symbol)
+        return bars.to_frame(last) if bars is not None else None
+
+    def tail(self, symbol: str, last: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Views of the 'last' cached bars as (UTC epoch ns timestamps, closes, volumes)."""
+        bars = self._bars.get(symbol)
+        if bars is None or last <= 0:
+            empty = np.empty(0)
+            return empty.astype(np.int64), empty, empty
+        start = max(0, bars.length - last)
+        return bars.timestamps[start:], bars.closes[start:], bars.volumes[start:]
+
+    def discard(self, symbol: str):
+        bars = self._bars.pop(symbol, None)
+        if bars is not None:
+            bars.length = 0
+            bars.revisions.clear()
+            self._free.append(bars.sid)
+
+    def clear(self):
+        for bars in self._bars.values():
+            bars.length = 0
+            bars.revisions.clear()
+            self._free.append(bars.sid)
+        self._bars.clear()
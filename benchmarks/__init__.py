@@ -0,0 +1,2 @@
+# Benchmarks: run from the repo root, e.g. python -m benchmarks.bench_keywords
+# or python -m benchmarks.bench_scan --compare (after --save-baseline on the same machine)
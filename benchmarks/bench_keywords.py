@@ -0,0 +1,53 @@
+# benchmarks/bench_keywords.py
+"""Micro-benchmark: catalyst keyword tagging throughput on a synthetic headline corpus.
+
+    python -m benchmarks.bench_keywords [--headlines 200000]
+
+Compares the original per-keyword substring scan with the compiled KEYWORD_MATCHER.
+"""
+import argparse
+import random
+import time
+
+from news_fetcher import KEYWORDS, KEYWORD_MATCHER
+
+FILLER = ("shares", "stock", "company", "reports", "announces", "update", "market", "investors", "trading",
+          "session", "outlook", "higher", "lower", "after", "hours", "premarket", "rally", "slides", "new",
+          "product", "shortage", "confederate", "feedback", "warranty", "finest", "beaten")
+
+
+def make_corpus(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        words = rng.choices(FILLER, k=rng.randint(6, 14))
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), rng.choice(KEYWORDS))
+        corpus.append(" ".join(words).capitalize())
+    return corpus
+
+
+def substring_scan(title: str) -> bool:
+    tl = title.lower()
+    return any(kw.lower() in tl for kw in KEYWORDS)
+
+
+def bench(label: str, fn, corpus):
+    start = time.perf_counter()
+    hits = sum(1 for title in corpus if fn(title))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(corpus) / elapsed:>12,.0f} headlines/s   {hits:>8} tagged   {elapsed:.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--headlines", type=int, default=200_000)
+    args = parser.parse_args()
+    corpus = make_corpus(args.headlines)
+    bench("substring scan (original)", substring_scan, corpus)
+    bench("compiled matcher: search", KEYWORD_MATCHER.search, corpus)
+    bench("compiled matcher: match", KEYWORD_MATCHER.match, corpus)
+
+
+if __name__ == "__main__":
+    main()
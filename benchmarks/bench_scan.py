@@ -0,0 +1,275 @@
+# benchmarks/bench_scan.py
+"""Scan-cycle benchmark on synthetic minute-bar universes, fully offline.
+
+    python -m benchmarks.bench_scan [--sizes 100 1000 10000] [--cycles 20] [--latency-ms 50]
+    python -m benchmarks.bench_scan --save-baseline      # record benchmarks/baseline.json
+    python -m benchmarks.bench_scan --compare            # exit 1 if p50/p95 regressed
+
+Bars are served by backtest.ReplayDataClient behind an injected per-request latency, and
+the scanner's clock advances one minute per cycle so every cycle after the seed is a delta
+fetch. Finnhub is replaced by a stand-in with the same latency. Reported per universe:
+seed (cold) cycle time, steady-state scan_once p50/p95, data HTTP pages and client calls per
+cycle (pages as market_data.expected_bar_pages charges them; a news call is one request),
+peak traced memory over the seed plus one cycle, bar memory per symbol (the shared BarCache
+buffers vs. the per-symbol DataFrames the indicator path builds: bars_to_df plus
+compute_indicators), compute_indicators and extract_headlines_and_catalysts p50/p95 per call, and
+the p50 of the same headline lookup against a populated news_index.NewsIndex.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+import news_fetcher
+import scanner
+from backtest import MINUTE_NS, ReplayDataClient
+from config import BAR_CACHE_CAPACITY, SCAN_BUDGET_PER_CYCLE
+from indicators import compute_indicators
+from market_data import AsyncDataClient
+from news_index import NewsIndex
+from scan_scheduler import TieredScanScheduler
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+# metrics checked by --compare (lower is better)
+COMPARED = ("scan_p50_ms", "scan_p95_ms", "indicators_p50_ms", "headlines_p50_ms")
+
+
+def make_universe(n_symbols: int, minutes: int, seed: int = 11) -> Dict[str, tuple]:
+    """{symbol: (timestamps ns, N x 5 OHLCV)} ending at the current minute. About one symbol in
+    five trends up on rising volume so the signal and news paths are exercised; one in ten
+    trades above MAX_PRICE so the snapshot prefilter has work to do."""
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now(tz="UTC").floor("min").value
+    timestamps = end - MINUTE_NS * np.arange(minutes - 1, -1, -1, dtype=np.int64)
+    bars = {}
+    for i in range(n_symbols):
+        base = rng.uniform(12, 40) if i % 10 == 9 else rng.uniform(1, 9)
+        drift = 0.0015 if i % 5 == 0 else 0.0
+        close = base * np.exp(np.cumsum(rng.normal(drift, 0.003, minutes)))
+        volume = rng.integers(40_000, 160_000, minutes).astype(float)
+        spikes = rng.random(minutes) < (0.05 if drift else 0.01)
+        volume[spikes] *= rng.uniform(2, 6, spikes.sum())
+        high = close * (1 + rng.uniform(0, 0.002, minutes))
+        low = close * (1 - rng.uniform(0, 0.002, minutes))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        bars[f"SYN{i:05d}"] = (timestamps, np.column_stack((open_, high, low, close, volume)))
+    return bars
+
+
+class SlowClient:
+    """Adds a fixed latency to every data call (they run in worker threads)."""
+    def __init__(self, client: ReplayDataClient, latency_seconds: float):
+        self.client = client
+        self.latency_seconds = latency_seconds
+
+    def get_stock_bars(self, request):
+        time.sleep(self.latency_seconds)
+        return self.client.get_stock_bars(request)
+
+    def get_stock_snapshot(self, request):
+        time.sleep(self.latency_seconds)
+        return self.client.get_stock_snapshot(request)
+
+
+class FakeNewsClient:
+    """Stand-in for news_fetcher.AsyncNewsClient: a few headlines per symbol, some with catalysts."""
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+        self.requests = 0
+
+    def items(self, ticker: str) -> List[Dict]:
+        now = int(time.time())
+        return [{"headline": f"{ticker} announces FDA approval for lead candidate", "datetime": now, "url": ""},
+                {"headline": f"{ticker} shares move higher in premarket trading", "datetime": now - 600, "url": ""},
+                {"headline": f"Analysts update outlook on {ticker} after the session", "datetime": now - 3600, "url": ""}]
+
+    async def company_news(self, ticker: str, days_back: int = 7) -> List[Dict]:
+        self.requests += 1
+        await asyncio.sleep(self.latency_seconds)
+        return self.items(ticker)
+
+    def company_news_sync(self, ticker: str, days_back: int = 7) -> List[Dict]:
+        self.requests += 1
+        time.sleep(self.latency_seconds)
+        return self.items(ticker)
+
+
+class _NeverPosted:
+    def wants(self, values) -> bool:
+        return True
+
+
+def _percentiles(samples: List[float]) -> tuple:
+    if not samples:
+        return 0.0, 0.0
+    return float(np.percentile(samples, 50) * 1000), float(np.percentile(samples, 95) * 1000)
+
+
+def _reset_scanner(client, budget: int, start_ns: int):
+    scanner._data = AsyncDataClient(client, requests_per_minute=10**9,
+                                    clock=lambda: client.client.now.to_pydatetime())
+    scanner._bar_cache.clear()
+    scanner._indicator_states.clear()
+    scanner._scheduler = TieredScanScheduler(budget=budget)
+    client.client.now = pd.Timestamp(start_ns, tz="UTC")
+    scanner.now_utc = lambda: client.client.now.to_pydatetime()
+
+
+async def _cycle(universe: List[str], client, news: FakeNewsClient):
+    pages_before, calls_before, news_before = scanner._data.requests_made, scanner._data.calls, news.requests
+    started = time.perf_counter()
+    await scanner.scan_once(universe, _NeverPosted())
+    elapsed = time.perf_counter() - started
+    client.client.now += pd.Timedelta(minutes=1)
+    return (elapsed, scanner._data.requests_made - pages_before, scanner._data.calls - calls_before,
+            news.requests - news_before)
+
+
+def frame_bytes_per_symbol(symbols: List[str]) -> float:
+    """Traced bytes per symbol of holding the cached bars as per-symbol indicator DataFrames."""
+    tracemalloc.start()
+    held = [compute_indicators(scanner.bars_to_df(scanner._bar_cache.get(symbol))) for symbol in symbols]
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return used / max(1, len(symbols))
+
+
+def bench_universe(n_symbols: int, cycles: int, latency_seconds: float, budget: int) -> Dict:
+    bars = make_universe(n_symbols, BAR_CACHE_CAPACITY + cycles + 2)
+    universe = sorted(bars)
+    client = SlowClient(ReplayDataClient(bars), latency_seconds)
+    news = FakeNewsClient(latency_seconds)
+    news_fetcher._news_client = news
+    news_fetcher._finnhub_company_news = news.company_news_sync
+    start_ns = int(bars[universe[0]][0][BAR_CACHE_CAPACITY]) + MINUTE_NS
+
+    async def timed():
+        seed = await _cycle(universe, client, news)
+        return seed, [await _cycle(universe, client, news) for _ in range(cycles)]
+
+    _reset_scanner(client, budget, start_ns)
+    (seed_seconds, *_), steady = asyncio.run(timed())
+    scan_p50, scan_p95 = _percentiles([s for s, *_ in steady])
+
+    async def traced():
+        await _cycle(universe, client, news)
+        await _cycle(universe, client, news)
+
+    _reset_scanner(client, budget, start_ns)
+    tracemalloc.start()
+    asyncio.run(traced())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    cached = [symbol for symbol in universe if symbol in scanner._bar_cache]
+    store_bytes = scanner._bar_cache.nbytes / scanner._bar_cache.allocated
+    frame_bytes = frame_bytes_per_symbol(cached[:200])
+
+    frames = [scanner.bars_to_df(scanner._bar_cache.get(symbol)) for symbol in universe[:1000]
+              if symbol in scanner._bar_cache]
+    indicator_samples = []
+    for df in frames:
+        started = time.perf_counter()
+        compute_indicators(df)
+        indicator_samples.append(time.perf_counter() - started)
+    headline_samples = []
+    for symbol in universe[:50]:
+        started = time.perf_counter()
+        news_fetcher.extract_headlines_and_catalysts(symbol, days_back=5, max_headlines=5)
+        headline_samples.append(time.perf_counter() - started)
+
+    # the same lookups served from a market-wide news index
+    index = NewsIndex()
+    for symbol in universe:
+        for i, item in enumerate(news.items(symbol)):
+            index.add(f"{symbol}-{i}", item["datetime"], item["headline"], item["url"], [symbol])
+    index_samples = []
+    for symbol in universe[:1000]:
+        started = time.perf_counter()
+        index.lookup(symbol, days_back=5, max_headlines=5)
+        index_samples.append(time.perf_counter() - started)
+
+    indicators_p50, indicators_p95 = _percentiles(indicator_samples)
+    headlines_p50, headlines_p95 = _percentiles(headline_samples)
+    return {
+        "symbols": n_symbols,
+        "budget": budget,
+        "seed_ms": seed_seconds * 1000,
+        "scan_p50_ms": scan_p50,
+        "scan_p95_ms": scan_p95,
+        "data_pages_per_cycle": float(np.mean([p for _, p, _, _ in steady])),
+        "data_calls_per_cycle": float(np.mean([c for _, _, c, _ in steady])),
+        "news_requests_per_cycle": float(np.mean([n for _, _, _, n in steady])),
+        "peak_mb": peak / 2**20,
+        "store_bytes_per_symbol": store_bytes,
+        "frame_bytes_per_symbol": frame_bytes,
+        "indicators_p50_ms": indicators_p50,
+        "indicators_p95_ms": indicators_p95,
+        "headlines_p50_ms": headlines_p50,
+        "headlines_p95_ms": headlines_p95,
+        "news_index_p50_ms": _percentiles(index_samples)[0],
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Metrics in COMPARED that are more than 'tolerance' (fraction) worse than the baseline."""
+    regressions = []
+    for size, metrics in results.items():
+        previous = baseline.get(size)
+        if previous is None:
+            continue
+        for key in COMPARED:
+            before, now = previous.get(key), metrics.get(key)
+            if before and now is not None and now > before * (1 + tolerance):
+                regressions.append(f"{size} symbols: {key} {before:.2f} -> {now:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--cycles", type=int, default=20, help="timed cycles after the seed cycle")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="injected latency per data/news client call")
+    parser.add_argument("--budget", type=int, default=SCAN_BUDGET_PER_CYCLE, help="symbols scanned per cycle")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+    scanner.logger.setLevel("WARNING")
+
+    results = {}
+    for size in args.sizes:
+        results[str(size)] = metrics = bench_universe(size, args.cycles, args.latency_ms / 1000, args.budget)
+        print(f"{size:>6} symbols  seed {metrics['seed_ms']:8.1f} ms  scan p50 {metrics['scan_p50_ms']:8.1f} ms"
+              f"  p95 {metrics['scan_p95_ms']:8.1f} ms  {metrics['data_pages_per_cycle']:5.1f} data pages"
+              f" ({metrics['data_calls_per_cycle']:.1f} calls) + {metrics['news_requests_per_cycle']:4.1f} news req/cycle  peak {metrics['peak_mb']:7.1f} MB"
+              f"  bars/symbol {metrics['store_bytes_per_symbol'] / 1024:.1f} KB"
+              f" (frames {metrics['frame_bytes_per_symbol'] / 1024:.1f} KB)"
+              f"  indicators p50 {metrics['indicators_p50_ms']:.2f} ms  headlines p50 {metrics['headlines_p50_ms']:.1f} ms"
+              f" (news index {metrics['news_index_p50_ms'] * 1000:.1f} us)")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    if args.compare:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
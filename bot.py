@@ -1,64 +1,36 @@
 # bot.py
 # bot.py
 import asyncio
-from typing import List
-import os
+from typing import Dict, List, Optional, Tuple
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 # removed erroneous top-level await; ensure SCAN_INTERVAL_SECONDS is used inside async functions
-from config import DISCORD_TOKEN, DISCORD_CHANNEL_ID, SCAN_INTERVAL_SECONDS
-# Local lightweight replacements for missing utils module:
+from config import (DISCORD_TOKEN, DISCORD_CHANNEL_ID, SCAN_INTERVAL_SECONDS, STREAMING_MODE, SCAN_WORKERS,
+                    STATE_SNAPSHOT_PATH, SNAPSHOT_INTERVAL_SECONDS, MAX_PRICE, LOW_FLOAT_MILLIONS, LOW_FLOAT_FILTER,
+                    NEWS_INGEST_ENABLED, ALPACA_API_KEY, ALPACA_API_SECRET)
 import time
 import datetime
-from utils import is_market_window, PostedTickerStore, sleep_until_next_cycle
+from utils import is_market_window
 import logging
-from scanner import build_universe, scan_once
 
 # Setup logging
 logger = logging.getLogger("trendsniper")
 
 logging.basicConfig( level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", )
 
-class PostedTickerStore:
-    """In-memory set to track tickers posted during the bot session."""
-    def __init__(self):
-        self._posted = set()
-
-    def add(self, ticker: str):
-        self._posted.add(ticker)
-
-    def contains(self, ticker: str) -> bool:
-        return ticker in self._posted
-
-    def clear(self):
-        self._posted.clear()
-
-    def to_list(self) -> List[str]:
-        return list(self._posted)
-
-def is_market_window() -> bool:
-    """Approximate US market hours (Mon-Fri 09:30-16:00 ET) using UTC times (13:30-20:00 UTC).
-    This is a conservative approximation that ignores DST nuances but works for short-term testing.
-    """
-    now = datetime.datetime.utcnow()
-    # Weekdays only
-    if now.weekday() >= 5:
-        return False
-    open_utc = now.replace(hour=13, minute=30, second=0, microsecond=0)
-    close_utc = now.replace(hour=20, minute=0, second=0, microsecond=0)
-    return open_utc <= now <= close_utc
-
-async def sleep_until_next_cycle(interval_seconds: int):
-    """Sleep until the next multiple of interval_seconds from the epoch (align scan cycles)."""
-    now = time.time()
-    next_cycle = ((now // interval_seconds) + 1) * interval_seconds
-    delay = max(0.0, next_cycle - now)
-    await asyncio.sleep(delay)
-import logging
-from scanner import build_universe, scan_once
-from indicators import compute_indicators
-from news_fetcher import extract_headlines_and_catalysts
+from scanner import build_universe, refresh_fundamentals, build_ideas, prefetch_cycle, complete_cycle, save_state, restore_state
+from shard_worker import ShardedScanner, rate_share_per_min
+from indicators import US_EASTERN
+from live_stream import LiveBarStream
+import metrics
+from alert_dispatcher import AlertDispatcher
+from cycle_scheduler import CycleScheduler
+import news_fetcher
+from news_index import NewsIndex, NewsIngester
+from market_data import AsyncDataClient
+from alpaca.data.historical.news import NewsClient
+from subscriptions import Subscription, load_subscriptions
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s-%(levelname)s-%(message)s")
 logger = logging.getLogger("TrendsniperBot")
@@ -70,9 +42,18 @@ tree = bot.tree
 
 # state flags
 _scanning_enabled = True
-_posted_store = PostedTickerStore()
+_subscriptions = load_subscriptions()
 _universe = []
 _scan_task = None
+_live_stream = None
+_sharded_scanner = None
+_last_snapshot = 0.0
+# channel id -> its alert dispatcher (own queue and rate-limit backoff)
+_dispatchers: Dict[int, AlertDispatcher] = {}
+_cycle_scheduler = CycleScheduler(SCAN_INTERVAL_SECONDS)
+_universe_day = None
+_news_ingester = None
+_fundamentals_task = None
 
 
 @bot.event
@@ -85,12 +66,32 @@ async def on_ready():
     except Exception as e:
         logger.warning(f"Error syncing app commands: {e}")
     # Build universe in background
-    global _universe, _scan_task
+    global _universe, _scan_task, _universe_day
     _universe = await build_universe()
+    _universe_day = datetime.datetime.now(US_EASTERN).date()
     logger.info(f'Universe loaded: {len(_universe)} symbols.')
-    # Start scanning loop
+    start_fundamentals_refresh()
+    # warm restart: cached bars, indicator state and per-channel posted tickers from the last snapshot
+    if _scan_task is None:
+        posted = await asyncio.to_thread(restore_state, STATE_SNAPSHOT_PATH)
+        _subscriptions.restore_posted(posted)
+    logger.info(f'Alert subscriptions: {len(_subscriptions)} channels.')
+    # Market-wide news feed indexed by ticker; catalyst checks become local lookups once it is up.
+    # Its polls share the account's rate limit with the scanner's bar requests; with shard workers
+    # (each with its own bucket) it gets the coordinator's slice of the quota.
+    global _news_ingester
+    if _news_ingester is None and NEWS_INGEST_ENABLED:
+        rate = rate_share_per_min(SCAN_WORKERS) if SCAN_WORKERS > 0 else None
+        _news_ingester = NewsIngester(AsyncDataClient(NewsClient(ALPACA_API_KEY, ALPACA_API_SECRET), max_concurrency=1,
+                                                      requests_per_minute=rate), NewsIndex())
+        news_fetcher.use_news_index(_news_ingester)
+        _news_ingester.start()
+    # Start scanning loop (or the live bar stream in streaming mode)
     if _scan_task is None:
-        _scan_task = bot.loop.create_task(scanning_loop())
+        if STREAMING_MODE:
+            _scan_task = bot.loop.create_task(streaming_loop())
+        else:
+            _scan_task = bot.loop.create_task(scanning_loop())
     # send ready message 
     channel = bot.get_channel(DISCORD_CHANNEL_ID)
     if channel: 
@@ -100,67 +101,190 @@ async def on_ready():
             logger.debug(f"Failed to send ready message: {e}")
 
 
+def build_alert_embed(idea: dict, subscription: Optional[Subscription] = None) -> discord.Embed:
+    """Pretty embed for one trade idea dict from scanner; the footer shows the channel's filters."""
+    embed = discord.Embed(
+        title=f"TrendSniper Alert - {idea['symbol']}",
+        description=f"Price: ${idea['price']:.4f}",
+        color=discord.Color.green()
+    )
+    embed.add_field(name="Entry", value=f"${idea['entry']}", inline=True)
+    embed.add_field(name="Stop", value=f"${idea['stop']}", inline=True)
+    embed.add_field(name="Take", value=f"${idea['take']}", inline=True)
+    embed.add_field(name="Shares", value=f"{idea['shares']}", inline=True)
+    embed.add_field(name="VWAP", value=f"${idea['vwap']:.4f}", inline=True)
+    embed.add_field(name="MA20 / MA50", value=f"${idea['ma20']:.4f} / {idea['ma50']:.4f}", inline=True)
+    embed.add_field(name="Volume (last/avg)", value=f"{idea['last_volume']} / {idea['avg_volume']}", inline=True)
+    float_filter = f"Float < {LOW_FLOAT_MILLIONS:g}M" if LOW_FLOAT_FILTER else "Any float"
+    filters = subscription.describe() if subscription is not None else f"Price < ${MAX_PRICE:g}"
+    embed.set_footer(text=f"Filters: {filters} . {float_filter} . High Volume")
+
+    # news / catalyst 
+    news_list = idea.get("news", [])
+    if idea.get("has_catalyst"):
+        embed.add_field(name="Catalyst", value="Yes - relevant news found", inline=False)
+    elif news_list:
+        embed.add_field(name="News", value=f"{len(news_list)} recent healines", inline=False)
+
+    if news_list:
+        lines = []
+        for n in news_list[:3]:
+            title = n.get("headline", "")
+            url = n.get("url", "")
+
+            if url: 
+                line = f"[{title}]({url})"
+            else:
+                line = title
+            lines.append(line)
+        embed.add_field(name="Headlines", value="\n".join(lines), inline=False)
+    return embed
+
+
+def dispatcher_for(channel_id: int) -> AlertDispatcher:
+    """The channel's alert dispatcher, started on first use."""
+    dispatcher = _dispatchers.get(channel_id)
+    if dispatcher is None:
+        dispatcher = _dispatchers[channel_id] = AlertDispatcher(
+            lambda: bot.get_channel(channel_id),
+            lambda idea: build_alert_embed(idea, _subscriptions.get(channel_id)))
+        dispatcher.start()
+    return dispatcher
+
+
+def post_ideas(ideas: List[dict]):
+    """Fan the cycle's trade ideas out to every subscription they match and have not been posted
+    to, queueing them on each channel's dispatcher; returns immediately."""
+    for channel_id, channel_ideas in _subscriptions.fan_out(ideas).items():
+        dispatcher = dispatcher_for(channel_id)
+        for idea in channel_ideas:
+            dispatcher.submit(idea)
+
+
+async def streaming_loop():
+    """Streaming mode: evaluate the signal rule per streamed minute bar instead of polling. The
+    warm-restart snapshot is written alongside, as in the polling loop."""
+    global _live_stream
+    await bot.wait_until_ready()
+
+    async def on_signal(idea: dict):
+        post_ideas([idea])
+
+    async def save_snapshots():
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL_SECONDS)
+            await maybe_save_snapshot()
+
+    _live_stream = LiveBarStream(on_signal, _subscriptions)
+    _live_stream.enabled = _scanning_enabled
+    snapshots = asyncio.ensure_future(save_snapshots())
+    try:
+        await _live_stream.start(_universe)
+    finally:
+        snapshots.cancel()
+
+
+async def run_scan_cycle(deadline: float, prefetch: Optional[asyncio.Task]) -> Tuple[list, Optional[asyncio.Task]]:
+    """One scan cycle, due by 'deadline' (time.monotonic()). Returns (ideas, prefetch task for
+    the next cycle).
+
+    In-process, the cycle is pipelined: 'prefetch' (scheduling, snapshot prefilter and cold-symbol
+    seeding, started after the previous cycle) is awaited, the fresh bars are evaluated, and the
+    next cycle's prefetch starts while this cycle's news lookups run. With SCAN_WORKERS > 0 this
+    is the coordinator: shard workers return their candidates, which are merged here before the
+    per-subscription dedup and result cap."""
+    global _sharded_scanner
+    if SCAN_WORKERS <= 0:
+        prepared = await (prefetch if prefetch is not None else prefetch_cycle(_universe))
+        signals = await complete_cycle(prepared, deadline)
+        next_prefetch = asyncio.ensure_future(prefetch_cycle(_universe))
+        return await build_ideas(signals, _subscriptions, deadline=deadline), next_prefetch
+    if _sharded_scanner is None:
+        _sharded_scanner = ShardedScanner(SCAN_WORKERS)
+        _sharded_scanner.start()
+    with metrics.timer("shard_scan"):
+        candidates = await _sharded_scanner.scan_candidates(_universe, timeout=deadline - time.monotonic())
+    return await build_ideas(candidates, _subscriptions, deadline=deadline), None
+
+
+async def maybe_save_snapshot(force: bool = False):
+    """Write the warm-restart snapshot every SNAPSHOT_INTERVAL_SECONDS (shard workers write their own)."""
+    global _last_snapshot
+    now = time.monotonic()
+    if not force and now - _last_snapshot < SNAPSHOT_INTERVAL_SECONDS:
+        return
+    _last_snapshot = now
+    try:
+        save_state(STATE_SNAPSHOT_PATH, _subscriptions.posted_entries())
+    except Exception as e:
+        logger.warning(f"Failed to save state snapshot: {e}")
+
+
+async def _refresh_fundamentals():
+    global _universe
+    try:
+        if await refresh_fundamentals():
+            _universe = await build_universe()
+            logger.info(f'Universe rebuilt with refreshed fundamentals: {len(_universe)} symbols.')
+    except Exception as e:
+        logger.warning(f"Failed to refresh fundamentals: {e}")
+
+
+def start_fundamentals_refresh():
+    """Refresh the low-float filter's fundamentals in a background task (Yahoo lookups can
+    take minutes) and rebuild the universe with them when done; no-op while one is running."""
+    global _fundamentals_task
+    if LOW_FLOAT_FILTER and (_fundamentals_task is None or _fundamentals_task.done()):
+        _fundamentals_task = asyncio.get_running_loop().create_task(_refresh_fundamentals())
+
+
+async def maybe_refresh_universe():
+    """Rebuild the universe (asset list and low-float filter) on the first cycle of each ET day."""
+    global _universe, _universe_day
+    today = datetime.datetime.now(US_EASTERN).date()
+    if _universe_day == today:
+        return
+    _universe_day = today
+    try:
+        _universe = await build_universe()
+        logger.info(f'Universe refreshed for {today}: {len(_universe)} symbols.')
+        start_fundamentals_refresh()
+    except Exception as e:
+        logger.warning(f"Failed to refresh universe: {e}")
+
+
 async def scanning_loop():
-    """Main loop that runs scans every SCAN_INTERVAL_SECONDS during market hours."""
+    """Main loop: one scan per SCAN_INTERVAL_SECONDS boundary during the market window, each
+    bounded by its cycle deadline; boundaries missed by an overrunning cycle are skipped."""
     await bot.wait_until_ready()
-    channel = None
-    if DISCORD_CHANNEL_ID:
-        channel = bot.get_channel(DISCORD_CHANNEL_ID)
     global _scanning_enabled
+    prefetch = None
     while not bot.is_closed():
         try:
             if _scanning_enabled and is_market_window():
+                if prefetch is None:
+                    await maybe_refresh_universe()
+                if prefetch is None and SCAN_WORKERS <= 0:
+                    prefetch = asyncio.ensure_future(prefetch_cycle(_universe))
+                boundary = await _cycle_scheduler.wait()
                 logger.info("Starting scan cycle...")
-                # Sleep until aligned cycle
-                await sleep_until_next_cycle(SCAN_INTERVAL_SECONDS)
-                # perform one scan
-                results = await scan_once(_universe, _posted_store)
+                cycle_started = time.monotonic()
+                current, prefetch = prefetch, None
+                results, prefetch = await run_scan_cycle(_cycle_scheduler.deadline(boundary), current)
                 if results:
-                    for idea in results:
-                        # post pretty embed
-                        embed = discord.Embed(
-                            title=f"TrendSniper Alert - {idea['ticker']}",
-                            description=f"Price: ${idea['price']:.4f}",
-                            color=discord.Color.green()
-                        )
-                        embed.add_field(name="Entry", value=f"${idea['entry']}", inline=True)
-                        embed.add_field(name="Stop", value=f"${idea['stop']}", inline=True)
-                        embed.add_field(name="Take", value=f"${idea['take']}", inline=True)
-                        embed.add_field(name="Shares", value=f"{idea['shares']}", inline=True)
-                        embed.add_field(name="VWAP", value=f"${idea['vwap']:.4f}", inline=True)
-                        embed.add_field(name="MA20 / MA50", value=f"${idea['ma20']:.4f} / {idea['ma50']:.4f}", inline=True)
-                        embed.add_field(name="Volume (last/avg)", value=f"{idea['last_volume']} / {idea['avg_volume']}", inline=True)
-                        embed.set_footer(text="Filters: Price < $10 . Low-float . High Volume")
-
-                        # news / catalyst 
-                        news_list = idea.get("news", [])
-                        if idea.get("has_catalyst"):
-                            embed.add_field(name="Catalyst", value="Yes - relevant news found", inline=False)
-                        elif news_list:
-                            embed.add_field(name="News", value=f"{len(news_list)} recent healines", inline=False)
-
-                        if news_list:
-                            lines = []
-                            for n in news_list[:3]:
-                                title = n.get("headline", "")
-                                url = n.get("url", "")
-
-                                if url: 
-                                    line = f"[{title}]({url})"
-                                else:
-                                    line = title
-                                lines.append(line)
-                            embed.add_field(name="Headlines", value="\n".join(lines), inline=False)
-                        if channel:
-                            try:
-                                await channel.send(embed=embed)
-                            except Exception as e:
-                                logger.warning(f"Failed to send message: {e}")
+                    # queued for the dispatcher tasks; the scan loop never waits on Discord
+                    post_ideas(results)
                 else:
                     logger.debug("No signals this cycle.")
+                metrics.record_cycle(time.monotonic() - cycle_started, SCAN_INTERVAL_SECONDS)
+                await maybe_save_snapshot()
             else:
                 # not scanning; ensure sleep but keep alive
                 logger.debug("Scanning paused or market closed.")
+                if prefetch is not None:
+                    prefetch.cancel()
+                    prefetch = None
+                _cycle_scheduler.reset()
                 await asyncio.sleep(10)
         except Exception as e:
             logger.exception(f"Error in scanning loop: {e}")
@@ -171,30 +295,80 @@ async def scanning_loop():
 async def start(interaction: discord.Interaction):
     global _scanning_enabled
     _scanning_enabled = True
-    _posted_store.clear()  # Clear posted tickers to allow reposting
+    if _live_stream is not None:
+        _live_stream.enabled = True
+    _subscriptions.clear_posted()  # Clear posted tickers to allow reposting
     await interaction.response.send_message("Scanning started.", ephemeral=True)
 
 @tree.command(name="pause", description="Stop scanning for trade ideas.")
 async def pause(interaction: discord.Interaction):
     global _scanning_enabled
     _scanning_enabled = False
+    if _live_stream is not None:
+        _live_stream.enabled = False
     await interaction.response.send_message("Scanning paused.", ephemeral=True)
 
 @tree.command(name="reset", description="Reset posted tickers a and refresh universe.")
 async def reset(interaction: discord.Interaction):
-    global _posted_store, _universe
-    _posted_store.clear()
+    global _universe
+    # the asset list may come from Alpaca: answer within Discord's 3s window and follow up
+    await interaction.response.defer(ephemeral=True)
+    _subscriptions.clear_posted()
     _universe = await build_universe()
-    await interaction.response.send_message(f"Posted tickers cleared and universe refreshed symbols).", ephemeral=True)
+    start_fundamentals_refresh()
+    await interaction.followup.send(f"Posted tickers cleared and universe refreshed ({len(_universe)} symbols).", ephemeral=True)
+
+@tree.command(name="subscribe", description="Post alerts in this channel, with its own filters.")
+@app_commands.default_permissions(manage_channels=True)
+@app_commands.describe(max_price="Only symbols below this price", volume_multiple="Last-minute volume above this multiple of the average",
+                       min_avg_volume="Minimum average minute volume", catalyst_only="Only symbols with catalyst news")
+async def subscribe(interaction: discord.Interaction, max_price: Optional[float] = None, volume_multiple: Optional[float] = None,
+                    min_avg_volume: Optional[int] = None, catalyst_only: bool = False):
+    subscription = Subscription(interaction.channel_id, interaction.guild_id or 0,
+                                max_price if max_price is not None else float("inf"), volume_multiple or 0.0,
+                                min_avg_volume or 0, catalyst_only)
+    _subscriptions.set(subscription)
+    try:
+        _subscriptions.save()
+    except OSError as e:
+        logger.warning(f"Failed to save subscriptions: {e}")
+    await interaction.response.send_message(f"Alerts subscribed: {subscription.describe()}", ephemeral=True)
+
+@tree.command(name="unsubscribe", description="Stop posting alerts in this channel.")
+@app_commands.default_permissions(manage_channels=True)
+async def unsubscribe(interaction: discord.Interaction):
+    if not _subscriptions.remove(interaction.channel_id):
+        await interaction.response.send_message("This channel has no alert subscription.", ephemeral=True)
+        return
+    try:
+        _subscriptions.save()
+    except OSError as e:
+        logger.warning(f"Failed to save subscriptions: {e}")
+    await interaction.response.send_message("Alerts unsubscribed.", ephemeral=True)
 
 @tree.command(name="status", description="Get current scanning status.")
 async def status(interaction: discord.Interaction):
     import datetime
     nm ="ON" if _scanning_enabled else "OFF"
     env = "Market Window" if is_market_window() else "Outside Market Hours"
-    posted_count= len(_universe)
+    posted_count= _subscriptions.posted_count()
     uni_len =len(_universe)
     txt = f"Scanning: **{nm}**\nwindow: **{env}**\nPosted Tickers: (session): **{posted_count}**\nUniverse size: **{uni_len}**\nTime: {datetime.datetime.now().isoformat()}"
+    subscription = _subscriptions.get(interaction.channel_id)
+    txt += f"\nSubscribed channels: **{len(_subscriptions)}**"
+    if subscription is not None:
+        txt += f" (this channel: {subscription.describe()}, {len(subscription.posted)} posted)"
+    if _dispatchers:
+        txt += f"\nAlert queue: **{sum(d.pending() for d in _dispatchers.values())}** pending"
+    if _news_ingester is not None:
+        state = "ready" if _news_ingester.ready else "warming up (Finnhub fallback)"
+        txt += (f"\nNews index: **{len(_news_ingester.index)}** headlines for "
+                f"**{_news_ingester.index.symbols()}** tickers, {state}")
+    jitter = _cycle_scheduler.jitter_stats()
+    if jitter["count"]:
+        txt += (f"\nCycle start jitter: median **{jitter['median'] * 1000:.0f} ms**, max **{jitter['max'] * 1000:.0f} ms**"
+                f" ({jitter['skipped']} cycles skipped)")
+    txt += "\n" + "\n".join(metrics.summary())
     await interaction.response.send_message(txt, ephemeral=True)
 
 
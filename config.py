@@ -15,6 +15,9 @@ FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY", "YOUR_FINNHUB_API_KEY")
 # Discord
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN", "YOUR_DISCORD_BOT_TOKEN")
 DISCORD_CHANNEL_ID = int(os.getenv("DISCORD_CHANNEL_ID", "0"))
+# Per-channel alert filters set with /subscribe; without this file alerts go to DISCORD_CHANNEL_ID
+# with the default thresholds
+SUBSCRIPTIONS_PATH = os.getenv("SUBSCRIPTIONS_PATH", "subscriptions.json")
 
 # Bot settings
 CAPITAL_PER_TRADE = float(os.getenv("CAPITAL_PER_TRADE", "1000"))
@@ -22,11 +25,112 @@ MAX_RESULTS_PER_SCAN = int(os.getenv("MAX_RESULTS_PER_SCAN", "25"))
 MIN_AVG_VOLUME = int(os.getenv("MIN_AVG_VOLUME", "100000"))
 LOW_FLOAT_MILLIONS = float(os.getenv("LOW_FLOAT_MILLIONS", "20"))
 SCAN_INTERVAL_SECONDS = int(os.getenv("SCAN_INTERVAL_SECONDS", "60"))
+# Each cycle must finish within this fraction of the interval (late bar requests and news lookups
+# are deferred); a boundary reached more than CYCLE_MAX_START_DELAY_SECONDS late is skipped
+CYCLE_DEADLINE_FRACTION = float(os.getenv("CYCLE_DEADLINE_FRACTION", "0.8"))
+CYCLE_MAX_START_DELAY_SECONDS = float(os.getenv("CYCLE_MAX_START_DELAY_SECONDS", "5"))
+
+# Warm restarts: snapshot of bar cache, indicator state and posted tickers, written every
+# SNAPSHOT_INTERVAL_SECONDS and reloaded at startup if younger than SNAPSHOT_MAX_AGE_SECONDS
+STATE_SNAPSHOT_PATH = os.getenv("STATE_SNAPSHOT_PATH", "state_snapshot.npz")
+SNAPSHOT_INTERVAL_SECONDS = int(os.getenv("SNAPSHOT_INTERVAL_SECONDS", "300"))
+SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv("SNAPSHOT_MAX_AGE_SECONDS", "1800"))
+
+# Alert dispatcher: alerts waiting longer than ALERT_FRESHNESS_SECONDS are dropped ("drop") or
+# collapsed into one "Delayed alerts" embed ("merge"); at most ALERT_QUEUE_SIZE alerts wait
+ALERT_FRESHNESS_SECONDS = float(os.getenv("ALERT_FRESHNESS_SECONDS", "120"))
+ALERT_STALE_POLICY = os.getenv("ALERT_STALE_POLICY", "merge").lower()
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", "500"))
+
+# Per-stage latency histograms and counters, served at /metrics by ping.py and summarized by /status
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Sharded scanning: worker processes (0 = scan in the bot process) and seconds to wait for a shard each cycle
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "0"))
+SHARD_TIMEOUT_SECONDS = float(os.getenv("SHARD_TIMEOUT_SECONDS", "50"))
+
+# Adaptive scan scheduling: symbols scanned per cycle, max cycles between scans of a quiet
+# (cold) symbol, and quiet cycles before a hot symbol is demoted. A symbol turns hot when its
+# last volume exceeds HOT_VOLUME_MULTIPLIER x average, or close/VWAP and MA20/MA50 are within
+# HOT_PROXIMITY_PCT of crossing. MAX_RESULTS_PER_SCAN caps the alerts per cycle.
+SCAN_BUDGET_PER_CYCLE = int(os.getenv("SCAN_BUDGET_PER_CYCLE", "500"))
+COLD_MAX_STALENESS_CYCLES = int(os.getenv("COLD_MAX_STALENESS_CYCLES", "10"))
+HOT_TTL_CYCLES = int(os.getenv("HOT_TTL_CYCLES", "5"))
+HOT_VOLUME_MULTIPLIER = float(os.getenv("HOT_VOLUME_MULTIPLIER", "1.3"))
+HOT_PROXIMITY_PCT = float(os.getenv("HOT_PROXIMITY_PCT", "1.0"))
+
+# Signal rule: price cap and last-bar volume vs 20-bar average multiple
+MAX_PRICE = float(os.getenv("MAX_PRICE", "10"))
+VOLUME_SPIKE_MULTIPLIER = float(os.getenv("VOLUME_SPIKE_MULTIPLIER", "1.8"))
+# Signal rule override, e.g. "close < 5; avg_volume >= 200000; close > vwap; has_catalyst" (see
+# signal_rules.py); empty = the rule built from MAX_PRICE, MIN_AVG_VOLUME and VOLUME_SPIKE_MULTIPLIER
+SIGNAL_RULE = os.getenv("SIGNAL_RULE", "")
+# Screen the whole universe with NumPy arrays instead of per-symbol indicator state
+VECTOR_SCREEN = os.getenv("VECTOR_SCREEN", "false").lower() in ("1", "true", "yes")
+
+# Universe: daily on-disk cache of tradable US equities, and how symbols.txt is applied
+# (override = use it as the universe when present, whitelist = restrict the asset list to it, ignore)
+ASSET_CACHE_PATH = os.getenv("ASSET_CACHE_PATH", "assets_cache.csv")
+SYMBOLS_FILE = os.getenv("SYMBOLS_FILE", "symbols.txt")
+SYMBOLS_FILE_MODE = os.getenv("SYMBOLS_FILE_MODE", "override").lower()
+
+# Low-float filter: the universe is pruned to symbols with a float below LOW_FLOAT_MILLIONS before
+# any bar fetch. Floats come from a daily on-disk cache, a local CSV stand-in (symbol,float_millions,
+# shares_millions; wins over fetched values) and up to FUNDAMENTALS_FETCH_LIMIT Yahoo Finance
+# lookups per day (0 = offline) for symbols never fetched or older than FUNDAMENTALS_MAX_AGE_DAYS.
+# Symbols with an unknown float are kept unless LOW_FLOAT_KEEP_UNKNOWN is off. Off by default: it is
+# meant for the full asset list (the large caps in symbols.txt would all be dropped), and at 300
+# lookups a day the ~10k-symbol list takes about a month to cover, so seed FUNDAMENTALS_FILE to skip that.
+# The lookups run in the background; the universe is re-pruned when they finish.
+LOW_FLOAT_FILTER = os.getenv("LOW_FLOAT_FILTER", "false").lower() in ("1", "true", "yes")
+LOW_FLOAT_KEEP_UNKNOWN = os.getenv("LOW_FLOAT_KEEP_UNKNOWN", "true").lower() in ("1", "true", "yes")
+FUNDAMENTALS_CACHE_PATH = os.getenv("FUNDAMENTALS_CACHE_PATH", "fundamentals_cache.npz")
+FUNDAMENTALS_FILE = os.getenv("FUNDAMENTALS_FILE", "fundamentals.csv")
+FUNDAMENTALS_FETCH_LIMIT = int(os.getenv("FUNDAMENTALS_FETCH_LIMIT", "300"))
+FUNDAMENTALS_MAX_AGE_DAYS = int(os.getenv("FUNDAMENTALS_MAX_AGE_DAYS", "7"))
+
+# Bar fetching: symbols per multi-symbol StockBarsRequest and minutes of history to request
+BARS_BATCH_SIZE = int(os.getenv("BARS_BATCH_SIZE", "200"))
+BAR_LOOKBACK_MINUTES = int(os.getenv("BAR_LOOKBACK_MINUTES", "240"))
+
+# Per-symbol bar cache: bars kept per symbol, and minutes re-requested on each delta fetch
+# so late or revised bars replace what was cached
+BAR_CACHE_CAPACITY = int(os.getenv("BAR_CACHE_CAPACITY", "120"))
+BAR_REVISION_MINUTES = int(os.getenv("BAR_REVISION_MINUTES", "2"))
+
+# Stage-1 prefilter: drop symbols failing the price / volume gates using multi-symbol snapshots
+# before any minute-bar fetch
+SNAPSHOT_PREFILTER = os.getenv("SNAPSHOT_PREFILTER", "true").lower() in ("1", "true", "yes")
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "500"))
+
+# Alpaca data API: concurrent in-flight requests and per-minute request quota (free plan: 200/min)
+ALPACA_MAX_CONCURRENCY = int(os.getenv("ALPACA_MAX_CONCURRENCY", "4"))
+ALPACA_RATE_LIMIT_PER_MIN = int(os.getenv("ALPACA_RATE_LIMIT_PER_MIN", "200"))
+
+# Finnhub news lookups: cache lifetime, request quota (free plan: 60/min) and timeout
+NEWS_CACHE_TTL_SECONDS = int(os.getenv("NEWS_CACHE_TTL_SECONDS", "900"))
+FINNHUB_RATE_LIMIT_PER_MIN = int(os.getenv("FINNHUB_RATE_LIMIT_PER_MIN", "60"))
+FINNHUB_TIMEOUT_SECONDS = float(os.getenv("FINNHUB_TIMEOUT_SECONDS", "10"))
+
+# Market-wide news index: poll Alpaca's news feed every NEWS_POLL_SECONDS and keep NEWS_INDEX_MAX_AGE_HOURS
+# of headlines per ticker, so catalyst checks are local lookups. On start the whole window is backfilled,
+# 50 articles (one rate-limited request) at a time, up to NEWS_BACKFILL_LIMIT articles; the default
+# 120h covers the scanner's 5-day catalyst lookback, and a lower limit leaves the oldest days thin.
+# Finnhub is used until the backfill is in, or with this off
+NEWS_INGEST_ENABLED = os.getenv("NEWS_INGEST_ENABLED", "true").lower() in ("1", "true", "yes")
+NEWS_POLL_SECONDS = float(os.getenv("NEWS_POLL_SECONDS", "30"))
+NEWS_INDEX_MAX_AGE_HOURS = float(os.getenv("NEWS_INDEX_MAX_AGE_HOURS", "120"))
+NEWS_BACKFILL_LIMIT = int(os.getenv("NEWS_BACKFILL_LIMIT", "10000"))
 
 # News filter settings
 NEWS_LOOKBACK_HOURS = int(os.getenv("NEWS_LOOKBACK_HOURS", "6"))
 MIN_NEWS_SENTIMENT = float(os.getenv("MIN_NEWS_SENTIMENT", "0.0"))
 
+# Live streaming mode: evaluate signals per streamed minute bar instead of polling.
+# ALPACA_STREAM_URL overrides the websocket endpoint (e.g. ws://localhost:8765 for replay_server.py)
+STREAMING_MODE = os.getenv("STREAMING_MODE", "false").lower() in ("1", "true", "yes")
+ALPACA_STREAM_URL = os.getenv("ALPACA_STREAM_URL", "")
+
 # Market hours window (ET)
 PRE_MARKET_OPEN_HOUR = 4   # 4:00 AM ET
 AFTER_HOURS_CLOSE_HOUR = 20  # 8:00 PM ET
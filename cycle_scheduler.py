@@ -0,0 +1,82 @@
+# cycle_scheduler.py
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from typing import Callable, Dict, Tuple
+
+import metrics
+from config import SCAN_INTERVAL_SECONDS, CYCLE_DEADLINE_FRACTION, CYCLE_MAX_START_DELAY_SECONDS
+
+logger = logging.getLogger("cycle_scheduler")
+
+
+class CycleScheduler:
+    """Wall-clock aligned scan cycles (boundaries at multiples of 'interval_seconds').
+
+    - wait() sleeps until the next boundary. A boundary reached more than 'max_start_delay'
+      seconds late (the previous cycle overran) is skipped rather than run back to back, and
+      counted in trendsniper_cycles_skipped_total.
+    - each cycle gets a deadline 'deadline_fraction' of the interval after its boundary, as a
+      time.monotonic() value for the scanner's deadline parameters.
+    - start jitter (actual start minus boundary) goes to trendsniper_cycle_jitter_seconds and
+      the recent values to jitter_stats()."""
+    def __init__(self, interval_seconds: float = SCAN_INTERVAL_SECONDS,
+                 deadline_fraction: float = CYCLE_DEADLINE_FRACTION,
+                 max_start_delay: float = CYCLE_MAX_START_DELAY_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.interval = float(interval_seconds)
+        self.deadline_fraction = min(1.0, max(0.05, deadline_fraction))
+        self.max_start_delay = max_start_delay
+        self.clock = clock
+        self.skipped = 0
+        self._last_boundary = None
+        self._jitter = deque(maxlen=500)
+
+    def next_boundary(self, now: float) -> float:
+        return (now // self.interval + 1) * self.interval
+
+    def _due_boundary(self, now: float) -> Tuple[float, int]:
+        """Boundary to run next and how many boundaries were missed on the way."""
+        if self._last_boundary is None:
+            return self.next_boundary(now), 0
+        boundary = self._last_boundary + self.interval
+        if now - boundary <= self.max_start_delay:
+            return boundary, 0
+        latest_missed = now // self.interval * self.interval
+        missed = int(round((latest_missed - boundary) / self.interval)) + 1
+        if now - latest_missed <= self.max_start_delay:
+            return latest_missed, missed - 1
+        return latest_missed + self.interval, missed
+
+    async def wait(self) -> float:
+        """Sleep until the next due boundary and return it (epoch seconds)."""
+        boundary, missed = self._due_boundary(self.clock())
+        if missed:
+            self.skipped += missed
+            metrics.CYCLES_SKIPPED.inc(missed)
+            logger.warning(f"Previous cycle overran; skipped {missed} cycle(s)")
+        delay = boundary - self.clock()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._last_boundary = boundary
+        jitter = self.clock() - boundary
+        self._jitter.append(jitter)
+        metrics.CYCLE_JITTER.observe(max(0.0, jitter))
+        return boundary
+
+    def deadline(self, boundary: float) -> float:
+        """The cycle's deadline as a time.monotonic() value."""
+        return time.monotonic() + (boundary + self.interval * self.deadline_fraction - self.clock())
+
+    def reset(self):
+        """Forget the last boundary (after a pause) so the next wait() counts nothing as skipped."""
+        self._last_boundary = None
+
+    def jitter_stats(self) -> Dict[str, float]:
+        """Median / max cycle start jitter in seconds over recent cycles."""
+        if not self._jitter:
+            return {"count": 0}
+        return {"count": len(self._jitter), "median": statistics.median(self._jitter), "max": max(self._jitter),
+                "skipped": self.skipped}
@@ -0,0 +1,183 @@
+# fundamentals.py
+import asyncio
+import csv
+import datetime
+import logging
+import math
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import metrics
+from config import (FUNDAMENTALS_CACHE_PATH, FUNDAMENTALS_FILE, FUNDAMENTALS_FETCH_LIMIT, FUNDAMENTALS_MAX_AGE_DAYS,
+                    LOW_FLOAT_MILLIONS, LOW_FLOAT_KEEP_UNKNOWN)
+from indicators import US_EASTERN
+
+logger = logging.getLogger("fundamentals")
+
+# (float in millions of shares, shares outstanding in millions, ET day fetched as a proleptic ordinal); NaN = unknown
+Fundamentals = Tuple[float, float, int]
+
+# concurrent Yahoo lookups while refreshing
+FETCH_CONCURRENCY = 4
+
+
+def _today() -> int:
+    return datetime.datetime.now(US_EASTERN).date().toordinal()
+
+
+def fetch_fundamentals(symbol: str) -> Tuple[float, float]:
+    """(float, shares outstanding) in millions from Yahoo Finance (blocking). Without a float
+    figure the share count stands in for it: the float is never larger."""
+    import yfinance
+    info = yfinance.Ticker(symbol).get_info() or {}
+    shares = info.get("sharesOutstanding")
+    float_shares = info.get("floatShares") or shares
+    return (float_shares / 1e6 if float_shares else math.nan), (shares / 1e6 if shares else math.nan)
+
+
+class FundamentalsCache:
+    """Per-symbol float / shares outstanding held in memory for O(1) lookups, persisted as
+    one uncompressed .npz of columns (symbols, float, shares outstanding, day fetched)."""
+    def __init__(self):
+        self._data: Dict[str, Fundamentals] = {}
+        self.refreshed_on: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._data
+
+    def float_millions(self, symbol: str) -> Optional[float]:
+        """The symbol's float in millions of shares, None if unknown."""
+        entry = self._data.get(symbol)
+        if entry is None or math.isnan(entry[0]):
+            return None
+        return entry[0]
+
+    def set(self, symbol: str, float_millions: float, shares_millions: float, day: Optional[int] = None):
+        self._data[symbol] = (float(float_millions), float(shares_millions), day if day is not None else _today())
+
+    def stale(self, symbols: Iterable[str], max_age_days: int = FUNDAMENTALS_MAX_AGE_DAYS) -> List[str]:
+        """Symbols never fetched, then those fetched more than 'max_age_days' ago, oldest first."""
+        oldest = _today() - max_age_days
+        due = [(self._data[s][2] if s in self._data else 0, s) for s in symbols]
+        return [s for day, s in sorted(due) if day < oldest]
+
+    def prune(self, symbols: List[str], max_float_millions: float = LOW_FLOAT_MILLIONS,
+              keep_unknown: bool = LOW_FLOAT_KEEP_UNKNOWN) -> List[str]:
+        """The symbols whose float is below 'max_float_millions' (unknown floats kept or dropped
+        per 'keep_unknown'), in their original order."""
+        kept = []
+        for symbol in symbols:
+            value = self.float_millions(symbol)
+            if value is None:
+                if keep_unknown:
+                    kept.append(symbol)
+            elif value < max_float_millions:
+                kept.append(symbol)
+        return kept
+
+    def save(self, path: str = FUNDAMENTALS_CACHE_PATH):
+        """Write the cache atomically."""
+        symbols = list(self._data)
+        columns = list(zip(*self._data.values())) or [(), (), ()]
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, symbols=np.array(symbols, dtype=str),
+                     float_millions=np.array(columns[0], dtype=np.float64),
+                     shares_millions=np.array(columns[1], dtype=np.float64),
+                     fetched_on=np.array(columns[2], dtype=np.int64),
+                     refreshed_on=np.array([self.refreshed_on or 0], dtype=np.int64))
+        os.replace(tmp, path)
+
+    def load(self, path: str = FUNDAMENTALS_CACHE_PATH) -> bool:
+        """Merge a cache written by save(); False if there is no readable file."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                symbols = data["symbols"].tolist()
+                columns = zip(data["float_millions"].tolist(), data["shares_millions"].tolist(),
+                              data["fetched_on"].tolist())
+                self._data.update(zip(symbols, columns))
+                self.refreshed_on = int(data["refreshed_on"][0]) or None
+        except (OSError, KeyError, ValueError) as e:
+            if os.path.exists(path):
+                logger.warning(f"Ignoring unreadable fundamentals cache {path}: {e}")
+            return False
+        return True
+
+    def load_file(self, path: str = FUNDAMENTALS_FILE) -> int:
+        """Merge a hand-maintained CSV stand-in (symbol,float_millions[,shares_millions]), e.g.
+        exported from a data vendor for offline use. Its rows count as fetched today and win
+        over cached values. Returns the number of rows read."""
+        today = _today()
+        count = 0
+        try:
+            with open(path, newline="") as f:
+                for row in csv.DictReader(f):
+                    symbol = (row.get("symbol") or "").strip().upper()
+                    if not symbol:
+                        continue
+                    float_millions = _number(row.get("float_millions"))
+                    shares = _number(row.get("shares_millions"))
+                    self._data[symbol] = (float_millions if not math.isnan(float_millions) else shares, shares, today)
+                    count += 1
+        except OSError:
+            return 0
+        return count
+
+    async def refresh(self, symbols: List[str], limit: int = FUNDAMENTALS_FETCH_LIMIT) -> int:
+        """Fetch up to 'limit' never-fetched or stale symbols from Yahoo Finance; entries beyond
+        the limit are picked up by later days' refreshes. Returns the number fetched."""
+        due = self.stale(symbols)[:max(0, limit)]
+        semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+        today = _today()
+
+        async def one(symbol: str) -> bool:
+            async with semaphore:
+                metrics.REQUESTS.inc(label_value="fundamentals")
+                try:
+                    float_millions, shares = await asyncio.to_thread(fetch_fundamentals, symbol)
+                except Exception as e:
+                    metrics.ERRORS.inc(label_value="fundamentals")
+                    logger.debug(f"Fundamentals lookup failed for {symbol}: {e}")
+                    return False
+                self._data[symbol] = (float_millions, shares, today)
+                return True
+
+        with metrics.timer("fundamentals"):
+            fetched = sum(await asyncio.gather(*(one(symbol) for symbol in due)))
+        if due:
+            logger.info(f"Fetched fundamentals for {fetched}/{len(due)} symbols")
+        return fetched
+
+
+def _number(text: Optional[str]) -> float:
+    try:
+        return float(text) if text not in (None, "") else math.nan
+    except ValueError:
+        return math.nan
+
+
+async def load_daily(symbols: List[str], cache: FundamentalsCache, path: str = FUNDAMENTALS_CACHE_PATH,
+                     stand_in: str = FUNDAMENTALS_FILE, fetch_limit: int = FUNDAMENTALS_FETCH_LIMIT) -> FundamentalsCache:
+    """Once per ET day: read the on-disk cache and the local stand-in file, fetch what is missing or
+    stale (up to 'fetch_limit' symbols; 0 = offline), and write the cache back. Later calls on the
+    same day only read."""
+    if not len(cache):
+        cache.load(path)
+    if cache.refreshed_on == _today():
+        return cache
+    from_file = cache.load_file(stand_in)
+    if from_file:
+        logger.info(f"Loaded fundamentals for {from_file} symbols from {stand_in}")
+    if fetch_limit > 0:
+        await cache.refresh(symbols, fetch_limit)
+    cache.refreshed_on = _today()
+    try:
+        cache.save(path)
+    except OSError as e:
+        logger.warning(f"Failed to write fundamentals cache {path}: {e}")
+    return cache
@@ -1,15 +1,46 @@
-from typing import Tuple 
+from typing import Dict, List, Optional, Tuple
+from collections import deque
+import datetime
+from zoneinfo import ZoneInfo
 import pandas as pd
 import numpy as np 
 
+US_EASTERN = ZoneInfo("America/New_York")
+
+MINUTE_NS = 60_000_000_000
+# higher timeframes resampled from the 1-minute bars: (name, minutes per bar; 0 = one bar per ET session)
+TIMEFRAMES = (("5m", 5), ("15m", 15), ("session", 0))
+# bars of each timeframe averaged into its ma20_<name>
+TIMEFRAME_MA_WINDOW = 20
+# per-timeframe values, named <field>_<timeframe>: the forming bar's open/high/low/volume, the last
+# completed bar's close, the mean close of the last TIMEFRAME_MA_WINDOW completed bars and how many completed
+TIMEFRAME_FIELDS = ("open", "high", "low", "volume", "prev_close", "ma20", "bars")
+_DAY_NS = 24 * 60 * MINUTE_NS
+
+
+def timeframe_fields(timeframes: Tuple[Tuple[str, int], ...] = TIMEFRAMES) -> Dict[str, Tuple[str, str, int]]:
+    """{<field>_<timeframe>: (field, timeframe, minutes per bar)} for every resampled timeframe value."""
+    return {f"{field}_{name}": (field, name, minutes) for name, minutes in timeframes for field in TIMEFRAME_FIELDS}
+
 def compute_ma (series: pd.Series, window: int) -> pd.Series:
     """Compute the moving average of a pandas Series."""
     return series.rolling(window=window, min_periods=1).mean()
 
+def session_dates (index: pd.DatetimeIndex) -> np.ndarray:
+    """US/Eastern calendar date of each timestamp; VWAP restarts with each date (04:00-20:00 ET session).
+    Naive timestamps are treated as UTC, as Alpaca returns them."""
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    return index.tz_convert(US_EASTERN).date
+
 def compute_vwap (df: pd.DataFrame) -> pd.Series:
-    """Compute the Volume Weighted Average Price (VWAP) for a DataFrame with 'price' and 'volume' columns."""
+    """Compute the Volume Weighted Average Price (VWAP) for a DataFrame with 'price' and 'volume' columns.
+    With a DatetimeIndex the VWAP resets at each session boundary."""
     q = df['volume']
     p = df['price']
+    if isinstance(df.index, pd.DatetimeIndex):
+        session = session_dates(df.index)
+        return (p * q).groupby(session).cumsum() / q.groupby(session).cumsum()
     vwap = (p * q).cumsum() / q.cumsum()
     return vwap
 
@@ -21,8 +52,235 @@ def compute_indicators (df: pd.DataFrame) -> pd.DataFrame:
     df['VWAP'] = compute_vwap(df)
     df['Price_Change'] = df['price'].pct_change() * 100  # Percentage price change
     df['Volume_Change'] = df['volume'].pct_change() * 100  # Percentage volume change
+    df['AvgVolume20'] = compute_ma(df['volume'], window=20)
     return df
 
+
+class RollingMean:
+    """Mean of the last 'window' values (fewer while warming up, like rolling(min_periods=1)).
+    O(1) per push; the running sum is re-added from the window once per lap to cap float drift."""
+    __slots__ = ("window", "_values", "_sum", "_pushes")
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._sum = 0.0
+        self._pushes = 0
+
+    def push(self, value: float):
+        if len(self._values) == self.window:
+            self._sum -= self._values[0]
+        self._values.append(value)
+        self._sum += value
+        self._pushes += 1
+        if self._pushes % self.window == 0:
+            self._sum = sum(self._values)
+
+    @property
+    def mean(self) -> float:
+        return self._sum / len(self._values) if self._values else float("nan")
+
+
+class ResampledBars:
+    """One higher-timeframe bar series built from 1-minute closes and volumes (O(1) per minute).
+    Minutes with the same bucket key form one bar: the forming bar is the latest bucket, and when
+    a new bucket starts the previous bar completes and its close enters the rolling mean.
+    Open/high/low come from the minute closes."""
+    __slots__ = ("minutes", "bucket", "open", "high", "low", "close", "volume", "completed", "prev_close", "_ma")
+
+    def __init__(self, minutes: int, ma_window: int = TIMEFRAME_MA_WINDOW):
+        self.minutes = minutes
+        self.bucket = None
+        self.open = self.high = self.low = self.close = float("nan")
+        self.volume = 0.0
+        self.completed = 0
+        self.prev_close = float("nan")
+        self._ma = RollingMean(ma_window)
+
+    def push(self, bucket: int, close: float, volume: float):
+        if bucket != self.bucket:
+            if self.bucket is not None:
+                self.completed += 1
+                self.prev_close = self.close
+                self._ma.push(self.close)
+            self.bucket = bucket
+            self.open = self.high = self.low = close
+            self.volume = 0.0
+        elif close > self.high:
+            self.high = close
+        elif close < self.low:
+            self.low = close
+        self.close = close
+        self.volume += volume
+
+    @property
+    def ma(self) -> float:
+        return self._ma.mean
+
+
+class StreamingIndicators:
+    """Incremental MA20 / MA50 / session VWAP / 20-bar average volume for one symbol, plus the
+    'timeframes' resampled bar series (see TIMEFRAMES). update() is O(1) per appended bar and
+    matches compute_indicators on the same bars."""
+    __slots__ = ("ma20_window", "ma50_window", "volume_window", "timeframes", "count", "last_timestamp",
+                 "last_close", "last_volume", "_ma20", "_ma50", "_avg_volume", "_pv", "_v", "_session_end",
+                 "_resampled")
+
+    def __init__(self, ma20_window: int = 20, ma50_window: int = 50, volume_window: int = 20,
+                 timeframes: Tuple[Tuple[str, int], ...] = TIMEFRAMES):
+        self.ma20_window = ma20_window
+        self.ma50_window = ma50_window
+        self.volume_window = volume_window
+        self.timeframes = timeframes
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.last_timestamp = None
+        self.last_close = float("nan")
+        self.last_volume = float("nan")
+        self._ma20 = RollingMean(self.ma20_window)
+        self._ma50 = RollingMean(self.ma50_window)
+        self._avg_volume = RollingMean(self.volume_window)
+        self._pv = 0.0
+        self._v = 0.0
+        self._session_end = None
+        # (value keys in TIMEFRAME_FIELDS order, bucket width in ns or 0 for the session, bars)
+        self._resampled = [(tuple(f"{field}_{name}" for field in TIMEFRAME_FIELDS), minutes * MINUTE_NS,
+                            ResampledBars(minutes)) for name, minutes in self.timeframes]
+
+    def _roll_session(self, ts: pd.Timestamp):
+        """Restart VWAP if 'ts' falls past the current ET session date."""
+        if self._session_end is not None and ts < self._session_end:
+            return
+        local = ts.tz_convert(US_EASTERN) if ts.tzinfo else ts.tz_localize("UTC").tz_convert(US_EASTERN)
+        next_day = datetime.datetime.combine(local.date() + datetime.timedelta(days=1), datetime.time(), US_EASTERN)
+        self._session_end = pd.Timestamp(next_day)
+        self._pv = 0.0
+        self._v = 0.0
+
+    def update(self, ts: pd.Timestamp, close: float, volume: float):
+        """Append one bar (timestamps must be increasing)."""
+        self._roll_session(ts)
+        self._ma20.push(close)
+        self._ma50.push(close)
+        self._avg_volume.push(volume)
+        self._pv += close * volume
+        self._v += volume
+        if self._resampled:
+            ns = ts.value
+            for _, width, bars in self._resampled:
+                bars.push(ns // width if width else self._session_end.value, close, volume)
+        self.count += 1
+        self.last_timestamp = ts
+        self.last_close = close
+        self.last_volume = volume
+
+    def update_frame(self, df: pd.DataFrame):
+        """Append every bar of an OHLCV frame in order."""
+        for ts, close, volume in zip(df.index, df['close'].to_numpy(float).tolist(), df['volume'].to_numpy(float).tolist()):
+            self.update(ts, close, volume)
+
+    def update_arrays(self, timestamps_ns, closes, volumes):
+        """Append bars given as aligned arrays (UTC epoch ns, close, volume), e.g. BarCache views."""
+        for ts, close, volume in zip(timestamps_ns.tolist(), closes.tolist(), volumes.tolist()):
+            self.update(pd.Timestamp(ts, unit='ns', tz='UTC'), close, volume)
+
+    def export_session(self) -> Tuple[int, float, float, int]:
+        """(count, VWAP price*volume sum, VWAP volume sum, session end as UTC epoch ns) for snapshots;
+        the moving averages are rebuilt from cached bars instead."""
+        end = self._session_end.value if self._session_end is not None else 0
+        return self.count, self._pv, self._v, end
+
+    def restore_session(self, closes: List[float], volumes: List[float], last_timestamp_ns: int,
+                        count: int, pv: float, v: float, session_end_ns: int, timestamps_ns: Optional[List[int]] = None):
+        """Rebuild state from the trailing cached bars (at least the longest window) plus the
+        session totals returned by export_session. With the bars' 'timestamps_ns' the resampled
+        timeframes are replayed from them too (so they only cover the bars given)."""
+        self.reset()
+        self._refill_windows(closes, volumes)
+        if timestamps_ns is not None and session_end_ns:
+            timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+            # earlier sessions are keyed by whole days back from the restored session end
+            sessions = session_end_ns - (session_end_ns - 1 - timestamps_ns) // _DAY_NS * _DAY_NS
+            for _, width, bars in self._resampled:
+                for bucket, close, volume in zip((timestamps_ns // width if width else sessions).tolist(), closes, volumes):
+                    bars.push(bucket, close, volume)
+        if closes:
+            self.last_close = closes[-1]
+            self.last_volume = volumes[-1]
+            self.last_timestamp = pd.Timestamp(int(last_timestamp_ns), unit="ns", tz="UTC")
+        self.count = int(count)
+        self._pv = float(pv)
+        self._v = float(v)
+        self._session_end = pd.Timestamp(int(session_end_ns), unit="ns", tz="UTC") if session_end_ns else None
+
+    def _refill_windows(self, closes, volumes):
+        """Refill the moving-average windows from the trailing bars (at least the longest window)."""
+        self._ma20 = RollingMean(self.ma20_window)
+        self._ma50 = RollingMean(self.ma50_window)
+        self._avg_volume = RollingMean(self.volume_window)
+        longest = max(self.ma20_window, self.ma50_window, self.volume_window)
+        for close, volume in zip(closes[-longest:], volumes[-longest:]):
+            self._ma20.push(close)
+            self._ma50.push(close)
+            self._avg_volume.push(volume)
+
+    def revise(self, revisions: List[Tuple[int, float, float, float, float, bool]], closes, volumes):
+        """Apply revised or back-filled earlier bars, as recorded by BarCache ((UTC epoch ns, old
+        close, old volume, new close, new volume, inserted)), without losing history older than
+        the cached bars: session VWAP and the forming higher-timeframe bars take the difference
+        between the old and the new bar, completed higher-timeframe bars keep their values.
+        'closes' / 'volumes' are the revised trailing bars up to the latest one applied; the
+        moving-average windows are refilled from them."""
+        if self._session_end is not None:
+            session_end = self._session_end.value
+            last = self.last_timestamp.value if self.last_timestamp is not None else None
+            for ts, old_close, old_volume, close, volume, inserted in revisions:
+                # bars newer than the last one applied arrive through update() already revised;
+                # sessions start at ET midnight (a DST day's extra or missing hour falls before 04:00)
+                if (last is not None and ts > last) or not session_end - _DAY_NS <= ts < session_end:
+                    continue
+                self.count += inserted
+                self._pv += close * volume - old_close * old_volume
+                self._v += volume - old_volume
+                for _, width, bars in self._resampled:
+                    if (ts // width if width else session_end) != bars.bucket:
+                        continue
+                    bars.volume += volume - old_volume
+                    bars.high = max(bars.high, close)
+                    bars.low = min(bars.low, close)
+                    if ts == last:
+                        bars.close = close
+        self._refill_windows(closes, volumes)
+        if len(closes):
+            self.last_close = float(closes[-1])
+            self.last_volume = float(volumes[-1])
+
+    @property
+    def ma20(self) -> float:
+        return self._ma20.mean
+
+    @property
+    def ma50(self) -> float:
+        return self._ma50.mean
+
+    @property
+    def vwap(self) -> float:
+        return self._pv / self._v if self._v else float("nan")
+
+    @property
+    def avg_volume(self) -> float:
+        return self._avg_volume.mean
+
+    def timeframe_values(self) -> Dict[str, float]:
+        """TIMEFRAME_FIELDS of every resampled timeframe, keyed <field>_<timeframe> (e.g. ma20_5m)."""
+        values = {}
+        for keys, _, bars in self._resampled:
+            values.update(zip(keys, (bars.open, bars.high, bars.low, bars.volume, bars.prev_close, bars.ma,
+                                     bars.completed)))
+        return values
+
 def generate_trade_levels (latest_close: float, latest_vwap: float, latest_ma20: float, risk_percent: float=0.005, profit_multiplier: float=2.0) -> Tuple[float, float, float]:
 
     """Generate entry, stop-loss, and take-profit levels based on latest indicators."""
@@ -0,0 +1,115 @@
+# live_stream.py
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+from alpaca.data.live import StockDataStream
+
+from config import ALPACA_API_KEY, ALPACA_API_SECRET, ALPACA_STREAM_URL
+from indicators import StreamingIndicators
+import metrics
+import scanner
+
+logger = logging.getLogger("live_stream")
+
+BAR_SECONDS = 60
+
+
+class BarDataStream(StockDataStream):
+    """StockDataStream that runs as a coroutine on the caller's event loop. The public run()
+    drives the same loop through asyncio.run(), which cannot be called from the bot's running
+    loop. _run_forever is that coroutine in alpaca-py 0.18 through 0.44 (requirements.txt)."""
+    async def run_async(self):
+        await self._run_forever()
+
+
+class LiveBarStream:
+    """Event-driven alternative to the polling scanning_loop: subscribes to minute bars over
+    Alpaca's websocket feed, pushes each bar into the bar cache and indicator state, and
+    evaluates the signal rule for that symbol as soon as its bar closes.
+
+    'on_signal' is awaited with each trade idea dict some subscription still wants (see
+    subscriptions.SubscriptionRegistry); it is expected to fan the idea out. 'url' points the stream at another
+    server, e.g. replay_server.py playing recorded bars.
+
+    Bars are applied in the stream handler; the evaluation, which may wait on a news lookup, runs
+    as a task per symbol so later bars are never held up behind it. A symbol's bars arriving while
+    its evaluation is still in flight update its state and are coalesced into one more evaluation
+    of the latest bar once the current one finishes."""
+    def __init__(self, on_signal: Callable[[Dict], Awaitable], subscriptions, url: Optional[str] = ALPACA_STREAM_URL):
+        self.on_signal = on_signal
+        self.subscriptions = subscriptions
+        self.enabled = True
+        self._stream = BarDataStream(ALPACA_API_KEY, ALPACA_API_SECRET, url_override=url or None)
+        # symbol -> its evaluation task while in flight
+        self._evaluations: Dict[str, asyncio.Task] = {}
+        # symbol -> (state, bar timestamp) of the latest bar that arrived during its evaluation
+        self._queued: Dict[str, Tuple[StreamingIndicators, pd.Timestamp]] = {}
+        # seconds from bar close to signal evaluated, for the most recent bars
+        self._latencies = deque(maxlen=1000)
+
+    async def start(self, symbols: List[str]):
+        """Seed the cache and indicator state with history, subscribe, then run until stopped."""
+        updates = await scanner.refresh_bar_cache(symbols)
+        for symbol in symbols:
+            scanner.update_indicator_state(symbol, *updates.get(symbol, (0, False)))
+        self._stream.subscribe_bars(self._on_bar, *symbols)
+        self._stream.subscribe_updated_bars(self._on_bar, *symbols)
+        logger.info(f"Streaming minute bars for {len(symbols)} symbols")
+        await self._stream.run_async()
+
+    async def stop(self):
+        for task in self._evaluations.values():
+            task.cancel()
+        self._evaluations.clear()
+        self._queued.clear()
+        await self._stream.stop_ws()
+
+    def pending(self) -> int:
+        """Evaluations in flight."""
+        return len(self._evaluations)
+
+    async def _on_bar(self, bar):
+        timestamp = pd.Timestamp(bar.timestamp)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize("UTC")
+        with metrics.timer("indicators"):
+            state = scanner.push_bar(bar.symbol, timestamp, (bar.open, bar.high, bar.low, bar.close, bar.volume))
+        if not self.enabled:
+            return
+        if bar.symbol in self._evaluations:
+            self._queued[bar.symbol] = (state, timestamp)
+            return
+        task = asyncio.get_running_loop().create_task(self._evaluate_latest(bar.symbol, state, timestamp))
+        self._evaluations[bar.symbol] = task
+        task.add_done_callback(lambda _: self._evaluations.pop(bar.symbol, None))
+
+    async def _evaluate_latest(self, symbol: str, state, timestamp: pd.Timestamp):
+        """Evaluate 'symbol', then again for the newest bar that came in meanwhile, until none did."""
+        while True:
+            await self._evaluate(symbol, state, timestamp)
+            latest = self._queued.pop(symbol, None)
+            if latest is None or not self.enabled:
+                return
+            state, timestamp = latest
+
+    async def _evaluate(self, symbol: str, state, timestamp: pd.Timestamp):
+        try:
+            idea = await scanner.evaluate_symbol(symbol, state, self.subscriptions)
+        except Exception as e:
+            logger.error(f"Error evaluating streamed bar for {symbol}: {e}")
+            return
+        self._latencies.append(time.time() - (timestamp.timestamp() + BAR_SECONDS))
+        if idea is not None:
+            await self.on_signal(idea)
+
+    def latency_stats(self) -> Dict[str, float]:
+        """Median / max seconds from bar close to signal evaluation over recent bars."""
+        if not self._latencies:
+            return {"count": 0}
+        return {"count": len(self._latencies), "median": statistics.median(self._latencies),
+                "max": max(self._latencies)}
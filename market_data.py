@@ -0,0 +1,118 @@
+# market_data.py
+import asyncio
+import datetime
+import math
+import time
+from typing import Callable, Optional
+
+import metrics
+from config import ALPACA_MAX_CONCURRENCY, ALPACA_RATE_LIMIT_PER_MIN
+
+
+class TokenBucket:
+    """Async token bucket. Tokens refill continuously at 'rate_per_minute' up to 'burst';
+    acquire() waits until enough tokens are available."""
+    def __init__(self, rate_per_minute: float, burst: Optional[float] = None):
+        self.rate = float(rate_per_minute) / 60.0
+        self.burst = float(burst if burst is not None else max(1.0, rate_per_minute / 10.0))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        # the lock keeps waiters first-come first-served
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+# The Alpaca rate limit is per account, so every client in the process (bars, snapshots, the news
+# feed) draws on this one bucket unless given its own
+ACCOUNT_BUCKET = TokenBucket(ALPACA_RATE_LIMIT_PER_MIN)
+
+
+# alpaca-py pages inside a single client call: items per HTTP request
+BARS_PAGE_SIZE = 10_000
+NEWS_PAGE_SIZE = 50
+
+
+def _as_utc(value: datetime.datetime) -> datetime.datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=datetime.timezone.utc)
+
+
+def _utc_now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def expected_bar_pages(request, now: Callable[[], datetime.datetime] = _utc_now) -> int:
+    """HTTP requests alpaca-py makes for a StockBarsRequest: symbols x minutes in the window
+    (open-ended windows run to 'now()'), capped by its limit, over the page size. An upper
+    bound, as quiet minutes have no bar; without a start the window is unknown and counts as one page."""
+    symbols = request.symbol_or_symbols
+    count = 1 if isinstance(symbols, str) else len(symbols)
+    bars = None
+    if request.start is not None:
+        end = _as_utc(request.end if request.end is not None else now())
+        bars = count * max(1.0, (end - _as_utc(request.start)).total_seconds() / 60.0)
+    if request.limit:
+        bars = min(bars, request.limit) if bars is not None else request.limit
+    return max(1, math.ceil(bars / BARS_PAGE_SIZE)) if bars else 1
+
+
+def expected_news_pages(request) -> int:
+    """HTTP requests alpaca-py makes for a NewsRequest: its limit over the page size."""
+    return max(1, math.ceil(request.limit / NEWS_PAGE_SIZE)) if request.limit else 1
+
+
+class AsyncDataClient:
+    """Runs the blocking alpaca-py data client calls in worker threads so the discord.py
+    event loop keeps serving commands and heartbeats while a scan is in flight.
+    Calls are bounded by a concurrency limit and a per-minute token bucket: ACCOUNT_BUCKET,
+    shared with the process's other clients, unless 'requests_per_minute' or 'bucket' is given.
+    A call takes one token per HTTP page it is expected to make (alpaca-py pages internally);
+    'calls' counts client calls and 'requests_made' the pages charged for. 'clock' (UTC now)
+    ends open bar windows when estimating pages, e.g. the replay clock in backtests."""
+    def __init__(self, client, max_concurrency: int = ALPACA_MAX_CONCURRENCY,
+                 requests_per_minute: Optional[float] = None, bucket: Optional[TokenBucket] = None,
+                 clock: Callable[[], datetime.datetime] = _utc_now):
+        self.client = client
+        self.clock = clock
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        if bucket is None:
+            bucket = TokenBucket(requests_per_minute) if requests_per_minute is not None else ACCOUNT_BUCKET
+        self.bucket = bucket
+        self.calls = 0
+        self.requests_made = 0
+
+    async def _call(self, stage: str, fn, request, pages: int = 1):
+        async with self._semaphore:
+            # one token at a time: a large page count may exceed the bucket's burst
+            for _ in range(pages):
+                await self.bucket.acquire()
+            self.calls += 1
+            self.requests_made += pages
+            metrics.REQUESTS.inc(pages, label_value=stage)
+            try:
+                with metrics.timer(stage):
+                    return await asyncio.to_thread(fn, request)
+            except Exception:
+                metrics.ERRORS.inc(label_value=stage)
+                raise
+
+    async def get_stock_bars(self, request):
+        return await self._call("bar_fetch", self.client.get_stock_bars, request, expected_bar_pages(request, self.clock))
+
+    async def get_stock_snapshot(self, request):
+        return await self._call("snapshot_fetch", self.client.get_stock_snapshot, request)
+
+    async def get_news(self, request):
+        return await self._call("news_fetch", self.client.get_news, request, expected_news_pages(request))
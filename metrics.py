@@ -0,0 +1,209 @@
+# metrics.py
+"""In-process latency histograms and counters, exposed in the Prometheus text format.
+
+Hot paths wrap work in `with metrics.timer("bar_fetch"):`; with METRICS_ENABLED off that
+returns a shared no-op context manager, so the cost is one flag check per call.
+Each process keeps its own metrics (shard workers are not aggregated; the coordinator
+records its round trip to them as the "shard_scan" stage).
+"""
+import bisect
+import contextlib
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from config import METRICS_ENABLED
+
+# seconds; spans a cached indicator update up to a slow Alpaca page or Discord retry
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Counter:
+    """Monotonic counter, optionally split by one label. Updates come from the event loop and
+    render() from the /metrics thread, so both go through the lock."""
+    def __init__(self, name: str, help_text: str, label: Optional[str] = None):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, label_value: str = ""):
+        if METRICS_ENABLED:
+            with self._lock:
+                self._values[label_value] = self._values.get(label_value, 0.0) + amount
+
+    def value(self, label_value: str = "") -> float:
+        return self._values.get(label_value, 0.0)
+
+    def total(self) -> float:
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_value, value in values:
+            lines.append(f"{self.name}{_labels(self.label, label_value)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics), optionally split by one label.
+    Observations and snapshots for rendering share a lock, so a scrape from the /metrics
+    thread sees whole observations."""
+    def __init__(self, name: str, help_text: str, label: Optional[str] = None,
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        # label value -> [per-bucket counts (last slot is +Inf), sum, count]
+        self._series: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_value: str = ""):
+        if not METRICS_ENABLED:
+            return
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bucket] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _snapshot(self, label_value: str) -> Optional[list]:
+        with self._lock:
+            series = self._series.get(label_value)
+            return [list(series[0]), series[1], series[2]] if series else None
+
+    def count(self, label_value: str = "") -> int:
+        series = self._series.get(label_value)
+        return series[2] if series else 0
+
+    def mean(self, label_value: str = "") -> float:
+        series = self._snapshot(label_value)
+        return series[1] / series[2] if series and series[2] else float("nan")
+
+    def quantile(self, q: float, label_value: str = "") -> float:
+        """Estimate like PromQL histogram_quantile: linear within the bucket holding rank q."""
+        series = self._snapshot(label_value)
+        if not series or not series[2]:
+            return float("nan")
+        counts, total = series[0], series[2]
+        rank = q * total
+        cumulative = 0
+        for i, n in enumerate(counts):
+            if cumulative + n >= rank and n:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / n
+            cumulative += n
+        return self.buckets[-1]
+
+    def label_values(self) -> List[str]:
+        with self._lock:
+            return sorted(self._series)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_value in self.label_values():
+            counts, total_sum, count = self._snapshot(label_value)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_labels(self.label, label_value, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label, label_value)} {total_sum:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label, label_value)} {count}")
+        return lines
+
+
+def _labels(label: Optional[str], value: str, le: Optional[str] = None) -> str:
+    pairs = []
+    if label:
+        pairs.append(f'{label}="{value}"')
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+STAGE_SECONDS = Histogram("trendsniper_stage_seconds", "Time spent per scan stage", label="stage")
+CYCLE_SECONDS = Histogram("trendsniper_cycle_seconds", "Wall time of a full scan cycle")
+CYCLES = Counter("trendsniper_cycles_total", "Scan cycles completed")
+CYCLE_OVERRUNS = Counter("trendsniper_cycle_overruns_total", "Scan cycles that took longer than SCAN_INTERVAL_SECONDS")
+CYCLES_SKIPPED = Counter("trendsniper_cycles_skipped_total", "Cycle boundaries skipped because the previous cycle overran")
+CYCLE_JITTER = Histogram("trendsniper_cycle_jitter_seconds", "Cycle start delay after its scheduled boundary",
+                         buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+REQUESTS = Counter("trendsniper_requests_total", "Upstream API requests", label="endpoint")
+ERRORS = Counter("trendsniper_errors_total", "Failed upstream calls", label="endpoint")
+SIGNALS = Counter("trendsniper_signals_total", "Symbols passing the signal rule")
+ALERTS = Counter("trendsniper_alerts_total", "Alerts sent to Discord")
+ALERTS_DROPPED = Counter("trendsniper_alerts_dropped_total", "Alerts dropped before sending", label="reason")
+
+REGISTRY = (STAGE_SECONDS, CYCLE_SECONDS, CYCLES, CYCLE_OVERRUNS, CYCLES_SKIPPED, CYCLE_JITTER,
+            REQUESTS, ERRORS, SIGNALS, ALERTS, ALERTS_DROPPED)
+
+
+class _StageTimer:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, self.stage)
+        return False
+
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def timer(stage: str):
+    """Context manager recording the block's duration under 'stage' (no-op when disabled)."""
+    return _StageTimer(stage) if METRICS_ENABLED else _NULL_TIMER
+
+
+def record_cycle(seconds: float, interval_seconds: float):
+    CYCLE_SECONDS.observe(seconds)
+    CYCLES.inc()
+    if seconds > interval_seconds:
+        CYCLE_OVERRUNS.inc()
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def summary() -> List[str]:
+    """Short human-readable lines for the /status command."""
+    if not METRICS_ENABLED:
+        return ["Metrics: disabled"]
+    lines = [f"Cycles: **{CYCLES.value():.0f}** (overruns: **{CYCLE_OVERRUNS.value():.0f}**, "
+             f"skipped: **{CYCLES_SKIPPED.value():.0f}**), "
+             f"p50 {_ms(CYCLE_SECONDS.quantile(0.5))} / p95 {_ms(CYCLE_SECONDS.quantile(0.95))}, "
+             f"start jitter p95 {_ms(CYCLE_JITTER.quantile(0.95))}"]
+    for stage in STAGE_SECONDS.label_values():
+        lines.append(f"{stage}: p50 {_ms(STAGE_SECONDS.quantile(0.5, stage))} / "
+                     f"p95 {_ms(STAGE_SECONDS.quantile(0.95, stage))} ({STAGE_SECONDS.count(stage)} calls)")
+    lines.append(f"Signals: {SIGNALS.value():.0f}, alerts sent: {ALERTS.value():.0f} "
+                 f"(dropped: {ALERTS_DROPPED.total():.0f}), "
+                 f"upstream errors: {ERRORS.total():.0f}")
+    return lines
+
+
+def _ms(seconds: float) -> str:
+    return "n/a" if math.isnan(seconds) else f"{seconds * 1000:.0f} ms"
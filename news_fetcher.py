@@ -1,31 +1,119 @@
 import os 
+import re
+import asyncio
+import time
+import aiohttp
 import requests 
 import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from dotenv import load_dotenv
+from config import NEWS_CACHE_TTL_SECONDS, FINNHUB_RATE_LIMIT_PER_MIN, FINNHUB_TIMEOUT_SECONDS
+from market_data import TokenBucket
+import metrics
 
 load_dotenv()
 FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
 
 KEYWORDS = ["acquire", "acquisition", "merger", "buyout", "earnings", "beat", "misses", "quarter", "q1", "q2", "q3", "q4", "revenue", "guidance", "forecast", "upgrade", "downgrade", "FDA", "approval", "contract", "partnership", "deal", "listing", "bankruptcy", "delisting", "short", "scandal", "lawsuit", "launch", "contract", "supply", "demand", "growth", "loss", "profit", "dividend", "split", "insider", "buy", "sell", "CEO", "CFO", "CTO", "resign", "retire", "appoint", "appoints", "investigation", "regulation", "fine", "penalty", "settlement", "recall", "outbreak", "pandemic", "cyberattack", "hack", "data breach", "ransomware", "inflation", "interest rate", "fed", "economy", "GDP", "unemployment", "jobs report", "CPI", "PPI", "trade war", "tariff", "sanction", "embargo", "geopolitical", "conflict", "war", "crisis", "natural disaster", "earthquake", "hurricane", "flood", "wildfire", "drought", "supply chain", "logistics", "shipping", "transportation", "trial", "settlement", "verdict", "court", "lawsuit", "regulation", "compliance", "audit", "investigation", "whistleblower", "insider trading", "SEC", "FTC", "FDA", "EPA", "OSHA"]
 
-def _finnhub_company_news(ticker: str, days_back: int = 7) -> List[Dict]:
-    """ Fetch company news for 'symbol' from Finnhub for the last 'days_back' days. 
-    Returns a list of news items (dicts) or empty list on failure."""
-    if not FINNHUB_API_KEY:
-        return []
-    
+# Catalyst category for each keyword (matched case-insensitively on word boundaries)
+KEYWORD_CATEGORIES = {
+    "m&a": ["acquire", "acquisition", "merger", "buyout", "deal"],
+    "earnings": ["earnings", "beat", "misses", "quarter", "q1", "q2", "q3", "q4", "revenue", "guidance", "forecast",
+                 "growth", "loss", "profit", "dividend", "split"],
+    "analyst": ["upgrade", "downgrade"],
+    "business": ["contract", "partnership", "launch", "supply", "demand", "listing", "delisting"],
+    "regulatory": ["FDA", "approval", "regulation", "compliance", "SEC", "FTC", "EPA", "OSHA", "fine", "penalty",
+                   "sanction", "recall"],
+    "legal": ["lawsuit", "settlement", "trial", "verdict", "court", "investigation", "whistleblower", "audit",
+              "insider trading", "scandal"],
+    "distress": ["bankruptcy", "short"],
+    "insider": ["insider", "buy", "sell"],
+    "management": ["CEO", "CFO", "CTO", "resign", "retire", "appoint", "appoints"],
+    "cyber": ["cyberattack", "hack", "data breach", "ransomware"],
+    "macro": ["inflation", "interest rate", "fed", "economy", "GDP", "unemployment", "jobs report", "CPI", "PPI",
+              "trade war", "tariff", "embargo", "geopolitical", "conflict", "war", "crisis"],
+    "disaster": ["outbreak", "pandemic", "natural disaster", "earthquake", "hurricane", "flood", "wildfire", "drought"],
+    "logistics": ["supply chain", "logistics", "shipping", "transportation"],
+}
+
+
+class KeywordMatcher:
+    """Single-pass catalyst keyword matcher, built once at import.
+
+    Headlines are split into words with one compiled regex, and each word (and each run of
+    words up to the longest multi-word keyword) is looked up in a precomputed table of every
+    keyword and its plural ("s"/"es"). Matching is whole-word and case-insensitive, so "short"
+    doesn't hit "shortage" or "fed" "confederate"; longer keywords win ("insider trading" over
+    "insider")."""
+    _words = re.compile(r"[a-z0-9&]+")
+
+    def __init__(self, keywords: List[str], categories: Dict[str, List[str]]):
+        category_of = {kw.lower(): cat for cat, kws in categories.items() for kw in kws}
+        self.category_of = {kw.lower(): category_of.get(kw.lower(), "other") for kw in keywords}
+        self._table: Dict[str, str] = {}
+        for kw in sorted(self.category_of, key=len):
+            phrase = " ".join(self._words.findall(kw))
+            for variant in (phrase + "es", phrase + "s", phrase):
+                # an exact keyword beats another keyword's plural ("misses" vs "miss" + "es")
+                self._table[variant] = kw
+        self._max_words = max(len(kw.split()) for kw in self._table)
+        # first words of multi-word keywords; only these need a longer lookahead
+        self._prefixes = {kw.split()[0] for kw in self._table if " " in kw}
+        # any headline sharing no word with this set has no match (C-speed rejection)
+        self._trigger_words = {kw for kw in self._table if " " not in kw} | self._prefixes
+
+    def match(self, text: str) -> List[Tuple[str, str]]:
+        """Distinct (keyword, category) pairs found in 'text', in order of appearance."""
+        words = self._words.findall(text.lower())
+        if self._trigger_words.isdisjoint(words):
+            return []
+        table = self._table
+        found: List[Tuple[str, str]] = []
+        i, n = 0, len(words)
+        while i < n:
+            size, kw = 1, None
+            if words[i] in self._prefixes:
+                for size in range(min(self._max_words, n - i), 1, -1):
+                    kw = table.get(" ".join(words[i:i + size]))
+                    if kw is not None:
+                        break
+            if kw is None:
+                size, kw = 1, table.get(words[i])
+            if kw is not None and all(kw != k for k, _ in found):
+                found.append((kw, self.category_of[kw]))
+            i += size
+        return found
+
+    def search(self, text: str) -> bool:
+        """True if any keyword appears in 'text'."""
+        return bool(self.match(text))
+
+
+KEYWORD_MATCHER = KeywordMatcher(KEYWORDS, KEYWORD_CATEGORIES)
+
+FINNHUB_COMPANY_NEWS_URL = "https://finnhub.io/api/v1/company-news"
+
+def _company_news_params(ticker: str, days_back: int) -> Dict:
     to_date =  datetime.date.today()
     from_date = to_date - datetime.timedelta(days=days_back)
-    url = "https://finnhub.io/api/v1/company-news"
-    params = {
+    return {
         "symbol": ticker,
         "from": from_date.isoformat(),
         "to": to_date.isoformat(),
         "token": FINNHUB_API_KEY
     }
+
+def _finnhub_company_news(ticker: str, days_back: int = 7) -> List[Dict]:
+    """ Fetch company news for 'symbol' from Finnhub for the last 'days_back' days. 
+    Returns a list of news items (dicts) or empty list on failure."""
+    if not FINNHUB_API_KEY:
+        return []
+    
+    url = FINNHUB_COMPANY_NEWS_URL
+    params = _company_news_params(ticker, days_back)
     try:
-        r = requests.get(url, params=params, timeout=10)
+        r = requests.get(url, params=params, timeout=FINNHUB_TIMEOUT_SECONDS)
         r.raise_for_status()
         data = r.json()
         if isinstance(data, list):
@@ -37,10 +125,24 @@ def _finnhub_company_news(ticker: str, days_back: int = 7) -> List[Dict]:
 def extract_headlines_and_catalysts(symbol: str, days_back: int = 7, max_headlines: int = 5) -> Tuple[List[Dict], bool]:
     """ 
     Returns (headlines, has_catalyst) where:
-    - headlines: list of dicts {"datetime":..., "headline":..., "url":...}
-    - has_catalyst: True if any headline matched KEYWORDS"""
-
+    - headlines: list of dicts {"datetime":..., "headline":..., "url":..., "matched":..., "keywords":..., "categories":...}
+    - has_catalyst: True if any headline matched KEYWORDS
+    Served from the market-wide news index once its ingester is running (see use_news_index),
+    else from one Finnhub company-news request."""
+    if _news_ingester is not None and _news_ingester.ready:
+        return _news_ingester.index.lookup(symbol, days_back, max_headlines)
     raw = _finnhub_company_news(symbol, days_back=days_back)
+    return _parse_headlines(raw, max_headlines)
+
+def make_headline(title: str, dt: Optional[datetime.datetime], url: str) -> Dict:
+    """One headline dict, tagged with its catalyst keywords and categories."""
+    hits = KEYWORD_MATCHER.match(title)
+    return {"datetime": dt, "headline": title, "url": url, "matched": bool(hits),
+            "keywords": [kw for kw, _ in hits], "categories": sorted({cat for _, cat in hits})}
+
+
+def _parse_headlines(raw: List[Dict], max_headlines: int) -> Tuple[List[Dict], bool]:
+    """Turn raw Finnhub news items into (headlines, has_catalyst)."""
     headlines = []
     has_catalyst = False
     seen_titles = set()
@@ -57,12 +159,111 @@ def extract_headlines_and_catalysts(symbol: str, days_back: int = 7, max_headlin
                 dt = datetime.datetime.fromtimestamp(int(dt_unix))
         except Exception:
             dt = None
-        url = item.get("url", "")
-        tl = title.lower()
-        matched = any(kw.lower() in tl for kw in KEYWORDS)
-        if matched:
+        headline = make_headline(title, dt, item.get("url", ""))
+        if headline["matched"]:
             has_catalyst = True
-        headlines.append({"datetime": dt, "headline": title, "url": url, "matched": matched})
+        headlines.append(headline)
         if len(headlines) >= max_headlines:
             break
     return headlines, has_catalyst
+
+
+class AsyncNewsClient:
+    """Async Finnhub company-news client for catalyst detection.
+    - one pooled keep-alive aiohttp session
+    - TTL cache keyed by (symbol, days_back), so repeat signals in a session don't refetch;
+      expired entries are pruned as new ones are stored
+    - concurrent lookups of the same key share one in-flight request
+    - requests are paced by a token bucket at Finnhub's per-minute limit"""
+    def __init__(self, ttl_seconds: float = NEWS_CACHE_TTL_SECONDS,
+                 requests_per_minute: float = FINNHUB_RATE_LIMIT_PER_MIN,
+                 timeout_seconds: float = FINNHUB_TIMEOUT_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.timeout_seconds = timeout_seconds
+        self._bucket = TokenBucket(requests_per_minute)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._cache: Dict[Tuple[str, int], Tuple[float, List[Dict]]] = {}
+        self._in_flight: Dict[Tuple[str, int], asyncio.Task] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds))
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get(self, ticker: str, days_back: int):
+        """One Finnhub company-news request; the decoded JSON body."""
+        async with self._get_session().get(FINNHUB_COMPANY_NEWS_URL,
+                                           params=_company_news_params(ticker, days_back)) as r:
+            r.raise_for_status()
+            return await r.json()
+
+    def _store(self, key: Tuple[str, int], data: List[Dict]):
+        """Cache 'data' under 'key' and drop the expired entries. Every entry gets the same TTL and
+        is re-inserted at the end, so the dict is in expiry order and pruning stops at the first
+        live entry."""
+        now = time.monotonic()
+        self._cache.pop(key, None)
+        self._cache[key] = (now + self.ttl_seconds, data)
+        while self._cache:
+            oldest = next(iter(self._cache))
+            if self._cache[oldest][0] > now:
+                break
+            del self._cache[oldest]
+
+    async def _fetch(self, ticker: str, days_back: int) -> List[Dict]:
+        await self._bucket.acquire()
+        metrics.REQUESTS.inc(label_value="finnhub")
+        try:
+            data = await self._get(ticker, days_back)
+        except Exception:
+            metrics.ERRORS.inc(label_value="finnhub")
+            return []
+        if not isinstance(data, list):
+            return []
+        self._store((ticker, days_back), data)
+        return data
+
+    async def company_news(self, ticker: str, days_back: int = 7) -> List[Dict]:
+        """Raw Finnhub news items for 'ticker' (cached; empty list on failure)."""
+        if not FINNHUB_API_KEY:
+            return []
+        key = (ticker, days_back)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(ticker, days_back))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # shield so one cancelled caller doesn't cancel the lookup for the others
+        return await asyncio.shield(task)
+
+
+_news_client = AsyncNewsClient()
+# news_index.NewsIngester serving lookups locally once ready
+_news_ingester = None
+
+
+def use_news_index(ingester):
+    """Serve headline lookups from 'ingester' (a news_index.NewsIngester) once it is ready; None
+    goes back to per-symbol Finnhub requests."""
+    global _news_ingester
+    _news_ingester = ingester
+
+
+async def extract_headlines_and_catalysts_async(symbol: str, days_back: int = 7, max_headlines: int = 5) -> Tuple[List[Dict], bool]:
+    """Async, cached version of extract_headlines_and_catalysts (same return value)."""
+    if _news_ingester is not None and _news_ingester.ready:
+        with metrics.timer("news_lookup"):
+            return _news_ingester.index.lookup(symbol, days_back, max_headlines)
+    with metrics.timer("news"):
+        raw = await _news_client.company_news(symbol, days_back=days_back)
+        return _parse_headlines(raw, max_headlines)
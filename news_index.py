@@ -0,0 +1,178 @@
+# news_index.py
+import asyncio
+import bisect
+import datetime
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import metrics
+from config import NEWS_POLL_SECONDS, NEWS_INDEX_MAX_AGE_HOURS, NEWS_BACKFILL_LIMIT
+from market_data import NEWS_PAGE_SIZE
+from news_fetcher import make_headline
+
+logger = logging.getLogger("news_index")
+
+# articles re-requested on each poll so ones published while the last poll was in flight aren't missed
+POLL_OVERLAP_SECONDS = 120
+# most articles one poll asks for
+POLL_LIMIT = 500
+
+
+class NewsIndex:
+    """Time-bounded inverted index from ticker to recent headlines, market-wide.
+    Each article is tagged with catalyst keywords once, when added; per ticker the index keeps
+    (epoch seconds, article id) pairs in time order. Articles older than 'max_age_hours' are
+    evicted by evict()."""
+    def __init__(self, max_age_hours: float = NEWS_INDEX_MAX_AGE_HOURS):
+        self.max_age_seconds = max_age_hours * 3600.0
+        # article id -> (epoch seconds, headline dict as news_fetcher builds it, tickers)
+        self._articles: Dict[str, Tuple[float, Dict, Tuple[str, ...]]] = {}
+        self._by_symbol: Dict[str, List[Tuple[float, str]]] = {}
+        self.newest: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._articles)
+
+    def symbols(self) -> int:
+        return len(self._by_symbol)
+
+    def add(self, article_id: str, timestamp: float, headline: str, url: str, symbols: Iterable[str]) -> bool:
+        """Index one article (a known id with a new headline replaces the old one). False if it
+        was already indexed or is too old."""
+        if timestamp < time.time() - self.max_age_seconds:
+            return False
+        known = self._articles.get(article_id)
+        if known is not None:
+            if known[0] == timestamp and known[1]["headline"] == headline:
+                # seen on an earlier (overlapping) poll
+                return False
+            self._remove(article_id)
+        tickers = tuple(dict.fromkeys(s.upper() for s in symbols if s))
+        entry = make_headline(headline, datetime.datetime.fromtimestamp(timestamp), url)
+        self._articles[article_id] = (timestamp, entry, tickers)
+        for symbol in tickers:
+            bisect.insort(self._by_symbol.setdefault(symbol, []), (timestamp, article_id))
+        if self.newest is None or timestamp > self.newest:
+            self.newest = timestamp
+        return True
+
+    def _remove(self, article_id: str):
+        timestamp, _, tickers = self._articles.pop(article_id)
+        for symbol in tickers:
+            items = self._by_symbol.get(symbol)
+            if items:
+                i = bisect.bisect_left(items, (timestamp, article_id))
+                if i < len(items) and items[i] == (timestamp, article_id):
+                    del items[i]
+                if not items:
+                    del self._by_symbol[symbol]
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """Drop articles older than max_age_hours; returns how many."""
+        cutoff = (now if now is not None else time.time()) - self.max_age_seconds
+        old = [article_id for article_id, (timestamp, _, _) in self._articles.items() if timestamp < cutoff]
+        for article_id in old:
+            self._remove(article_id)
+        return len(old)
+
+    def lookup(self, symbol: str, days_back: float = 7, max_headlines: int = 5) -> Tuple[List[Dict], bool]:
+        """Same result as news_fetcher.extract_headlines_and_catalysts: up to 'max_headlines' of the
+        symbol's headlines from the last 'days_back' days, newest first, and whether any of them
+        matched a catalyst keyword."""
+        items = self._by_symbol.get(symbol.upper())
+        if not items:
+            return [], False
+        cutoff = time.time() - days_back * 86400.0
+        headlines = []
+        for timestamp, article_id in reversed(items):
+            if timestamp < cutoff or len(headlines) >= max_headlines:
+                break
+            headlines.append(self._articles[article_id][1])
+        return headlines, any(h["matched"] for h in headlines)
+
+
+class NewsIngester:
+    """Keeps a NewsIndex filled from Alpaca's market-wide news feed: a backfill of the index's
+    whole max-age window (capped at 'backfill_limit' articles), then one request per
+    'poll_seconds' for articles since the newest seen (minus a small overlap), evicting aged
+    articles after each poll. The backfill pages backwards NEWS_PAGE_SIZE articles per request,
+    so each page waits for its own rate-limit token. 'client' is a market_data.AsyncDataClient
+    wrapping an alpaca-py NewsClient; by default it draws on the same account rate limit
+    (market_data.ACCOUNT_BUCKET) as the bar fetches. ready turns True once the backfill is in;
+    until then news lookups go to Finnhub."""
+    def __init__(self, client, index: NewsIndex, poll_seconds: float = NEWS_POLL_SECONDS,
+                 backfill_limit: int = NEWS_BACKFILL_LIMIT):
+        self.client = client
+        self.index = index
+        self.poll_seconds = poll_seconds
+        self.backfill_limit = backfill_limit
+        self.ready = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _add(self, articles) -> int:
+        added = 0
+        with metrics.timer("news_index"):
+            for article in articles:
+                added += self.index.add(str(article.id), article.created_at.timestamp(), article.headline or article.summary or "",
+                                        article.url or "", article.symbols or [])
+        return added
+
+    async def backfill(self) -> int:
+        """Page backwards from now to the start of the index's window; returns the articles added."""
+        from alpaca.data.requests import NewsRequest
+        start = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=self.index.max_age_seconds)
+        end = None
+        added = seen = 0
+        while seen < self.backfill_limit:
+            limit = min(NEWS_PAGE_SIZE, self.backfill_limit - seen)
+            news_set = await self.client.get_news(NewsRequest(start=start, end=end, limit=limit, exclude_contentless=False))
+            articles = news_set.data.get("news", [])
+            seen += len(articles)
+            added += self._add(articles)
+            if len(articles) < limit:
+                break
+            # newest first: the next page ends at this one's oldest article (repeats are skipped by the index)
+            oldest = min(article.created_at for article in articles)
+            end = oldest if end is None or oldest < end else end - datetime.timedelta(seconds=1)
+        if seen >= self.backfill_limit:
+            logger.warning(f"News backfill stopped at {seen} articles (NEWS_BACKFILL_LIMIT); "
+                           f"older headlines in the {self.index.max_age_seconds / 3600:.0f}h window are missing")
+        logger.info(f"News backfill: {added} articles for {self.index.symbols()} tickers")
+        return added
+
+    def _request(self):
+        from alpaca.data.requests import NewsRequest
+        start = datetime.datetime.fromtimestamp(self.index.newest - POLL_OVERLAP_SECONDS, datetime.timezone.utc)
+        return NewsRequest(start=start, limit=POLL_LIMIT, exclude_contentless=False)
+
+    async def poll_once(self) -> int:
+        """The backfill while the index is empty, otherwise one poll; returns the number of articles added."""
+        if self.index.newest is None:
+            added = await self.backfill()
+        else:
+            news_set = await self.client.get_news(self._request())
+            added = self._add(news_set.data.get("news", []))
+        self.index.evict()
+        self.ready = True
+        return added
+
+    async def run(self):
+        while True:
+            try:
+                added = await self.poll_once()
+                logger.debug(f"News index: {added} articles added, {len(self.index)} held for {self.index.symbols()} tickers")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"News poll failed: {e}")
+            await asyncio.sleep(self.poll_seconds)
@@ -1,7 +1,8 @@
 # ping.py
-from flask import Flask
+from flask import Flask, Response
 import threading
 import bot  # this imports your Discord bot file (bot.py)
+import metrics
 
 app = Flask(__name__)
 
@@ -9,10 +10,14 @@ app = Flask(__name__)
 def ping():
     return "Bot is alive!", 200
 
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 def run_flask():
     app.run(host="0.0.0.0", port=5000)
 
 threading.Thread(target=run_flask).start()
 
 # Start your Discord bot
-bot.run()
+bot.bot.run(bot.DISCORD_TOKEN)
@@ -0,0 +1,86 @@
+# replay_server.py
+"""Local stand-in for Alpaca's market data websocket that plays recorded minute bars.
+
+    python replay_server.py bars.csv [more.csv ...] --port 8765 --speed 60 --rebase
+
+CSV columns: timestamp, open, high, low, close, volume and optionally symbol (defaults to
+the file name). Point the bot at it with STREAMING_MODE=true ALPACA_STREAM_URL=ws://localhost:8765.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List
+
+import msgpack
+import pandas as pd
+from websockets.asyncio.server import serve
+
+logger = logging.getLogger("replay_server")
+
+
+def load_bars(paths: List[str]) -> pd.DataFrame:
+    """Recorded bars from CSV files, sorted by timestamp."""
+    frames = []
+    for path in paths:
+        df = pd.read_csv(path)
+        if 'symbol' not in df.columns:
+            df['symbol'] = os.path.splitext(os.path.basename(path))[0].upper()
+        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True).sort_values('timestamp', kind='stable')
+
+
+def _bar_message(row, timestamp: pd.Timestamp) -> Dict:
+    return {"T": "b", "S": row.symbol, "o": float(row.open), "h": float(row.high), "l": float(row.low),
+            "c": float(row.close), "v": float(row.volume), "n": 0, "vw": float(row.close),
+            "t": msgpack.Timestamp.from_unix_nano(timestamp.value)}
+
+
+class ReplayServer:
+    """Speaks the connect / auth / subscribe handshake of the Alpaca stream, then plays the
+    recorded bars of subscribed symbols minute by minute, 'speed' times faster than real time.
+    With 'rebase', bars are stamped as the minute that just closed so latency is measurable."""
+    def __init__(self, bars: pd.DataFrame, speed: float = 60.0, rebase: bool = False):
+        self.bars = bars
+        self.speed = speed
+        self.rebase = rebase
+
+    async def handler(self, ws):
+        await ws.send(msgpack.packb([{"T": "success", "msg": "connected"}]))
+        await ws.recv()  # auth; any key is accepted
+        await ws.send(msgpack.packb([{"T": "success", "msg": "authenticated"}]))
+        sub = msgpack.unpackb(await ws.recv())
+        symbols = set(sub.get("bars", []))
+        await ws.send(msgpack.packb([{"T": "subscription", "bars": sorted(symbols)}]))
+        bars = self.bars if "*" in symbols else self.bars[self.bars['symbol'].isin(symbols)]
+        logger.info(f"Replaying {len(bars)} bars for {len(symbols)} symbols at {self.speed}x")
+        for _, minute in bars.groupby('timestamp', sort=True):
+            await asyncio.sleep(60.0 / self.speed)
+            stamp = (pd.Timestamp(time.time(), unit='s', tz='UTC') - pd.Timedelta(seconds=60)
+                     if self.rebase else None)
+            msgs = [_bar_message(row, stamp if stamp is not None else row.timestamp)
+                    for row in minute.itertuples(index=False)]
+            await ws.send(msgpack.packb(msgs))
+        await ws.wait_closed()
+
+    async def serve(self, host: str = "localhost", port: int = 8765):
+        async with serve(self.handler, host, port) as server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=60.0, help="replay speed multiple (60 = one minute per second)")
+    parser.add_argument("--rebase", action="store_true", help="stamp bars with the current time")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    asyncio.run(ReplayServer(load_bars(args.files), args.speed, args.rebase).serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# scan_scheduler.py
+import logging
+import math
+from collections import deque
+from typing import Dict, Iterable, List
+
+from config import SCAN_BUDGET_PER_CYCLE, COLD_MAX_STALENESS_CYCLES, HOT_TTL_CYCLES
+
+logger = logging.getLogger("scan_scheduler")
+
+
+class TieredScanScheduler:
+    """Chooses which symbols to scan each cycle within a fixed work budget (symbols per cycle).
+
+    - hot tier: symbols with a recent volume spike or near-signal state; scanned every cycle
+      while the budget allows, and demoted back to cold after 'hot_ttl_cycles' quiet cycles.
+    - cold tier: everything else, scanned round-robin. Enough of the budget is reserved for it
+      that every cold symbol is scanned at least once per 'max_staleness_cycles' cycles.
+    """
+    def __init__(self, budget: int = SCAN_BUDGET_PER_CYCLE, max_staleness_cycles: int = COLD_MAX_STALENESS_CYCLES,
+                 hot_ttl_cycles: int = HOT_TTL_CYCLES):
+        self.budget = max(1, budget)
+        self.max_staleness_cycles = max(1, max_staleness_cycles)
+        self.hot_ttl_cycles = hot_ttl_cycles
+        self.cycle = 0
+        self._universe: List[str] = []
+        self._cold = deque()
+        # hot symbol -> cycles left before demotion (insertion order = promotion order)
+        self._hot: Dict[str, int] = {}
+        self._hot_cursor = 0
+        self._warned = False
+
+    def set_universe(self, symbols: List[str]):
+        """Adopt a (new) universe; unchanged lists are a no-op, known hot symbols stay hot."""
+        if symbols == self._universe:
+            return
+        self._universe = list(symbols)
+        members = set(self._universe)
+        self._hot = {s: ttl for s, ttl in self._hot.items() if s in members}
+        self._cold = deque(s for s in self._universe if s not in self._hot)
+
+    @property
+    def hot(self) -> List[str]:
+        return list(self._hot)
+
+    def cold_slots(self) -> int:
+        """Cold symbols scanned per cycle: enough to meet the staleness bound, plus any budget
+        the hot tier leaves unused."""
+        required = math.ceil(len(self._cold) / self.max_staleness_cycles)
+        if required > self.budget and not self._warned:
+            logger.warning(f"Scan budget {self.budget} cannot cover {len(self._cold)} cold symbols within "
+                           f"{self.max_staleness_cycles} cycles; staleness will be "
+                           f"{math.ceil(len(self._cold) / self.budget)} cycles")
+            self._warned = True
+        return min(len(self._cold), max(required, self.budget - len(self._hot)))
+
+    def next_batch(self) -> List[str]:
+        """Symbols to scan this cycle (at most 'budget')."""
+        self.cycle += 1
+        n_cold = min(self.cold_slots(), self.budget)
+        n_hot = min(len(self._hot), self.budget - n_cold)
+        batch = []
+        if n_hot:
+            # hot tier larger than its share rotates too
+            hot = list(self._hot)
+            start = self._hot_cursor % len(hot)
+            batch.extend((hot[start:] + hot[:start])[:n_hot])
+            self._hot_cursor = start + n_hot
+        for _ in range(n_cold):
+            symbol = self._cold.popleft()
+            self._cold.append(symbol)
+            batch.append(symbol)
+        return batch
+
+    def feedback(self, scanned: Iterable[str], hot: Iterable[str]):
+        """Report a cycle's outcome: 'hot' symbols are promoted (or have their TTL refreshed);
+        other scanned hot-tier symbols count down and drop back to the cold tier."""
+        hot = set(hot)
+        for symbol in hot:
+            if symbol not in self._hot:
+                try:
+                    self._cold.remove(symbol)
+                except ValueError:
+                    continue  # not in the universe
+            self._hot[symbol] = self.hot_ttl_cycles
+        for symbol in scanned:
+            if symbol in hot or symbol not in self._hot:
+                continue
+            self._hot[symbol] -= 1
+            if self._hot[symbol] <= 0:
+                del self._hot[symbol]
+                self._cold.append(symbol)
+
+    def defer(self, symbols: Iterable[str]):
+        """Symbols dropped from a cycle at its deadline: cold ones move to the front of the
+        rotation so the next batch picks them up first (hot ones are scanned every cycle anyway)."""
+        deferred = [symbol for symbol in symbols if symbol not in self._hot]
+        if not deferred:
+            return
+        members = set(deferred)
+        self._cold = deque(deferred + [symbol for symbol in self._cold if symbol not in members])
@@ -1,15 +1,28 @@
-from news_fetcher import extract_headlines_and_catalysts
+from news_fetcher import extract_headlines_and_catalysts_async
 import asyncio 
-from typing import List, Dict, Optional
+import datetime
+import time
+from typing import List, Dict, Optional, Tuple
 import pandas as pd
 import numpy as np
 from alpaca.data import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
+from alpaca.data.requests import StockBarsRequest, StockSnapshotRequest
 from alpaca.data.timeframe import TimeFrame
 from alpaca.trading.client import TradingClient
-from alpaca.trading.models import Asset
-from config import (ALPACA_API_KEY, ALPACA_API_SECRET, ALPACA_DATA_BASE_URL, MAX_RESULTS_PER_SCAN, MIN_AVG_VOLUME, LOW_FLOAT_MILLIONS, )
-from indicators import compute_indicators, generate_trade_levels
+from config import (ALPACA_API_KEY, ALPACA_API_SECRET, MAX_RESULTS_PER_SCAN, MIN_AVG_VOLUME, LOW_FLOAT_MILLIONS,
+                    BARS_BATCH_SIZE, BAR_LOOKBACK_MINUTES, BAR_REVISION_MINUTES, MAX_PRICE,
+                    VECTOR_SCREEN, SNAPSHOT_PREFILTER, SNAPSHOT_BATCH_SIZE, HOT_VOLUME_MULTIPLIER, HOT_PROXIMITY_PCT,
+                    SNAPSHOT_MAX_AGE_SECONDS, LOW_FLOAT_FILTER)
+from indicators import generate_trade_levels, timeframe_fields, StreamingIndicators
+from market_data import AsyncDataClient
+import universe
+import fundamentals
+from bar_cache import BarCache
+from screener import UniverseArrays, screen_universe
+from signal_rules import MARKET_PLAN, NEWS_PLAN
+from scan_scheduler import TieredScanScheduler
+import state_snapshot
+import metrics
 import logging
 
 # Fallback logger if local 'utils.logger' is not available.
@@ -24,20 +37,49 @@ logger.setLevel(logging.INFO)
 # Create Clients
 _data_client = StockHistoricalDataClient(ALPACA_API_KEY, ALPACA_API_SECRET)
 _trading_client = TradingClient(ALPACA_API_KEY, ALPACA_API_SECRET, paper=True)
+# Non-blocking, rate limited wrapper used by all bar fetches
+_data = AsyncDataClient(_data_client)
+# Process-wide minute-bar cache, seeded once per symbol and topped up with delta fetches
+_bar_cache = BarCache()
+# Daily float / shares outstanding per symbol for the low-float universe filter
+_fundamentals = fundamentals.FundamentalsCache()
+# Per-symbol incremental indicators, fed only the bars each refresh appends
+_indicator_states: Dict[str, StreamingIndicators] = {}
+# Hot/cold tiers deciding which symbols each cycle scans
+_scheduler = TieredScanScheduler()
 
 
 
+def now_utc() -> datetime.datetime:
+    """Clock for bar request windows; the backtest replaces it with its simulated clock."""
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
 async def build_universe() -> List[str]:
-    """Load symbols from symbols.txt - skip Alpaca universe"""
-    try:
-        with open('symbols.txt', 'r') as f:
-            symbols = [line.strip().upper() for line in f if line.strip()]
-        print(f'✅ Loaded {len(symbols)} symbols from symbols.txt')
+    """Scan universe: symbols.txt and/or all active tradable US equities, loaded from the
+    daily on-disk asset cache (see universe.build_universe), pruned to low-float names with
+    LOW_FLOAT_FILTER on. The filter uses the fundamentals already cached; refresh_fundamentals
+    (run in the background) adds to them."""
+    symbols = await universe.build_universe(_trading_client)
+    if not LOW_FLOAT_FILTER:
         return symbols
-    except Exception as e:
-        print(f'❌ Error loading symbols.txt: {e}')
-        # Fallback symbols
-        return ['AAPL', 'TSLA', 'AMD', 'NVDA', 'MSFT', 'GOOGL', 'META', 'AMZN']
+    if not len(_fundamentals):
+        _fundamentals.load()
+    kept = _fundamentals.prune(symbols)
+    logger.info(f"Low-float filter: {len(kept)}/{len(symbols)} symbols under {LOW_FLOAT_MILLIONS:g}M float "
+                f"({sum(s not in _fundamentals for s in symbols)} unknown)")
+    return kept
+
+
+async def refresh_fundamentals() -> bool:
+    """The low-float filter's daily fundamentals refresh (stand-in file and up to
+    FUNDAMENTALS_FETCH_LIMIT Yahoo lookups) over the unfiltered universe. True when it ran, so
+    the universe should be rebuilt; False if the filter is off or today's refresh is done."""
+    if not LOW_FLOAT_FILTER:
+        return False
+    refreshed_on = _fundamentals.refreshed_on
+    await fundamentals.load_daily(await universe.build_universe(_trading_client), _fundamentals)
+    return _fundamentals.refreshed_on != refreshed_on
 
 
 def bars_to_df(bars) -> pd.DataFrame:
@@ -48,109 +90,459 @@ def bars_to_df(bars) -> pd.DataFrame:
     # normalize columns if needed
     if 'close' not in df.columns:
         df["close"] = df["c"]
+    # compute_indicators works on a 'price' column
+    if 'price' not in df.columns:
+        df["price"] = df["close"]
     return df
 
-async def fetch_recent_bars(ticker: str, limit: int = 200) -> Optional[pd.DataFrame]:
-    """Fetch recent 1-minute bars for a given ticker (includes pre/post).
-    Returns pandas DataFrame indexed by timestamp ascending."""
-    try:
-        request = StockBarsRequest(
-            symbol_or_symbols=ticker,
-            timeframe=TimeFrame.Minute,
-            limit=limit,
-            adjustment=None
-            )
-        bars = _data_client.get_stock_bars(request).df
-        # If multiple symbols requested, bars has multiindex; we handle single symbol path
-        if (ticker,) in bars.index:
-            df = bars.loc[(ticker, )]. copy()
+
+def split_bars_by_symbol(bars: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Split a multi-symbol bars DataFrame (MultiIndex: symbol, timestamp) into
+    per-symbol OHLCV frames indexed by timestamp ascending. Done once per response,
+    by slicing one sorted array per column rather than a groupby per symbol."""
+    frames: Dict[str, pd.DataFrame] = {}
+    if bars is None or bars.empty:
+        return frames
+    bars = bars[['open', 'high', 'low', 'close', 'volume']].sort_index(level=[0, 1])
+    symbols = bars.index.get_level_values(0)
+    timestamps = bars.index.get_level_values(1)
+    values = bars.to_numpy()
+    codes, uniques = pd.factorize(symbols)
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.r_[0, bounds]
+    ends = np.r_[bounds, len(codes)]
+    for symbol, start, end in zip(uniques, starts, ends):
+        frames[symbol] = pd.DataFrame(values[start:end], index=timestamps[start:end], columns=bars.columns)
+    return frames
+
+
+def _chunks(items: List[str], size: int):
+    for i in range(0, len(items), max(1, size)):
+        yield items[i:i + size]
+
+
+async def fetch_bars_batch(symbols: List[str], limit: int = 120, batch_size: int = BARS_BATCH_SIZE,
+                           lookback_minutes: int = BAR_LOOKBACK_MINUTES,
+                           start: Optional[datetime.datetime] = None) -> Dict[str, pd.DataFrame]:
+    """Fetch recent 1-minute bars for many symbols with one StockBarsRequest per chunk of
+    'batch_size' symbols. Returns {symbol: DataFrame} with at most 'limit' bars each;
+    symbols with no bars in the window are absent from the result.
+
+    The request is bounded by a start time (default: 'lookback_minutes' ago) rather than
+    'limit' because Alpaca applies 'limit' to the whole multi-symbol response, not per symbol."""
+    frames: Dict[str, pd.DataFrame] = {}
+    if not symbols:
+        return frames
+    if start is None:
+        start = now_utc() - datetime.timedelta(minutes=lookback_minutes)
+
+    async def fetch_chunk(chunk: List[str]):
+        try:
+            request = StockBarsRequest(
+                symbol_or_symbols=chunk,
+                timeframe=TimeFrame.Minute,
+                start=start,
+                adjustment=None
+                )
+            return (await _data.get_stock_bars(request)).df
+        except Exception as e:
+            logger.error(f"Error fetching bars for batch of {len(chunk)} symbols ({chunk[0]}..): {e}")
+            return None
+
+    # chunks run concurrently; AsyncDataClient enforces the concurrency and rate limits
+    chunks = list(_chunks(symbols, batch_size))
+    for bars in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+        for symbol, df in split_bars_by_symbol(bars).items():
+            frames[symbol] = df.iloc[-limit:] if len(df) > limit else df
+    logger.info(f"Fetched bars for {len(frames)}/{len(symbols)} symbols in {len(chunks)} requests")
+    return frames
+
+def _snapshot_gate(snapshot) -> str:
+    """Stage-1 verdict for one snapshot: 'pass', 'price', 'volume' or 'no_data'.
+    The volume gate is conservative: a 20-bar average of MIN_AVG_VOLUME needs at least
+    20 x MIN_AVG_VOLUME shares across the current and previous daily bars."""
+    if snapshot is None:
+        return 'no_data'
+    price = None
+    if snapshot.latest_trade is not None:
+        price = snapshot.latest_trade.price
+    elif snapshot.minute_bar is not None:
+        price = snapshot.minute_bar.close
+    if price is None:
+        return 'no_data'
+    if price >= MAX_PRICE:
+        return 'price'
+    recent_volume = sum(bar.volume for bar in (snapshot.daily_bar, snapshot.previous_daily_bar) if bar is not None)
+    if recent_volume < MIN_AVG_VOLUME * 20:
+        return 'volume'
+    return 'pass'
+
+
+async def prefilter_by_snapshot(symbols: List[str], batch_size: int = SNAPSHOT_BATCH_SIZE) -> Tuple[List[str], Dict[str, int]]:
+    """Stage 1: pull latest-trade / daily-bar snapshots for the whole list in a few multi-symbol
+    requests and discard names that fail the price or volume gates. Returns (survivors in input
+    order, {reason: symbols removed}). If a snapshot request fails its symbols pass through."""
+    async def fetch_chunk(chunk: List[str]):
+        try:
+            return await _data.get_stock_snapshot(StockSnapshotRequest(symbol_or_symbols=chunk))
+        except Exception as e:
+            logger.error(f"Error fetching snapshots for batch of {len(chunk)} symbols ({chunk[0]}..): {e}")
+            return None
+
+    chunks = list(_chunks(symbols, batch_size))
+    survivors: List[str] = []
+    removed = {'price': 0, 'volume': 0, 'no_data': 0}
+    for chunk, snapshots in zip(chunks, await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))):
+        if snapshots is None:
+            survivors.extend(chunk)
+            continue
+        for symbol in chunk:
+            verdict = _snapshot_gate(snapshots.get(symbol))
+            if verdict == 'pass':
+                survivors.append(symbol)
+            else:
+                removed[verdict] += 1
+    return survivors, removed
+
+
+async def refresh_bar_cache(symbols: List[str], batch_size: int = BARS_BATCH_SIZE,
+                            lookback_minutes: int = BAR_LOOKBACK_MINUTES,
+                            deadline: Optional[float] = None) -> Dict[str, Tuple[int, bool]]:
+    """Bring the process-wide bar cache up to date for 'symbols'. Returns, for every symbol with
+    cached bars, (bars appended at the end, whether the cached history was revised or reseeded).
+
+    Symbols not cached yet (or whose last bar fell out of the lookback window) are seeded with
+    a full lookback request. The rest get a delta request starting BAR_REVISION_MINUTES before
+    their last cached bar, so late and revised bars overwrite what was cached. Warm symbols are
+    sorted by last timestamp before chunking, so each chunk's shared start time stays tight.
+
+    With a 'deadline' (time.monotonic()), requests still running then are cancelled and their
+    symbols left out of the result."""
+    now = now_utc()
+    oldest_warm = pd.Timestamp(now - datetime.timedelta(minutes=lookback_minutes))
+    cold, warm = [], []
+    for symbol in symbols:
+        last_ts = _bar_cache.last_timestamp(symbol)
+        if last_ts is None or last_ts < oldest_warm:
+            _bar_cache.discard(symbol)
+            cold.append(symbol)
         else:
-            df = bars.copy()
-        # Keep only necessary columns and ensyre chronological 
-        df = df[['open', 'high', 'low', 'close', 'volume']]
-        df = df.sort_index()
-        df = df.rename(columns={'close': 'close'})
-        return df
-    except Exception as e:
-        logger.error(f"Error fetching bars for {ticker}: {e}")
+            warm.append((last_ts, symbol))
+
+    # (symbols, fetch) per request group
+    fetches = []
+    if cold:
+        fetches.append((cold, fetch_bars_batch(cold, limit=_bar_cache.capacity, batch_size=batch_size,
+                                               lookback_minutes=lookback_minutes)))
+    warm.sort(reverse=True)
+    overlap = datetime.timedelta(minutes=BAR_REVISION_MINUTES)
+    for i in range(0, len(warm), max(1, batch_size)):
+        chunk = warm[i:i + batch_size]
+        start = min(ts for ts, _ in chunk).to_pydatetime() - overlap
+        chunk_symbols = [symbol for _, symbol in chunk]
+        fetches.append((chunk_symbols, fetch_bars_batch(chunk_symbols, limit=_bar_cache.capacity,
+                                                        batch_size=batch_size, start=start)))
+
+    if deadline is None:
+        results = await asyncio.gather(*(fetch for _, fetch in fetches))
+        deferred = set()
+    else:
+        tasks = [asyncio.ensure_future(fetch) for _, fetch in fetches]
+        done, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - time.monotonic())) if tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+        results = [task.result() for task in tasks if task in done]
+        deferred = {symbol for (group, _), task in zip(fetches, tasks) if task in pending for symbol in group}
+        if deferred:
+            logger.warning(f"Bar refresh hit the cycle deadline; deferred {len(deferred)} symbols")
+
+    updates: Dict[str, Tuple[int, bool]] = {}
+    for frames in results:
+        for symbol, df in frames.items():
+            updates[symbol] = _bar_cache.merge(symbol, df)
+    for symbol in cold:
+        if symbol in updates:
+            updates[symbol] = (updates[symbol][0], True)
+    for symbol in symbols:
+        if symbol in _bar_cache and symbol not in updates and symbol not in deferred:
+            updates[symbol] = (0, False)
+    appended = sum(n for n, _ in updates.values())
+    revised = sum(1 for symbol, (_, r) in updates.items() if r and symbol not in cold)
+    logger.info(f"Bar cache: {len(cold)} seeded, {len(warm)} delta-fetched, {appended} new bars, {revised} symbols revised")
+    return updates
+
+
+def save_state(path: str, posted=()):
+    """Snapshot this process's bar cache and indicator state (plus 'posted' entries, see
+    SubscriptionRegistry.posted_entries) to 'path'."""
+    state_snapshot.save_snapshot(path, _bar_cache, _indicator_states, posted)
+
+
+def restore_state(path: str, max_age_seconds: float = SNAPSHOT_MAX_AGE_SECONDS) -> List[str]:
+    """Warm start from a snapshot written by save_state; returns the posted entries it held.
+    The next refresh_bar_cache only needs delta fetches for the restored symbols."""
+    return state_snapshot.load_snapshot(path, _bar_cache, _indicator_states, max_age_seconds)
+
+
+def update_indicator_state(symbol: str, appended: int, revised: bool) -> Optional[StreamingIndicators]:
+    """Feed newly appended cached bars into the symbol's StreamingIndicators. Revised or back-filled
+    bars are applied as changes to the running state (StreamingIndicators.revise), so session VWAP
+    keeps the bars older than the cache; a new symbol's state is built from the cached bars."""
+    state = _indicator_states.get(symbol)
+    if state is None:
+        bars = _bar_cache.view(symbol)
+        if bars is None:
+            return None
+        # the revisions are already in the cached bars
+        _bar_cache.take_revisions(symbol)
+        state = _indicator_states[symbol] = StreamingIndicators()
+        state.update_arrays(bars.timestamps, bars.closes, bars.volumes)
+        return state
+    if revised:
+        revisions = _bar_cache.take_revisions(symbol)
+        bars = _bar_cache.view(symbol)
+        end = len(bars) - appended
+        state.revise(revisions, bars.closes[:end], bars.volumes[:end])
+    if appended:
+        # a cycle usually appends one or two bars; read them straight from the cache buffers
+        state.update_arrays(*_bar_cache.tail(symbol, appended))
+    return state
+
+
+def push_bar(symbol: str, timestamp: pd.Timestamp, row: Tuple[float, float, float, float, float]) -> Optional[StreamingIndicators]:
+    """Apply one streamed (open, high, low, close, volume) bar to the bar cache and the symbol's
+    indicator state. A new bar is O(1); a revised bar is applied as a change to the state."""
+    appended, revised = _bar_cache.push(symbol, timestamp.value, tuple(float(v) for v in row))
+    state = _indicator_states.get(symbol)
+    if state is None or revised:
+        return update_indicator_state(symbol, appended, revised)
+    if appended:
+        state.update(timestamp, float(row[3]), float(row[4]))
+    return state
+
+
+# the resampled timeframes' values (ma20_5m, high_session, ...) are gathered only for a signal rule that reads them
+_TIMEFRAME_VALUES = bool(set(timeframe_fields()).intersection(MARKET_PLAN.fields))
+
+
+def indicator_values(symbol: str, state: Optional[StreamingIndicators]) -> Optional[Dict]:
+    """Latest indicator values of one symbol (same keys as ScreenResult.hits), None without bars."""
+    if state is None or state.count == 0:
         return None
+    values = {"symbol": symbol, "close": state.last_close, "vwap": state.vwap, "ma20": state.ma20,
+              "ma50": state.ma50, "last_volume": state.last_volume, "avg_volume": state.avg_volume,
+              "bars": state.count}
+    if _TIMEFRAME_VALUES:
+        values.update(state.timeframe_values())
+    return values
+
+
+def is_signal(values: Dict) -> bool:
+    """The market-data part of the signal rule (signal_rules.MARKET_PLAN; by default price <
+    MAX_PRICE, >= 20 bars, avg volume >= MIN_AVG_VOLUME, price above VWAP, MA20 > MA50 and a
+    volume spike), cheapest conditions first."""
+    return MARKET_PLAN.matches(values)
+
+
+def is_hot(values: Dict) -> bool:
+    """Volume pickup or near-signal state; such symbols are scanned every cycle."""
+    near = 1 - HOT_PROXIMITY_PCT / 100.0
+    return (values["last_volume"] > values["avg_volume"] * HOT_VOLUME_MULTIPLIER
+            or (values["close"] >= values["vwap"] * near and values["ma20"] >= values["ma50"] * near))
 
 
-async def get_last_trade_price(symbol: str) -> Optional[float]:
-    """ 
-    Quick latest price fetch via 1 bar (limit=1). Used to filter price < $10"""
-    df = await fetch_recent_bars(symbol, limit=5)
-    if df is None or df.empty:
+async def evaluate_symbol(symbol: str, state: Optional[StreamingIndicators], subscriptions) -> Optional[Dict]:
+    """Apply the price / volume / VWAP / MA filters to one symbol's indicator state and build
+    the trade idea dict if it signals. Returns None when the symbol does not qualify."""
+    values = indicator_values(symbol, state)
+    if values is None or not is_signal(values):
         return None
-    return float(df['close'].iloc[-1])
+    return await _build_idea(values, subscriptions)
 
 
+def trade_levels(values: Dict) -> Dict:
+    """Entry / stop / take levels and a $1000-risk share count for a signalling symbol."""
+    entry, stop, take = generate_trade_levels(values["close"], values["vwap"], values["ma20"])
+    shares = 0 
+    risk_per_share = max(0.0001, entry-stop)
+    try: 
+        shares = int(float(1000) / risk_per_share)
+    except Exception:
+        shares = 0
+    return {"entry": entry, "stop": stop, "take": take, "shares": shares}
 
-async def scan_once(universe: List[str], posted_store, max_results: int = MAX_RESULTS_PER_SCAN) -> List[Dict]:
-    """Scan the given universe for candidates that meet filters:
-    - Price < $10
-    - recent volume spike (current minute volume > avg * 2)
-    - MA / VWAP signal: price >vwap and ma20 > ma50
-    Return list of trade idea dicts."""
-    results = []
-    checked = 0
-    for symbol in universe:
-        if checked >= max_results:
-            break
-        checked += 1
+
+async def _build_idea(values: Dict, subscriptions) -> Optional[Dict]:
+    """Turn a signalling symbol's indicator values into a trade idea dict (levels, size, news).
+    None if no subscription still wants it (subscriptions.wants); the caller marks it posted
+    when it is delivered (SubscriptionRegistry.fan_out)."""
+    symbol = values["symbol"]
+    latest_close, latest_vwap, latest_ma20 = values["close"], values["vwap"], values["ma20"]
+    if not subscriptions.wants(values):
+        return None
+    levels = trade_levels(values)
+
+    # pooled, cached and rate limited; never blocks the event loop
+    headlines, has_catalyst = await extract_headlines_and_catalysts_async(symbol, days_back=5, max_headlines=5)
+    if NEWS_PLAN and not NEWS_PLAN.matches({**values, "has_catalyst": has_catalyst}):
+        # not posted: the catalyst may show up in a later cycle
+        return None
+
+    idea = {
+        "symbol": symbol,
+        "price": latest_close,
+        "vwap" : latest_vwap,
+        "ma20": latest_ma20,
+        "ma50": values["ma50"],
+        "avg_volume": int(values["avg_volume"]),
+        "last_volume": int(values["last_volume"]),
+        "entry": levels["entry"],
+        "stop": levels["stop"],
+        "take": levels["take"],
+        "shares": levels["shares"],
+        "news": headlines,              # list of dicts with datetime, headline, url, matched
+        "has_catalyst": has_catalyst,
+    }
+    return idea
+
+
+def _screen_states(updates: Dict[str, Tuple[int, bool]]) -> Tuple[List[Dict], List[str]]:
+    """Per-symbol path: update each symbol's StreamingIndicators and apply the rule.
+    Returns (indicator values of signalling symbols, hot symbols)."""
+    signals, hot = [], []
+    indicator_seconds = rule_seconds = 0.0
+    for symbol, (appended, revised) in updates.items():
+        started = time.perf_counter()
         try:
-            price = await get_last_trade_price(symbol)
-            if price is None:
-                continue
-            if price >= 10:
-                continue 
-            df = await fetch_recent_bars(symbol, limit=120)
-            if df is None or len(df) < 20:
-                continue
-            df_ind = compute_indicators(df)
-            latest = df_ind.iloc[-1]
-            latest_close = float(latest['close'])
-            latest_vwap = float(latest['VWAP'])
-            latest_ma20 = float(latest['MA20'])
-            latest_ma50 = float(latest['MA50'])
-            # Volume checks: compare last bar volume vs average 20 
-            last_vol = float(latest['volume'])
-            avg_vol = float(df_ind['volume'].rolling(window=20, min_periods=1).mean().iloc[-1])
-            if avg_vol < MIN_AVG_VOLUME:
-                continue
-            # simple signal: price above vwap and ma20 > ma50 and volume spike 
-            if latest_close > latest_vwap and latest_ma20 > latest_ma50 and last_vol > avg_vol * 1.8:
-                # Optionally filter low float if you have data (skipped if not provided) 
-                if posted_store.has(symbol):
-                    continue  
-                entry, stop, take = generate_trade_levels(latest_close, latest_vwap, latest_ma20)
-                shares = 0 
-                risk_per_share = max(0.0001, entry-stop)
-                try: 
-                    shares = int(float(1000) / risk_per_share)
-                except Exception:
-                    shares = 0
-
-                headlines, has_catalyst = extract_headlines_and_catalysts(symbol, days_back=5, max_headlines=5)
-
-                idea = {
-                    "symbol": symbol,
-                    "price": latest_close,
-                    "vwap" : latest_vwap,
-                    "ma20": latest_ma20,
-                    "ma50": latest_ma50,
-                    "avg_volume": int(avg_vol),
-                    "last_volume": int(last_vol),
-                    "entry": entry,
-                    "stop": stop,
-                    "take": take,
-                    "shares": shares,
-                    "news": headlines,              # list of dicts with datetime, headline, url, matched
-                    "has_catalyst": has_catalyst,
-                }
-                results.append(idea)
-                posted_store.add(symbol)
+            values = indicator_values(symbol, update_indicator_state(symbol, appended, revised))
         except Exception as e:
             logger.error(f"Error processing {symbol}: {e}")
             continue
-    return results
\ No newline at end of file
+        updated = time.perf_counter()
+        indicator_seconds += updated - started
+        if values is None:
+            continue
+        if is_signal(values):
+            signals.append(values)
+            hot.append(symbol)
+        elif is_hot(values):
+            hot.append(symbol)
+        rule_seconds += time.perf_counter() - updated
+    # one observation per cycle; the loop is interleaved per symbol
+    metrics.STAGE_SECONDS.observe(indicator_seconds, "indicators")
+    metrics.STAGE_SECONDS.observe(rule_seconds, "rules")
+    return signals, hot
+
+
+def _screen_vectorized(updates: Dict[str, Tuple[int, bool]]) -> Tuple[List[Dict], List[str]]:
+    """Vector path: screen all cached symbols with one set of NumPy array operations. Session VWAP
+    and the bar count come from the symbols' StreamingIndicators (O(1) per new bar), as the
+    cached bars only cover the last BAR_CACHE_CAPACITY minutes."""
+    with metrics.timer("indicators"):
+        for symbol, (appended, revised) in updates.items():
+            update_indicator_state(symbol, appended, revised)
+        screen = screen_universe(UniverseArrays.from_cache(_bar_cache, list(updates), width=_bar_cache.capacity,
+                                                           states=_indicator_states))
+    with metrics.timer("rules"):
+        return screen.hits(), screen.hot_symbols()
+
+
+async def prefetch_cycle(universe: List[str]) -> Tuple[List[str], List[str], Dict[str, Tuple[int, bool]]]:
+    """First half of a scan cycle, safe to run ahead of the cycle boundary: schedule the batch,
+    prefilter it on snapshots and seed the bar cache for symbols not cached yet (their history
+    does not change before the boundary). Returns (batch, survivors, seed updates)."""
+    _scheduler.set_universe(universe)
+    batch = _scheduler.next_batch()
+    symbols = batch
+    if SNAPSHOT_PREFILTER:
+        # stage 1: cheap snapshot gates; only survivors go on to minute bars and indicators
+        symbols, removed = await prefilter_by_snapshot(symbols)
+        logger.info(f"Stage 1 (snapshots): {len(symbols)}/{len(batch)} passed, removed "
+                    f"{removed['price']} on price, {removed['volume']} on volume, {removed['no_data']} without data")
+    cold = [symbol for symbol in symbols if symbol not in _bar_cache]
+    seeded = await refresh_bar_cache(cold) if cold else {}
+    return batch, symbols, seeded
+
+
+async def complete_cycle(prepared: Tuple[List[str], List[str], Dict[str, Tuple[int, bool]]],
+                         deadline: Optional[float] = None) -> List[Dict]:
+    """Second half of a scan cycle: delta-refresh the prepared symbols' bars, update indicators,
+    apply the rule and report back to the scheduler. Symbols whose bars are not in by 'deadline'
+    (time.monotonic()) are deferred to the front of the next batch. Returns the indicator values
+    of every signalling symbol (no dedup, no news)."""
+    batch, symbols, seeded = prepared
+    # cached bars plus one multi-symbol delta request per chunk; the price filter reads from the same bars
+    updates = await refresh_bar_cache(symbols, deadline=deadline)
+    for symbol, (appended, _) in seeded.items():
+        # a state left from before the symbol was cached is rebuilt from the fresh history
+        _indicator_states.pop(symbol, None)
+        if symbol in updates:
+            updates[symbol] = (appended + updates[symbol][0], True)
+    deferred = [symbol for symbol in symbols if symbol in _bar_cache and symbol not in updates]
+    if VECTOR_SCREEN:
+        signals, hot = _screen_vectorized(updates)
+    else:
+        signals, hot = _screen_states(updates)
+    deferred_set = set(deferred)
+    _scheduler.feedback([symbol for symbol in batch if symbol not in deferred_set], hot)
+    _scheduler.defer(deferred)
+    metrics.SIGNALS.inc(len(signals))
+    logger.info(f"Stage 2 (bars/indicators): {len(updates)} evaluated, {len(updates) - len(signals)} removed, "
+                f"{len(signals)} signals, {len(deferred)} deferred; hot tier {len(_scheduler.hot)}")
+    return signals
+
+
+async def scan_candidates(universe: List[str], deadline: Optional[float] = None) -> List[Dict]:
+    """One scan cycle up to the signal rule: schedule a batch, prefilter it on snapshots, refresh
+    its bars and indicators, and return the indicator values of every signalling symbol
+    (no dedup, no news). Shard workers run this on their part of the universe."""
+    return await complete_cycle(await prefetch_cycle(universe), deadline)
+
+
+def select_fresh(signals: List[Dict], subscriptions, max_results: int = MAX_RESULTS_PER_SCAN) -> List[Dict]:
+    """Signals some subscription still wants (see subscriptions.SubscriptionRegistry.wants),
+    strongest volume spike first, at most 'max_results'."""
+    fresh = [values for values in signals if subscriptions.wants(values)]
+    # a custom SIGNAL_RULE need not require avg_volume > 0
+    fresh.sort(key=lambda v: v["last_volume"] / max(v["avg_volume"], 1), reverse=True)
+    return fresh[:max_results]
+
+
+async def build_ideas(signals: List[Dict], subscriptions, max_results: int = MAX_RESULTS_PER_SCAN,
+                      deadline: Optional[float] = None) -> List[Dict]:
+    """Drop symbols already posted to every subscription they match, keep the 'max_results'
+    strongest volume spikes and turn them into trade idea dicts (news lookups run concurrently):
+    the cycle's shared candidates, fanned out to subscriptions by the caller. Ideas still waiting
+    on news at 'deadline' (time.monotonic()) are cancelled; they are not posted, so they come
+    back next cycle, when the shared news lookup has usually landed in the cache."""
+    fresh = select_fresh(signals, subscriptions, max_results)
+
+    async def build(values: Dict) -> Optional[Dict]:
+        try:
+            return await _build_idea(values, subscriptions)
+        except Exception as e:
+            logger.error(f"Error processing {values['symbol']}: {e}")
+            return None
+
+    if deadline is None:
+        return [idea for idea in await asyncio.gather(*(build(values) for values in fresh)) if idea is not None]
+    tasks = [asyncio.ensure_future(build(values)) for values in fresh]
+    if not tasks:
+        return []
+    done, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - time.monotonic()))
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning(f"Deferred {len(pending)} ideas still waiting on news at the cycle deadline")
+    return [task.result() for task in tasks if task in done and task.result() is not None]
+
+
+async def scan_once(universe: List[str], subscriptions, max_results: int = MAX_RESULTS_PER_SCAN) -> List[Dict]:
+    """Scan the given universe for candidates that meet filters:
+    - Price < $10
+    - recent volume spike (current minute volume > avg * 2)
+    - MA / VWAP signal: price >vwap and ma20 > ma50
+    Each cycle scans the batch chosen by the hot/cold scheduler (SCAN_BUDGET_PER_CYCLE symbols)
+    and returns at most 'max_results' trade idea dicts, strongest volume spike first."""
+    signals = await scan_candidates(universe)
+    return await build_ideas(signals, subscriptions, max_results)
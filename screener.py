@@ -0,0 +1,262 @@
+# screener.py
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import HOT_VOLUME_MULTIPLIER, HOT_PROXIMITY_PCT
+from indicators import US_EASTERN, MINUTE_NS, TIMEFRAME_MA_WINDOW, timeframe_fields
+from signal_rules import MARKET_PLAN, RulePlan
+
+
+class UniverseArrays:
+    """The universe as aligned 2-D arrays (symbols x minutes) of close, volume and UTC epoch-ns
+    timestamps. Each row holds one symbol's most recent bars right-aligned, so column -1 is every
+    symbol's latest bar; rows with fewer bars are NaN-padded on the left.
+
+    Session VWAP and the bar count cover more history than the arrays hold, so builders that
+    have it pass them as 'vwap' / 'counts' (per row; NaN = compute from the arrays)."""
+    def __init__(self, symbols: List[str], close: np.ndarray, volume: np.ndarray, timestamps: np.ndarray,
+                 vwap: Optional[np.ndarray] = None, counts: Optional[np.ndarray] = None):
+        self.symbols = symbols
+        self.close = close
+        self.volume = volume
+        self.timestamps = timestamps
+        self.vwap = vwap
+        self.counts = counts
+
+    @classmethod
+    def empty(cls, symbols: List[str], width: int) -> "UniverseArrays":
+        shape = (len(symbols), width)
+        return cls(list(symbols), np.full(shape, np.nan), np.full(shape, np.nan),
+                   np.zeros(shape, dtype=np.int64))
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], width: int = 120) -> "UniverseArrays":
+        """Build from {symbol: OHLCV frame indexed by timestamp}; session VWAP and the bar count
+        come from the whole frames."""
+        arrays = cls.empty(list(frames), width)
+        arrays.vwap = np.full(len(frames), np.nan)
+        arrays.counts = np.array([len(df) for df in frames.values()], dtype=float)
+        for row, df in enumerate(frames.values()):
+            if len(df) > width:
+                timestamps = pd.DatetimeIndex(df.index).as_unit('ns').asi8
+                arrays.vwap[row] = _session_vwap(df['close'].to_numpy(float)[None], df['volume'].to_numpy(float)[None],
+                                                 timestamps[None])[0]
+            df = df.iloc[-width:]
+            n = len(df)
+            if n == 0:
+                continue
+            arrays.close[row, width - n:] = df['close'].to_numpy(float)
+            arrays.volume[row, width - n:] = df['volume'].to_numpy(float)
+            arrays.timestamps[row, width - n:] = pd.DatetimeIndex(df.index).as_unit('ns').asi8
+        return arrays
+
+    @classmethod
+    def from_cache(cls, cache, symbols: List[str], width: int = 120, states: Optional[Dict] = None) -> "UniverseArrays":
+        """Build from a bar_cache.BarCache without going through per-symbol DataFrames. With
+        'states' ({symbol: indicators.StreamingIndicators}) session VWAP and the bar count are
+        theirs, covering the whole session rather than the cached bars."""
+        symbols = [s for s in symbols if s in cache]
+        arrays = cls.empty(symbols, width)
+        if states is not None:
+            found = [states.get(s) for s in symbols]
+            arrays.vwap = np.array([state.vwap if state is not None else np.nan for state in found])
+            arrays.counts = np.array([state.count if state is not None else np.nan for state in found], dtype=float)
+        for row, symbol in enumerate(symbols):
+            bars = cache.view(symbol)
+            n = min(len(bars), width)
+            arrays.close[row, width - n:] = bars.closes[-n:]
+            arrays.volume[row, width - n:] = bars.volumes[-n:]
+            arrays.timestamps[row, width - n:] = bars.timestamps[-n:]
+        return arrays
+
+
+# {<field>_<timeframe>: (field, timeframe, minutes per bar)}
+_TIMEFRAME_COLUMNS = timeframe_fields()
+
+
+class LazyColumns:
+    """Latest-bar indicator columns of a UniverseArrays (close, vwap, ma20, ma50, last_volume,
+    avg_volume, bars and the resampled timeframes' fields, e.g. ma20_5m), each computed on first
+    use and only for the rows asked for; rows already computed are reused. A timeframe's fields
+    are computed together."""
+    FIELDS = ("close", "vwap", "ma20", "ma50", "last_volume", "avg_volume", "bars") + tuple(_TIMEFRAME_COLUMNS)
+
+    def __init__(self, arrays: UniverseArrays):
+        self.arrays = arrays
+        self._values: Dict[str, np.ndarray] = {}
+        self._done: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.arrays.symbols)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.get(name)
+
+    def get(self, name: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Column 'name' for every row, or for the given row indices."""
+        values, done = self._column(name)
+        todo = np.flatnonzero(~done) if rows is None else rows[~done[rows]]
+        if len(todo):
+            if name in _TIMEFRAME_COLUMNS:
+                _, timeframe, minutes = _TIMEFRAME_COLUMNS[name]
+                for field, column in self._timeframe(timeframe, minutes, todo).items():
+                    other, other_done = self._column(field)
+                    other[todo] = column
+                    other_done[todo] = True
+            else:
+                values[todo] = self._compute(name, todo)
+                done[todo] = True
+        return values if rows is None else values[rows]
+
+    def _column(self, name: str):
+        values = self._values.get(name)
+        if values is None:
+            if name not in self.FIELDS:
+                raise KeyError(name)
+            values = self._values[name] = np.full(len(self), np.nan)
+            self._done[name] = np.zeros(len(self), dtype=bool)
+        return values, self._done[name]
+
+    def _timeframe(self, timeframe: str, minutes: int, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        arrays = self.arrays
+        columns = _resampled_columns(arrays.close[rows], arrays.volume[rows], arrays.timestamps[rows], minutes)
+        return {f"{field}_{timeframe}": column for field, column in columns.items()}
+
+    def _compute(self, name: str, rows: np.ndarray) -> np.ndarray:
+        arrays = self.arrays
+        if name == "close":
+            return arrays.close[rows, -1]
+        if name == "last_volume":
+            return arrays.volume[rows, -1]
+        if name == "bars":
+            return _given_or(arrays.counts, rows, lambda todo: np.count_nonzero(~np.isnan(arrays.close[todo]), axis=1))
+        if name == "avg_volume":
+            return _tail_mean(arrays.volume[rows], 20)
+        if name in ("ma20", "ma50"):
+            return _tail_mean(arrays.close[rows], int(name[2:]))
+        return _given_or(arrays.vwap, rows,
+                         lambda todo: _session_vwap(arrays.close[todo], arrays.volume[todo], arrays.timestamps[todo]))
+
+
+class ScreenResult:
+    """Latest-bar indicators for every symbol plus the boolean signal mask."""
+    def __init__(self, symbols: List[str], columns: LazyColumns, mask: np.ndarray):
+        self.symbols = symbols
+        self.columns = columns
+        self.mask = mask
+
+    def hot_symbols(self) -> List[str]:
+        """Symbols that signal or are close to it (see near_signal_mask)."""
+        return [self.symbols[row] for row in np.flatnonzero(self.mask | near_signal_mask(self.columns))]
+
+    def hits(self) -> List[Dict]:
+        """One dict per matching symbol: symbol and LazyColumns.FIELDS."""
+        rows = np.flatnonzero(self.mask)
+        columns = {name: self.columns.get(name, rows).tolist() for name in LazyColumns.FIELDS}
+        out = []
+        for i, row in enumerate(rows):
+            values = {name: float(col[i]) for name, col in columns.items()}
+            values["symbol"] = self.symbols[row]
+            out.append(values)
+        return out
+
+
+def _given_or(given: Optional[np.ndarray], rows: np.ndarray, compute) -> np.ndarray:
+    """'given' values for 'rows', computing the missing (NaN) ones from the arrays."""
+    if given is None:
+        return compute(rows).astype(float)
+    values = given[rows].astype(float)
+    missing = np.isnan(values)
+    if missing.any():
+        values[missing] = compute(rows[missing])
+    return values
+
+
+def _tail_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the last 'window' non-NaN columns per row (rolling(min_periods=1) at the last bar)."""
+    tail = values[:, -window:]
+    count = np.count_nonzero(~np.isnan(tail), axis=1)
+    total = np.nansum(tail, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+
+def _session_start(timestamps: np.ndarray) -> np.ndarray:
+    """UTC epoch ns of US/Eastern midnight before each row's last bar."""
+    last_ts = pd.to_datetime(timestamps[:, -1], unit='ns', utc=True)
+    return last_ts.tz_convert(US_EASTERN).normalize().tz_convert("UTC").as_unit('ns').asi8
+
+
+def _session_vwap(close: np.ndarray, volume: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
+    """VWAP of each row's latest ET session (bars since US/Eastern midnight of its last bar)."""
+    in_session = (timestamps >= _session_start(timestamps)[:, None]) & ~np.isnan(volume)
+    v = np.where(in_session, volume, 0.0)
+    pv = np.where(in_session, close * volume, 0.0)
+    v_sum = v.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(v_sum > 0, pv.sum(axis=1) / v_sum, np.nan)
+
+
+def _resampled_columns(close: np.ndarray, volume: np.ndarray, timestamps: np.ndarray, minutes: int,
+                       window: int = TIMEFRAME_MA_WINDOW) -> Dict[str, np.ndarray]:
+    """indicators.ResampledBars values at each row's latest bar, from the bars the rows hold:
+    open/high/low/volume of the forming 'minutes' bar (0 = ET session), close of the last
+    completed one, mean close of the last 'window' completed ones and how many completed."""
+    valid = ~np.isnan(close)
+    if minutes:
+        bucket = timestamps // (minutes * MINUTE_NS)
+    else:
+        # whole days back from the latest session's start
+        bucket = (timestamps - _session_start(timestamps)[:, None]) // (24 * 60 * MINUTE_NS)
+    forming = valid & (bucket == bucket[:, -1:])
+    has_bar = forming.any(axis=1)
+    first = np.argmax(forming, axis=1)
+    # a completed bar ends where the next minute falls in another bucket
+    ends = valid & ~forming
+    ends[:, :-1] &= bucket[:, :-1] != bucket[:, 1:]
+    completed = np.count_nonzero(ends, axis=1)
+    rank = np.cumsum(ends[:, ::-1], axis=1)[:, ::-1]  # 1 = latest completed bar
+    recent = ends & (rank <= window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ma = np.where(completed > 0, np.where(recent, close, 0.0).sum(axis=1) / np.minimum(completed, window), np.nan)
+    return {
+        "open": np.where(has_bar, close[np.arange(len(close)), first], np.nan),
+        "high": np.where(has_bar, np.where(forming, close, -np.inf).max(axis=1), np.nan),
+        "low": np.where(has_bar, np.where(forming, close, np.inf).min(axis=1), np.nan),
+        "volume": np.where(forming, volume, 0.0).sum(axis=1),
+        "prev_close": np.where(completed > 0, np.where(ends & (rank == 1), close, 0.0).sum(axis=1), np.nan),
+        "ma20": ma,
+        "bars": completed.astype(float),
+    }
+
+
+def compute_latest_indicators(arrays: UniverseArrays) -> Dict[str, np.ndarray]:
+    """MA20, MA50, VWAP and 20-bar average volume at the latest bar of every symbol at once."""
+    columns = LazyColumns(arrays)
+    return {name: columns.get(name) for name in LazyColumns.FIELDS}
+
+
+def screen_universe(arrays: UniverseArrays, plan: Optional[RulePlan] = None) -> ScreenResult:
+    """Evaluate a signal rule plan (default: signal_rules.MARKET_PLAN)
+    for the whole universe as one boolean mask. Indicator columns are computed lazily, each
+    condition only for the symbols that passed the cheaper ones."""
+    if plan is None:
+        plan = MARKET_PLAN
+    columns = LazyColumns(arrays)
+    return ScreenResult(arrays.symbols, columns, plan.mask(columns, len(columns)))
+
+
+def near_signal_mask(cols: LazyColumns, volume_multiplier: float = HOT_VOLUME_MULTIPLIER,
+                     proximity_pct: float = HOT_PROXIMITY_PCT) -> np.ndarray:
+    """Symbols worth scanning every cycle: a volume pickup (last > volume_multiplier x average),
+    or close/VWAP and MA20/MA50 both within proximity_pct of crossing. The crossing test only
+    runs for symbols without a volume pickup."""
+    near = 1 - proximity_pct / 100.0
+    with np.errstate(invalid="ignore"):
+        mask = cols.get("last_volume") > cols.get("avg_volume") * volume_multiplier
+        rest = np.flatnonzero(~mask)
+        mask[rest] = ((cols.get("close", rest) >= cols.get("vwap", rest) * near)
+                      & (cols.get("ma20", rest) >= cols.get("ma50", rest) * near))
+    return mask
@@ -0,0 +1,149 @@
+# shard_worker.py
+import asyncio
+import logging
+import math
+import multiprocessing as mp
+import queue
+import time
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from config import (SCAN_BUDGET_PER_CYCLE, ALPACA_RATE_LIMIT_PER_MIN, SHARD_TIMEOUT_SECONDS, STATE_SNAPSHOT_PATH,
+                    SNAPSHOT_INTERVAL_SECONDS)
+from market_data import AsyncDataClient
+from scan_scheduler import TieredScanScheduler
+
+logger = logging.getLogger("shard_worker")
+
+
+def shard_of(symbol: str, n_shards: int) -> int:
+    """Stable shard index for a symbol (crc32, unlike hash(), is the same in every process)."""
+    return zlib.crc32(symbol.encode()) % n_shards
+
+
+def split_universe(universe: List[str], n_shards: int) -> List[List[str]]:
+    shards = [[] for _ in range(n_shards)]
+    for symbol in universe:
+        shards[shard_of(symbol, n_shards)].append(symbol)
+    return shards
+
+
+def rate_share_per_min(n_shards: int) -> int:
+    """Requests per minute for each of the 'n_shards' workers and for the coordinator (its news
+    feed): the account-wide Alpaca quota split n_shards + 1 ways."""
+    return max(1, ALPACA_RATE_LIMIT_PER_MIN // (n_shards + 1))
+
+
+def configure_shard(scanner, n_shards: int):
+    """Give a worker's scanner module its share of the scan budget and of the account-wide
+    Alpaca quota (config is already read by then, so this replaces the scheduler and data client)."""
+    scanner._scheduler = TieredScanScheduler(budget=math.ceil(SCAN_BUDGET_PER_CYCLE / n_shards))
+    scanner._data = AsyncDataClient(scanner._data_client, requests_per_minute=rate_share_per_min(n_shards))
+
+
+def _worker_main(shard_id: int, n_shards: int, requests, responses, setup: Optional[Callable] = None):
+    """Worker process: owns its own bar cache, indicator state and scheduler (the scanner
+    module's globals) and runs scan_candidates on its shard for every cycle request, up to
+    the cycle deadline (time.monotonic(), which is system-wide) sent with it."""
+    import scanner
+    configure_shard(scanner, n_shards)
+    if setup is not None:
+        setup()
+    # each shard snapshots its own bar cache and indicator state for warm restarts
+    snapshot_path = f"{STATE_SNAPSHOT_PATH}.shard{shard_id}of{n_shards}"
+    scanner.restore_state(snapshot_path)
+    last_snapshot = time.monotonic()
+    loop = asyncio.new_event_loop()
+    shard: List[str] = []
+    while True:
+        msg = requests.get()
+        if msg is None:
+            break
+        cycle, universe, deadline = msg
+        if universe is not None:
+            shard = split_universe(universe, n_shards)[shard_id]
+        try:
+            candidates = loop.run_until_complete(scanner.scan_candidates(shard, deadline))
+        except Exception as e:
+            logger.exception(f"Shard {shard_id} failed cycle {cycle}: {e}")
+            candidates = []
+        responses.put((shard_id, cycle, candidates))
+        if time.monotonic() - last_snapshot >= SNAPSHOT_INTERVAL_SECONDS:
+            try:
+                scanner.save_state(snapshot_path)
+            except Exception as e:
+                logger.error(f"Shard {shard_id} failed to save state snapshot: {e}")
+            last_snapshot = time.monotonic()
+    loop.close()
+
+
+class ShardedScanner:
+    """Coordinator side of the multi-process scanner: the universe is split across 'n_workers'
+    processes by a stable hash of the symbol and each cycle's candidates are gathered back.
+    Dedup, the result cap and alerting stay with the caller.
+
+    'setup' (a picklable module-level function) runs in each worker after scanner is imported,
+    e.g. to swap in a fake data client."""
+    def __init__(self, n_workers: int, setup: Optional[Callable] = None, timeout: float = SHARD_TIMEOUT_SECONDS):
+        self.n_workers = n_workers
+        self.setup = setup
+        self.timeout = timeout
+        self._ctx = mp.get_context("spawn")
+        self._requests = []
+        self._responses = None
+        self._procs = []
+        self._cycle = 0
+        self._sent_universe: Optional[List[str]] = None
+
+    def start(self):
+        self._responses = self._ctx.Queue()
+        for shard_id in range(self.n_workers):
+            requests = self._ctx.Queue()
+            proc = self._ctx.Process(target=_worker_main, name=f"scan-shard-{shard_id}", daemon=True,
+                                     args=(shard_id, self.n_workers, requests, self._responses, self.setup))
+            proc.start()
+            self._requests.append(requests)
+            self._procs.append(proc)
+        logger.info(f"Started {self.n_workers} scan workers")
+
+    def stop(self):
+        for requests in self._requests:
+            requests.put(None)
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self._requests, self._procs, self._sent_universe = [], [], None
+
+    async def scan_candidates(self, universe: List[str], timeout: Optional[float] = None) -> List[Dict]:
+        """Run one cycle on every shard and merge their candidates. Shards that miss the
+        timeout (default: the configured one; the cycle deadline caps it) are left out of this cycle;
+        workers get the same deadline and defer the bars still in flight at it."""
+        self._cycle += 1
+        cycle = self._cycle
+        timeout = self.timeout if timeout is None else min(self.timeout, timeout)
+        # the universe only crosses the process boundary when it changes
+        changed = universe != self._sent_universe
+        for requests in self._requests:
+            requests.put((cycle, list(universe) if changed else None, time.monotonic() + timeout))
+        if changed:
+            self._sent_universe = list(universe)
+
+        merged: List[Dict] = []
+        pending = set(range(self.n_workers))
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                logger.warning(f"Cycle {cycle}: shards {sorted(pending)} timed out")
+                break
+            try:
+                shard_id, shard_cycle, candidates = await asyncio.to_thread(self._responses.get, True, remaining)
+            except queue.Empty:
+                continue
+            if shard_cycle != cycle:
+                continue  # late answer from a timed-out cycle
+            pending.discard(shard_id)
+            merged.extend(candidates)
+        return merged
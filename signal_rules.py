@@ -0,0 +1,193 @@
+# signal_rules.py
+"""Declarative signal rule, compiled into a cost-ordered evaluation plan.
+
+A rule is a list of conditions separated by ';' (or 'and'), each comparing two terms:
+
+    close < 10; bars >= 20; avg_volume >= 100000; close > vwap; ma20 > ma50;
+    last_volume > 1.8 * avg_volume; has_catalyst
+
+A term is a field, a number, or a number times a field; a bare field is true when non-zero.
+Fields are the latest-bar values of indicator_values / ScreenResult.hits (close, last_volume,
+bars, avg_volume, ma20, ma50, vwap), the resampled higher timeframes (indicators.TIMEFRAMES,
+e.g. close > ma20_5m; ma20_5m > ma20_15m; close > high_session) plus has_catalyst from the
+news lookup.
+
+The plan runs conditions cheapest first (FIELD_COST of the costliest field they read) and,
+among equal costs, the ones observed to reject most often. The same plan gives a scalar
+check per symbol (matches) and a boolean mask over a universe (mask) in which each condition
+only sees the rows that survived the previous ones, so with screener.LazyColumns the costly
+columns are computed for survivors only.
+"""
+import operator
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import SIGNAL_RULE, MAX_PRICE, MIN_AVG_VOLUME, VOLUME_SPIKE_MULTIPLIER
+from indicators import timeframe_fields
+
+# relative cost of producing each field; has_catalyst is a news request
+FIELD_COST = {"close": 1, "last_volume": 1, "bars": 1, "avg_volume": 2, "ma20": 3, "ma50": 3, "vwap": 5,
+              "has_catalyst": 100}
+# resampled 5m/15m fields need a bucket pass over the bars; session ones also the ET session start
+FIELD_COST.update((name, 5 if minutes == 0 else 4) for name, (_, _, minutes) in timeframe_fields().items())
+# fields that come from the news lookup rather than the bars
+NEWS_FIELDS = ("has_catalyst",)
+
+_OPERATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+              "==": operator.eq, "!=": operator.ne}
+_CONDITION = re.compile(r"^(.+?)\s*(<=|>=|==|!=|<|>)\s*(.+)$")
+_NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+_TERM = re.compile(rf"^(?:(?P<number>{_NUMBER})|(?:(?P<scale>{_NUMBER})\s*\*\s*)?(?P<field>[a-z_]\w*)"
+                   rf"(?:\s*\*\s*(?P<rscale>{_NUMBER}))?)$")
+# recompute the order after this many scalar evaluations
+_REORDER_EVERY = 1024
+
+# (scale, field or None, constant)
+Term = Tuple[float, Optional[str], float]
+
+
+def default_rule() -> str:
+    """The built-in rule from MAX_PRICE, MIN_AVG_VOLUME and VOLUME_SPIKE_MULTIPLIER."""
+    return (f"close < {MAX_PRICE:g}; bars >= 20; avg_volume >= {MIN_AVG_VOLUME:g}; close > vwap; ma20 > ma50; "
+            f"last_volume > {VOLUME_SPIKE_MULTIPLIER:g} * avg_volume")
+
+
+def _parse_term(text: str, condition: str) -> Term:
+    match = _TERM.match(text.strip())
+    if match is None:
+        raise ValueError(f"Bad term {text!r} in signal rule condition {condition!r}")
+    if match["number"] is not None:
+        return 1.0, None, float(match["number"])
+    field = match["field"]
+    if field not in FIELD_COST:
+        raise ValueError(f"Unknown field {field!r} in signal rule condition {condition!r}")
+    scale = float(match["scale"] or 1.0) * float(match["rscale"] or 1.0)
+    return scale, field, 0.0
+
+
+class Condition:
+    """One comparison of the rule, with pass/evaluation counts for ordering."""
+    __slots__ = ("text", "left", "op", "right", "fields", "cost", "evaluated", "passed", "_scalar")
+
+    def __init__(self, text: str, left: Term, op: Callable, right: Term):
+        self.text = text
+        self.left = left
+        self.op = op
+        self.right = right
+        self.fields = tuple(dict.fromkeys(f for _, f, _ in (left, right) if f is not None))
+        self.cost = max((FIELD_COST[f] for f in self.fields), default=0)
+        self.evaluated = 0
+        self.passed = 0
+        self._scalar = lambda v: op(self._value(left, v.__getitem__), self._value(right, v.__getitem__))
+
+    @classmethod
+    def parse(cls, text: str) -> "Condition":
+        text = text.strip()
+        match = _CONDITION.match(text)
+        if match is None:
+            # bare field: true when non-zero
+            return cls(text, _parse_term(text, text), operator.ne, (1.0, None, 0.0))
+        left, op, right = match.groups()
+        return cls(text, _parse_term(left, text), _OPERATORS[op], _parse_term(right, text))
+
+    @property
+    def pass_rate(self) -> float:
+        # unseen conditions count as rejecting half their inputs
+        return (self.passed + 1) / (self.evaluated + 2)
+
+    @staticmethod
+    def _value(term: Term, get: Callable):
+        scale, field, constant = term
+        if field is None:
+            return constant
+        return get(field) * scale if scale != 1.0 else get(field)
+
+    def test(self, values: Dict) -> bool:
+        """Scalar check on one symbol's values; comparisons with NaN are false."""
+        result = bool(self._scalar(values))
+        self.evaluated += 1
+        self.passed += result
+        return result
+
+    def mask(self, get: Callable[[str], np.ndarray]) -> np.ndarray:
+        """Vector check over the arrays 'get' returns."""
+        with np.errstate(invalid="ignore"):
+            result = np.asarray(self.op(self._value(self.left, get), self._value(self.right, get)))
+        self.evaluated += result.size
+        self.passed += int(np.count_nonzero(result))
+        return result
+
+    def __repr__(self) -> str:
+        return f"Condition({self.text!r}, cost={self.cost}, pass_rate={self.pass_rate:.2f})"
+
+
+class RulePlan:
+    """The conditions of a rule (all must hold) in evaluation order."""
+    def __init__(self, conditions: Iterable[Condition]):
+        self.conditions: List[Condition] = list(conditions)
+        self.order: List[Condition] = []
+        self._calls = 0
+        self.reorder()
+
+    def __bool__(self) -> bool:
+        return bool(self.conditions)
+
+    def __str__(self) -> str:
+        return "; ".join(condition.text for condition in self.order)
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys(f for condition in self.conditions for f in condition.fields))
+
+    def reorder(self):
+        """Cheapest first; among equal costs, the most selective (lowest observed pass rate) first."""
+        self.order = sorted(self.conditions, key=lambda c: (c.cost, c.pass_rate))
+
+    def split(self, fields: Iterable[str]) -> Tuple["RulePlan", "RulePlan"]:
+        """(conditions not reading 'fields', conditions that do), e.g. to check the news-based
+        conditions only after a symbol passed the market-data ones."""
+        fields = set(fields)
+        later = [c for c in self.conditions if fields.intersection(c.fields)]
+        return RulePlan(c for c in self.conditions if c not in later), RulePlan(later)
+
+    def matches(self, values: Dict) -> bool:
+        """Scalar evaluation for one symbol's values, stopping at the first failing condition."""
+        self._calls += 1
+        if self._calls % _REORDER_EVERY == 0:
+            self.reorder()
+        for condition in self.order:
+            if not condition.test(values):
+                return False
+        return True
+
+    def mask(self, columns, size: int) -> np.ndarray:
+        """Boolean mask over 'size' rows. 'columns.get(field, rows)' returns a field's values for
+        the given row indices; each condition only asks for the rows still alive."""
+        self.reorder()
+        alive = np.arange(size)
+        for condition in self.order:
+            if not len(alive):
+                break
+            alive = alive[condition.mask(lambda field: columns.get(field, alive))]
+        mask = np.zeros(size, dtype=bool)
+        mask[alive] = True
+        return mask
+
+    def stats(self) -> List[Dict]:
+        return [{"condition": c.text, "cost": c.cost, "evaluated": c.evaluated, "passed": c.passed}
+                for c in self.order]
+
+
+def compile_rule(text: str) -> RulePlan:
+    """Parse a rule string into a RulePlan (ValueError on syntax errors or unknown fields)."""
+    parts = [part for part in re.split(r";|\band\b", text) if part.strip()]
+    if not parts:
+        raise ValueError("Empty signal rule")
+    return RulePlan(Condition.parse(part) for part in parts)
+
+
+SIGNAL_PLAN = compile_rule(SIGNAL_RULE or default_rule())
+# checkable from bars alone / needing the news lookup (run only for symbols passing the first)
+MARKET_PLAN, NEWS_PLAN = SIGNAL_PLAN.split(NEWS_FIELDS)
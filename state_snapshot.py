@@ -0,0 +1,93 @@
+# state_snapshot.py
+import logging
+import os
+import time
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from bar_cache import BarCache
+from indicators import StreamingIndicators, session_dates
+import pandas as pd
+
+logger = logging.getLogger("state_snapshot")
+
+
+def _today_session() -> str:
+    return str(session_dates(pd.DatetimeIndex([pd.Timestamp.now(tz="UTC")]))[0])
+
+
+def save_snapshot(path: str, bar_cache: BarCache, states: Dict[str, StreamingIndicators], posted: Iterable[str]):
+    """Write per-symbol bar buffers, indicator session totals and the posted set to one
+    uncompressed .npz file (flat arrays + per-symbol offsets), atomically."""
+    symbols: List[str] = []
+    offsets = [0]
+    timestamps: List[np.ndarray] = []
+    rows: List[np.ndarray] = []
+    session = []
+    for symbol, bars in bar_cache.items():
+        if not len(bars):
+            continue
+        symbols.append(symbol)
+        timestamps.append(bars.timestamps)
+        rows.append(bars.values.T)
+        offsets.append(offsets[-1] + len(bars))
+        state = states.get(symbol)
+        session.append(state.export_session() if state is not None else (0, 0.0, 0.0, 0))
+    arrays = {
+        "saved_at": np.array([time.time()]),
+        "session": np.array([_today_session()]),
+        "symbols": np.array(symbols, dtype=str),
+        "offsets": np.array(offsets, dtype=np.int64),
+        "timestamps": np.concatenate(timestamps) if timestamps else np.empty(0, dtype=np.int64),
+        "bars": np.concatenate(rows) if rows else np.empty((0, 5), dtype=np.float32),
+        "state_count": np.array([s[0] for s in session], dtype=np.int64),
+        "state_pv": np.array([s[1] for s in session], dtype=np.float64),
+        "state_v": np.array([s[2] for s in session], dtype=np.float64),
+        "state_session_end": np.array([s[3] for s in session], dtype=np.int64),
+        "posted": np.array(sorted(posted), dtype=str),
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+    logger.info(f"Saved state snapshot: {len(symbols)} symbols, {offsets[-1]} bars, {len(arrays['posted'])} posted")
+
+
+def load_snapshot(path: str, bar_cache: BarCache, states: Dict[str, StreamingIndicators],
+                  max_age_seconds: float) -> List[str]:
+    """Restore a snapshot written by save_snapshot into 'bar_cache' and 'states' and return the
+    posted tickers. Nothing is restored from another ET session; bars and indicator state are
+    skipped when older than 'max_age_seconds' (the posted set still applies to the session)."""
+    try:
+        data = np.load(path, allow_pickle=False)
+    except (OSError, ValueError) as e:
+        if os.path.exists(path):
+            logger.warning(f"Ignoring unreadable state snapshot {path}: {e}")
+        return []
+    with data:
+        if str(data["session"][0]) != _today_session():
+            logger.info("State snapshot is from an earlier session; starting cold")
+            return []
+        posted = data["posted"].tolist()
+        age = time.time() - float(data["saved_at"][0])
+        if age > max_age_seconds:
+            logger.info(f"State snapshot is {age:.0f}s old; restoring posted tickers only")
+            return posted
+        symbols = data["symbols"].tolist()
+        offsets = data["offsets"]
+        timestamps = data["timestamps"]
+        bars = data["bars"]
+        counts, pvs, vs, ends = (data[k].tolist() for k in ("state_count", "state_pv", "state_v", "state_session_end"))
+    for i, symbol in enumerate(symbols):
+        start, end = offsets[i], offsets[i + 1]
+        bar_cache.load(symbol, timestamps[start:end], bars[start:end])
+        view = bar_cache.view(symbol)
+        state = StreamingIndicators()
+        # the rolling windows and resampled timeframes are replayed from the cached bars; session
+        # totals come from the snapshot
+        state.restore_session(view.closes.tolist(), view.volumes.tolist(), timestamps[end - 1],
+                              counts[i] or (end - start), pvs[i], vs[i], ends[i], view.timestamps.tolist())
+        states[symbol] = state
+    logger.info(f"Restored state snapshot ({age:.0f}s old): {len(symbols)} symbols, {len(posted)} posted")
+    return posted
@@ -0,0 +1,201 @@
+# subscriptions.py
+import bisect
+import json
+import logging
+import math
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from config import SUBSCRIPTIONS_PATH, DISCORD_CHANNEL_ID, MAX_PRICE, MIN_AVG_VOLUME, VOLUME_SPIKE_MULTIPLIER
+
+logger = logging.getLogger("subscriptions")
+
+
+class Subscription:
+    """One channel's alert filter, applied to the shared candidates of each scan (so it can only
+    narrow the signal rule), plus the symbols already posted to it this session. A candidate
+    matches when close < max_price, last_volume > min_volume_multiple x avg_volume,
+    avg_volume >= min_avg_volume and, with catalyst_only, it has a catalyst headline."""
+    __slots__ = ("channel_id", "guild_id", "max_price", "min_volume_multiple", "min_avg_volume", "catalyst_only",
+                 "posted")
+
+    def __init__(self, channel_id: int, guild_id: int = 0, max_price: float = math.inf,
+                 min_volume_multiple: float = 0.0, min_avg_volume: float = 0.0, catalyst_only: bool = False):
+        self.channel_id = int(channel_id)
+        self.guild_id = int(guild_id or 0)
+        self.max_price = float(max_price)
+        self.min_volume_multiple = float(min_volume_multiple)
+        self.min_avg_volume = float(min_avg_volume)
+        self.catalyst_only = bool(catalyst_only)
+        self.posted = set()
+
+    def accepts(self, price: float, spike: float, avg_volume: float, has_catalyst: Optional[bool] = None) -> bool:
+        """All thresholds; an unknown catalyst (None, before the news lookup) passes."""
+        return (price < self.max_price and spike > self.min_volume_multiple and avg_volume >= self.min_avg_volume
+                and (not self.catalyst_only or has_catalyst is not False))
+
+    def describe(self) -> str:
+        parts = [f"Price < ${self.max_price:g}" if math.isfinite(self.max_price) else "Any price"]
+        if self.min_volume_multiple > 0:
+            parts.append(f"Volume > {self.min_volume_multiple:g}x avg")
+        if self.min_avg_volume > 0:
+            parts.append(f"Avg volume >= {self.min_avg_volume:,.0f}")
+        if self.catalyst_only:
+            parts.append("Catalyst only")
+        return " . ".join(parts)
+
+    def to_dict(self) -> Dict:
+        return {"channel_id": self.channel_id, "guild_id": self.guild_id,
+                "max_price": self.max_price if math.isfinite(self.max_price) else None,
+                "min_volume_multiple": self.min_volume_multiple, "min_avg_volume": self.min_avg_volume,
+                "catalyst_only": self.catalyst_only}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Subscription":
+        max_price = data.get("max_price")
+        return cls(data["channel_id"], data.get("guild_id", 0), math.inf if max_price is None else max_price,
+                   data.get("min_volume_multiple", 0.0), data.get("min_avg_volume", 0.0),
+                   data.get("catalyst_only", False))
+
+    def __repr__(self) -> str:
+        return f"Subscription({self.channel_id}, {self.describe()!r})"
+
+
+class _ThresholdIndex:
+    """One group of subscriptions sorted by max_price and, separately, by min_volume_multiple."""
+    def __init__(self, subscriptions: List[Subscription]):
+        self.by_price = sorted(subscriptions, key=lambda s: s.max_price)
+        self.prices = [s.max_price for s in self.by_price]
+        self.by_multiple = sorted(subscriptions, key=lambda s: s.min_volume_multiple)
+        self.multiples = [s.min_volume_multiple for s in self.by_multiple]
+
+    def candidates(self, price: float, spike: float) -> List[Subscription]:
+        """The smaller of: subscriptions whose price cap is above 'price', and those whose volume
+        multiple is below 'spike'; callers check the other thresholds on it."""
+        above = bisect.bisect_right(self.prices, price)
+        below = bisect.bisect_left(self.multiples, spike)
+        if len(self.prices) - above <= below:
+            return self.by_price[above:]
+        return self.by_multiple[:below]
+
+
+class SubscriptionRegistry:
+    """Alert subscriptions, one per channel (any guild), matched against each scan's shared
+    candidates. Catalyst-only and other subscriptions are indexed separately, each group by its
+    two thresholds, so a match bisects for the subscriptions a candidate passes and checks the
+    remaining filters on the smaller range only, not on every subscription. Dedup is per
+    subscription: a symbol posted to one channel can still go to another."""
+    def __init__(self, subscriptions: Iterable[Subscription] = ()):
+        self._subscriptions: Dict[int, Subscription] = {}
+        for subscription in subscriptions:
+            self._subscriptions[subscription.channel_id] = subscription
+        self._reindex()
+
+    def _reindex(self):
+        subscriptions = list(self._subscriptions.values())
+        self._any = _ThresholdIndex([s for s in subscriptions if not s.catalyst_only])
+        self._catalyst = _ThresholdIndex([s for s in subscriptions if s.catalyst_only])
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def __iter__(self) -> Iterator[Subscription]:
+        return iter(self._subscriptions.values())
+
+    def get(self, channel_id: int) -> Optional[Subscription]:
+        return self._subscriptions.get(channel_id)
+
+    def set(self, subscription: Subscription):
+        """Add or replace the channel's subscription (what was posted to the channel stays posted)."""
+        old = self._subscriptions.get(subscription.channel_id)
+        if old is not None:
+            subscription.posted = old.posted
+        self._subscriptions[subscription.channel_id] = subscription
+        self._reindex()
+
+    def remove(self, channel_id: int) -> bool:
+        if self._subscriptions.pop(channel_id, None) is None:
+            return False
+        self._reindex()
+        return True
+
+    def match(self, price: float, last_volume: float, avg_volume: float,
+              has_catalyst: Optional[bool] = None) -> List[Subscription]:
+        """Subscriptions whose filters the candidate passes (catalyst-only ones too while
+        'has_catalyst' is unknown), posted or not."""
+        if math.isnan(price) or math.isnan(last_volume):
+            return []
+        spike = last_volume / avg_volume if avg_volume > 0 else (math.inf if last_volume > 0 else 0.0)
+        matched = [s for s in self._any.candidates(price, spike) if s.accepts(price, spike, avg_volume)]
+        if has_catalyst is not False:
+            matched += [s for s in self._catalyst.candidates(price, spike) if s.accepts(price, spike, avg_volume)]
+        return matched
+
+    def wants(self, values: Dict) -> bool:
+        """Whether a signalling symbol's indicator values (before its news lookup) would go to any
+        subscription it has not been posted to yet."""
+        symbol = values["symbol"]
+        return any(symbol not in s.posted
+                   for s in self.match(values["close"], values["last_volume"], values["avg_volume"]))
+
+    def fan_out(self, ideas: Iterable[Dict]) -> Dict[int, List[Dict]]:
+        """{channel id: trade ideas to post there} for ideas not yet posted to each matching
+        subscription, marking them posted."""
+        out: Dict[int, List[Dict]] = {}
+        for idea in ideas:
+            symbol = idea["symbol"]
+            for s in self.match(idea["price"], idea["last_volume"], idea["avg_volume"], idea.get("has_catalyst", False)):
+                if symbol not in s.posted:
+                    s.posted.add(symbol)
+                    out.setdefault(s.channel_id, []).append(idea)
+        return out
+
+    def clear_posted(self):
+        for s in self._subscriptions.values():
+            s.posted.clear()
+
+    def posted_count(self) -> int:
+        return sum(len(s.posted) for s in self._subscriptions.values())
+
+    def posted_entries(self) -> List[str]:
+        """Posted symbols as "<channel id>:<symbol>" strings, for state snapshots."""
+        return [f"{s.channel_id}:{symbol}" for s in self._subscriptions.values() for symbol in s.posted]
+
+    def restore_posted(self, entries: Iterable[str]):
+        """Re-mark entries from posted_entries(); a bare symbol (older snapshots) counts as posted everywhere."""
+        for entry in entries:
+            channel, _, symbol = entry.rpartition(":")
+            if not channel:
+                for s in self._subscriptions.values():
+                    s.posted.add(symbol)
+                continue
+            s = self._subscriptions.get(int(channel)) if channel.isdigit() else None
+            if s is not None:
+                s.posted.add(symbol)
+
+    def save(self, path: str = SUBSCRIPTIONS_PATH):
+        """Write the subscriptions (not their posted sets) atomically as JSON."""
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump([s.to_dict() for s in self._subscriptions.values()], f, indent=2)
+        os.replace(tmp, path)
+
+
+def default_subscription() -> Subscription:
+    """DISCORD_CHANNEL_ID with the default rule's thresholds (the single-channel setup)."""
+    return Subscription(DISCORD_CHANNEL_ID, max_price=MAX_PRICE, min_volume_multiple=VOLUME_SPIKE_MULTIPLIER,
+                        min_avg_volume=MIN_AVG_VOLUME)
+
+
+def load_subscriptions(path: str = SUBSCRIPTIONS_PATH) -> SubscriptionRegistry:
+    """Subscriptions saved by SubscriptionRegistry.save; without a readable file, just
+    default_subscription() (none if DISCORD_CHANNEL_ID is unset)."""
+    try:
+        with open(path) as f:
+            registry = SubscriptionRegistry(Subscription.from_dict(entry) for entry in json.load(f))
+        logger.info(f"Loaded {len(registry)} alert subscriptions from {path}")
+        return registry
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        if os.path.exists(path):
+            logger.warning(f"Ignoring unreadable subscriptions file {path}: {e}")
+    return SubscriptionRegistry([default_subscription()] if DISCORD_CHANNEL_ID else [])
@@ -0,0 +1,111 @@
+import asyncio
+from collections import deque
+
+import discord
+
+import alert_dispatcher
+import metrics
+from alert_dispatcher import AlertDispatcher, MAX_EMBEDS_PER_MESSAGE, MAX_EMBED_CHARS_PER_MESSAGE
+
+
+def idea(symbol: str, price: float = 1.0) -> dict:
+    return {"symbol": symbol, "price": price, "entry": price, "stop": price * 0.9}
+
+
+def build_embed(idea: dict, description: str = "") -> discord.Embed:
+    return discord.Embed(title=idea["symbol"], description=description or None)
+
+
+class FakeChannel:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, embeds):
+        self.sent.append([embed.title for embed in embeds])
+
+
+def dispatcher(**kwargs) -> AlertDispatcher:
+    return AlertDispatcher(lambda: None, build_embed, **kwargs)
+
+
+def age(d: AlertDispatcher, symbols, seconds: float):
+    """Backdate the queued alerts for 'symbols' by 'seconds'."""
+    d._pending = deque((queued_at - seconds if queued["symbol"] in symbols else queued_at, queued)
+                       for queued_at, queued in d._pending)
+
+
+def test_pack_respects_the_embed_count_limit():
+    d = dispatcher()
+    for i in range(25):
+        d.submit(idea(f"S{i}"))
+    messages = d._pack(*d._take_batch())
+    assert [len(message) for message in messages] == [MAX_EMBEDS_PER_MESSAGE, MAX_EMBEDS_PER_MESSAGE, 5]
+    assert [embed.title for message in messages for embed, _ in message] == [f"S{i}" for i in range(25)]
+
+
+def test_pack_respects_the_character_limit():
+    d = AlertDispatcher(lambda: None, lambda i: build_embed(i, "x" * 2500))
+    for i in range(5):
+        d.submit(idea(f"S{i}"))
+    messages = d._pack(*d._take_batch())
+    assert [len(message) for message in messages] == [2, 2, 1]
+    assert all(sum(len(embed) for embed, _ in message) <= MAX_EMBED_CHARS_PER_MESSAGE for message in messages)
+
+
+def test_repeats_collapse_to_the_newest_idea():
+    d = dispatcher()
+    d.submit(idea("A", 1.0))
+    d.submit(idea("B", 2.0))
+    d.submit(idea("A", 3.0))
+    fresh, stale = d._take_batch()
+    assert [(queued[1]["symbol"], queued[1]["price"]) for queued in fresh] == [("B", 2.0), ("A", 3.0)]
+    assert stale == [] and d.pending() == 0
+
+
+def test_stale_alerts_are_dropped_or_merged():
+    dropped = metrics.ALERTS_DROPPED.value("stale")
+    d = dispatcher(freshness_seconds=60, stale_policy="drop")
+    for symbol in ("A", "B", "C"):
+        d.submit(idea(symbol))
+    age(d, {"A", "C"}, 120)
+    messages = d._pack(*d._take_batch())
+    assert [[embed.title for embed, _ in message] for message in messages] == [["B"]]
+    assert metrics.ALERTS_DROPPED.value("stale") == dropped + 2
+
+    d = dispatcher(freshness_seconds=60, stale_policy="merge")
+    for symbol in ("A", "B"):
+        d.submit(idea(symbol))
+    age(d, {"A"}, 120)
+    (message,) = d._pack(*d._take_batch())
+    assert [embed.title for embed, _ in message] == ["B", "Delayed alerts (1)"]
+
+
+def test_full_queue_drops_the_oldest_alert():
+    d = dispatcher(max_queue=2)
+    for symbol in ("A", "B", "C"):
+        d.submit(idea(symbol))
+    assert [queued[1]["symbol"] for queued in d._pending] == ["B", "C"]
+
+
+def test_missing_channel_holds_alerts_until_stale(monkeypatch):
+    monkeypatch.setattr(alert_dispatcher, "CHANNEL_RETRY_SECONDS", 0.01)
+    channel = None
+    d = AlertDispatcher(lambda: channel, build_embed, freshness_seconds=60, stale_policy="drop")
+    errors = metrics.ERRORS.value("discord_channel")
+
+    async def run():
+        nonlocal channel
+        d.start()
+        d.submit(idea("A"))
+        d.submit(idea("B"))
+        age(d, {"A"}, 120)
+        await asyncio.sleep(0.05)
+        assert [queued[1]["symbol"] for queued in d._pending] == ["B"]
+        assert metrics.ERRORS.value("discord_channel") > errors
+        channel = FakeChannel()
+        await asyncio.sleep(0.05)
+        await d.stop()
+        return channel.sent
+
+    assert asyncio.run(run()) == [["B"]]
+    assert d.pending() == 0
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+from alpaca.data.requests import StockBarsRequest, StockSnapshotRequest
+from alpaca.data.timeframe import TimeFrame
+
+import backtest
+import scanner
+from bar_cache import BarCache
+from scan_scheduler import TieredScanScheduler
+from signal_rules import compile_rule
+
+# 09:30 ET
+SESSION_OPEN = pd.Timestamp("2025-03-06T14:30:00Z")
+MINUTE = pd.Timedelta(minutes=1)
+SPIKE_AT = 45
+
+
+def day_frame() -> pd.DataFrame:
+    """60 minutes of three symbols: UP climbs and spikes at minute SPIKE_AT, DEAR does the same
+    above MAX_PRICE and FLAT never moves."""
+    minutes = np.arange(60)
+    closes = 4.0 + minutes * 0.01
+    volumes = np.where(minutes == SPIKE_AT, 1_000_000.0, 200_000.0)
+    frames = []
+    for symbol, close in (("UP", closes), ("DEAR", closes + scanner.MAX_PRICE), ("FLAT", np.full(60, 4.0))):
+        frames.append(pd.DataFrame({"timestamp": [SESSION_OPEN + m * MINUTE for m in minutes], "symbol": symbol,
+                                    "open": close, "high": close, "low": close, "close": close, "volume": volumes}))
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture
+def day(tmp_path):
+    path = tmp_path / "2025-03-06.csv"
+    day_frame().to_csv(path, index=False)
+    return backtest.split_symbols(backtest.load_day(str(path)))
+
+
+@pytest.fixture
+def fresh_scanner(monkeypatch):
+    """replay_cycles rewires the scanner's globals; keep them to this test."""
+    for name, value in (("_bar_cache", BarCache(capacity=120)), ("_indicator_states", {}),
+                        ("_scheduler", TieredScanScheduler()), ("_data", scanner._data), ("now_utc", scanner.now_utc)):
+        monkeypatch.setattr(scanner, name, value)
+
+
+def test_load_day_splits_symbols_in_time_order(day):
+    assert sorted(day) == ["DEAR", "FLAT", "UP"]
+    timestamps, values = day["UP"]
+    assert timestamps[0] == SESSION_OPEN.value and len(timestamps) == 60
+    assert np.all(np.diff(timestamps) == MINUTE.value)
+    assert values[SPIKE_AT].tolist() == pytest.approx([4.45, 4.45, 4.45, 4.45, 1_000_000.0])
+
+
+def test_replay_client_serves_only_completed_bars(day):
+    client = backtest.ReplayDataClient(day, SESSION_OPEN + 10 * MINUTE)
+    request = StockBarsRequest(symbol_or_symbols=["UP", "FLAT", "NONE"], timeframe=TimeFrame.Minute,
+                               start=(SESSION_OPEN + 5 * MINUTE).to_pydatetime())
+    df = client.get_stock_bars(request).df
+    # minutes 5..9 have closed at 09:40; the bar stamped 09:40 has not
+    assert sorted(df.index.get_level_values("symbol").unique()) == ["FLAT", "UP"]
+    assert df.loc["UP"].index.tolist() == [SESSION_OPEN + m * MINUTE for m in range(5, 10)]
+
+    snapshot = client.get_stock_snapshot(StockSnapshotRequest(symbol_or_symbols=["UP", "NONE"]))
+    assert list(snapshot) == ["UP"]
+    assert snapshot["UP"].latest_trade.price == pytest.approx(4.09)
+    assert snapshot["UP"].daily_bar.volume == pytest.approx(10 * 200_000.0)
+    assert client.requests == 2
+
+    assert client.get_stock_bars(StockBarsRequest(symbol_or_symbols="UP", timeframe=TimeFrame.Minute,
+                                                  start=(SESSION_OPEN + 20 * MINUTE).to_pydatetime())).df.empty
+
+
+def test_replay_bars_alerts_once_on_the_spike(day):
+    alerts, processed = backtest.replay_bars(day)
+    assert processed == 60 + 60 + SPIKE_AT + 1  # UP stops at its alert
+    assert [alert["symbol"] for alert in alerts] == ["UP"]
+    alert = alerts[0]
+    # posted once the spike bar closes
+    assert alert["timestamp"] == SESSION_OPEN + (SPIKE_AT + 1) * MINUTE
+    assert alert["price"] == pytest.approx(4.45)
+    assert alert["last_volume"] == 1_000_000
+    assert alert["stop"] < alert["entry"] < alert["take"]
+
+
+def test_replay_cycles_alerts_in_the_cycle_after_the_spike(day, fresh_scanner):
+    alerts, stats = backtest.replay_cycles(day, interval_seconds=60)
+    assert [alert["symbol"] for alert in alerts] == ["UP"]
+    assert alerts[0]["timestamp"] == SESSION_OPEN + (SPIKE_AT + 1) * MINUTE
+    assert alerts[0]["price"] == pytest.approx(4.45)
+    # one cycle per simulated minute from the first bar's close to the last's
+    assert stats["cycles"] == 60
+    assert stats["requests"] > 0
+
+
+def test_news_conditions_are_reported_as_ignored(monkeypatch, caplog):
+    monkeypatch.setattr(backtest, "NEWS_PLAN", compile_rule("has_catalyst"))
+    alerts, stats = backtest.run_backtest([], workers=1)
+    assert alerts.empty and stats["alerts"] == 0
+    assert "ignoring the news conditions of the signal rule: has_catalyst" in caplog.text
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+from bar_cache import BarCache, BAR_COLUMNS
+
+MINUTE = pd.Timedelta(minutes=1)
+START = pd.Timestamp("2025-03-06T15:00:00Z")
+
+
+def bars(start: int, count: int, close: float = 0.0) -> pd.DataFrame:
+    """'count' minute bars from minute 'start'; minute i closes at close + i."""
+    index = pd.DatetimeIndex([START + i * MINUTE for i in range(start, start + count)])
+    closes = close + np.arange(start, start + count, dtype=float)
+    return pd.DataFrame({"open": closes, "high": closes, "low": closes, "close": closes,
+                         "volume": np.full(count, 100.0)}, index=index)
+
+
+def test_merge_appends_only_new_bars():
+    cache = BarCache(capacity=10)
+    assert cache.merge("A", bars(0, 3)) == (3, False)
+    assert cache.merge("A", bars(1, 4)) == (2, False)
+    assert len(cache.view("A")) == 5
+    assert cache.last_timestamp("A") == START + 4 * MINUTE
+
+
+def test_merge_revises_and_back_fills_earlier_bars():
+    cache = BarCache(capacity=10)
+    cache.merge("A", bars(0, 2))
+    cache.merge("A", bars(3, 2))
+    # a revised close for minute 1 and a late bar for the missing minute 2
+    late = bars(1, 2, close=50.0)
+    appended, revised = cache.merge("A", late)
+    assert (appended, revised) == (0, True)
+    view = cache.view("A")
+    assert view.timestamps.tolist() == [(START + i * MINUTE).value for i in range(5)]
+    assert view.closes.tolist() == [0.0, 51.0, 52.0, 3.0, 4.0]
+    # the same bars again change nothing
+    assert cache.merge("A", late) == (0, False)
+
+
+def test_back_fill_older_than_a_full_buffer_is_ignored():
+    cache = BarCache(capacity=3)
+    cache.merge("A", bars(5, 3))
+    assert cache.merge("A", bars(0, 1)) == (0, False)
+    assert cache.view("A").timestamps[0] == (START + 5 * MINUTE).value
+
+
+def test_duplicate_timestamps_keep_the_later_bar():
+    cache = BarCache(capacity=10)
+    df = pd.concat([bars(0, 2), bars(1, 1, close=9.0)])
+    assert cache.merge("A", df) == (2, False)
+    assert cache.view("A").closes.tolist() == [0.0, 10.0]
+
+
+def test_capacity_drops_the_oldest_bars():
+    cache = BarCache(capacity=4)
+    cache.merge("A", bars(0, 3))
+    cache.merge("A", bars(3, 3))
+    frame = cache.get("A")
+    assert list(frame.columns) == BAR_COLUMNS
+    assert frame.index[0] == START + 2 * MINUTE
+    assert frame["close"].tolist() == [2.0, 3.0, 4.0, 5.0]
+
+
+def test_buffers_grow_without_losing_bars():
+    cache = BarCache(capacity=5, initial_symbols=2)
+    for i in range(5):
+        cache.merge(f"S{i}", bars(0, 2, close=float(i)))
+    assert cache.allocated >= 5
+    for i in range(5):
+        assert cache.view(f"S{i}").closes.tolist() == [float(i), float(i) + 1]
+
+
+def test_discarded_rows_are_reused():
+    cache = BarCache(capacity=5, initial_symbols=2)
+    cache.merge("A", bars(0, 2))
+    cache.merge("B", bars(0, 2))
+    cache.discard("A")
+    cache.merge("C", bars(0, 1, close=7.0))
+    assert cache.allocated == 2
+    assert cache.view("A") is None
+    assert cache.view("C").closes.tolist() == [7.0]
+    assert cache.view("B").closes.tolist() == [0.0, 1.0]
+
+
+def test_push_appends_or_revises_one_bar():
+    cache = BarCache(capacity=5)
+    ts = START.value
+    assert cache.push("A", ts, (1, 1, 1, 1, 10)) == (1, False)
+    assert cache.push("A", ts, (1, 1, 1, 2, 10)) == (0, True)
+    assert cache.push("A", ts, (1, 1, 1, 2, 10)) == (0, False)
+    timestamps, closes, volumes = cache.tail("A", 5)
+    assert timestamps.tolist() == [ts] and closes.tolist() == [2.0] and volumes.tolist() == [10.0]
+
+
+def test_revisions_are_logged_until_taken():
+    cache = BarCache(capacity=10)
+    cache.merge("A", bars(0, 2))
+    cache.merge("A", bars(3, 1))
+    cache.merge("A", bars(1, 2, close=50.0))
+    start = START.value
+    assert cache.take_revisions("A") == [(start + MINUTE.value, 1.0, 100.0, 51.0, 100.0, False),
+                                         (start + 2 * MINUTE.value, 0.0, 0.0, 52.0, 100.0, True)]
+    assert cache.take_revisions("A") == []
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+import metrics
+from cycle_scheduler import CycleScheduler
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def scheduler(now: float, last_boundary=None) -> CycleScheduler:
+    s = CycleScheduler(interval_seconds=60, deadline_fraction=0.5, max_start_delay=5, clock=FakeClock(now))
+    s._last_boundary = last_boundary
+    return s
+
+
+def test_first_cycle_waits_for_the_next_boundary():
+    assert scheduler(100)._due_boundary(100) == (120, 0)
+    assert scheduler(120)._due_boundary(120) == (180, 0)
+
+
+def test_slightly_late_boundary_still_runs():
+    assert scheduler(184, last_boundary=120)._due_boundary(184) == (180, 0)
+    assert scheduler(150, last_boundary=120)._due_boundary(150) == (180, 0)
+
+
+def test_overrun_skips_to_the_next_boundary():
+    # 180 is 10s late: skip it and run at 240
+    assert scheduler(190, last_boundary=120)._due_boundary(190) == (240, 1)
+
+
+def test_long_overrun_runs_a_boundary_that_is_just_due():
+    # 180 and 240 were missed; 300 is only 2s late
+    assert scheduler(302, last_boundary=120)._due_boundary(302) == (300, 2)
+    assert scheduler(310, last_boundary=120)._due_boundary(310) == (360, 3)
+
+
+def test_wait_counts_skips_and_sleeps_to_the_boundary(monkeypatch):
+    s = scheduler(190, last_boundary=120)
+    monkeypatch.setattr(asyncio, "sleep", s.clock.sleep)
+    skipped = metrics.CYCLES_SKIPPED.value()
+    assert asyncio.run(s.wait()) == 240
+    assert s.clock.now == 240
+    assert s.skipped == 1 and metrics.CYCLES_SKIPPED.value() == skipped + 1
+    s.clock.now = 241
+    assert asyncio.run(s.wait()) == 300
+    assert s.skipped == 1
+    assert s.jitter_stats()["count"] == 2
+
+
+def test_reset_forgets_the_last_boundary():
+    s = scheduler(500, last_boundary=120)
+    s.reset()
+    assert s._due_boundary(500) == (540, 0)
+
+
+def test_deadline_is_a_fraction_of_the_interval_after_the_boundary():
+    s = scheduler(250)
+    before = time.monotonic()
+    deadline = s.deadline(240)
+    # boundary 240 + 0.5 x 60 = 270, i.e. 20s after the fake now
+    assert before + 20 <= deadline <= time.monotonic() + 20
+
+
+def test_deadline_fraction_is_clamped():
+    assert CycleScheduler(60, deadline_fraction=3.0).deadline_fraction == 1.0
+    assert CycleScheduler(60, deadline_fraction=0.0).deadline_fraction == pytest.approx(0.05)
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from indicators import compute_indicators, StreamingIndicators
+
+RECORDED_BARS = os.path.join(os.path.dirname(__file__), "testdata", "recorded_bars.csv")
+
+
+def load_recorded_bars() -> pd.DataFrame:
+    df = pd.read_csv(RECORDED_BARS, parse_dates=["timestamp"]).set_index("timestamp")
+    df["price"] = df["close"]
+    return df
+
+
+def test_streaming_indicators_match_compute_indicators():
+    df = load_recorded_bars()
+    expected = compute_indicators(df)
+    state = StreamingIndicators()
+    for ts, row in df.iterrows():
+        state.update(ts, float(row["close"]), float(row["volume"]))
+        want = expected.loc[ts]
+        assert np.isclose(state.ma20, want["MA20"], rtol=1e-12)
+        assert np.isclose(state.ma50, want["MA50"], rtol=1e-12)
+        assert np.isclose(state.vwap, want["VWAP"], rtol=1e-12)
+        assert np.isclose(state.avg_volume, want["AvgVolume20"], rtol=1e-12)
+
+
+def test_streaming_vwap_resets_at_session_boundary():
+    df = load_recorded_bars()
+    state = StreamingIndicators()
+    state.update_frame(df)
+    second_session = df[df.index >= "2025-03-07"]
+    expected = (second_session["close"] * second_session["volume"]).sum() / second_session["volume"].sum()
+    assert np.isclose(state.vwap, expected, rtol=1e-12)
+    assert state.count == len(df)
+
+
+def test_resampled_timeframes_match_pandas_resample():
+    df = load_recorded_bars()
+    state = StreamingIndicators()
+    state.update_frame(df)
+    values = state.timeframe_values()
+    for name, rule in (("5m", "5min"), ("15m", "15min")):
+        bars = df["close"].resample(rule).agg(["first", "max", "min", "last"]).dropna()
+        completed = bars.iloc[:-1]
+        assert values[f"bars_{name}"] == len(completed)
+        assert np.isclose(values[f"open_{name}"], bars["first"].iloc[-1])
+        assert np.isclose(values[f"high_{name}"], bars["max"].iloc[-1])
+        assert np.isclose(values[f"low_{name}"], bars["min"].iloc[-1])
+        assert np.isclose(values[f"prev_close_{name}"], completed["last"].iloc[-1])
+        assert np.isclose(values[f"ma20_{name}"], completed["last"].iloc[-20:].mean())
+    second_session = df[df.index >= "2025-03-07"]
+    assert values["bars_session"] == 1
+    assert np.isclose(values["volume_session"], second_session["volume"].sum())
+    assert np.isclose(values["prev_close_session"], df[df.index < "2025-03-07"]["close"].iloc[-1])
@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+
+import live_stream
+from live_stream import LiveBarStream
+
+
+def bar(symbol: str, minute: int = 0):
+    return SimpleNamespace(symbol=symbol, timestamp=pd.Timestamp("2025-03-06T15:00Z") + pd.Timedelta(minutes=minute),
+                           open=1.0, high=1.0, low=1.0, close=1.0, volume=100.0)
+
+
+def test_slow_evaluation_does_not_hold_up_other_bars(monkeypatch):
+    release = None
+    evaluated, pushed, posted = [], [], []
+
+    async def evaluate_symbol(symbol, state, subscriptions):
+        evaluated.append((symbol, state))
+        if symbol == "SLOW":
+            await release.wait()  # e.g. a news lookup
+        return {"symbol": symbol}
+
+    def push_bar(symbol, ts, row):
+        pushed.append(symbol)
+        return ts.minute
+
+    monkeypatch.setattr(live_stream.scanner, "push_bar", push_bar)
+    monkeypatch.setattr(live_stream.scanner, "evaluate_symbol", evaluate_symbol)
+
+    async def on_signal(idea):
+        posted.append(idea["symbol"])
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        stream = LiveBarStream(on_signal, subscriptions=None, url="ws://localhost:1")
+        await stream._on_bar(bar("SLOW"))
+        await stream._on_bar(bar("FAST"))
+        # later SLOW bars update state and queue one more evaluation, of the latest bar
+        await stream._on_bar(bar("SLOW", 1))
+        await stream._on_bar(bar("SLOW", 2))
+        await asyncio.sleep(0.01)
+        assert posted == ["FAST"]
+        assert stream.pending() == 1
+        release.set()
+        await asyncio.sleep(0.01)
+        assert stream.pending() == 0
+
+    asyncio.run(run())
+    assert pushed == ["SLOW", "FAST", "SLOW", "SLOW"]
+    assert evaluated == [("SLOW", 0), ("FAST", 0), ("SLOW", 2)]
+    assert posted == ["FAST", "SLOW", "SLOW"]
+
+
+def test_queued_bars_are_dropped_while_scanning_is_paused(monkeypatch):
+    release = None
+    evaluated = []
+
+    async def evaluate_symbol(symbol, state, subscriptions):
+        evaluated.append(symbol)
+        await release.wait()
+        return None
+
+    monkeypatch.setattr(live_stream.scanner, "push_bar", lambda symbol, ts, row: None)
+    monkeypatch.setattr(live_stream.scanner, "evaluate_symbol", evaluate_symbol)
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        stream = LiveBarStream(lambda idea: None, subscriptions=None, url="ws://localhost:1")
+        await stream._on_bar(bar("SLOW"))
+        await stream._on_bar(bar("SLOW", 1))
+        stream.enabled = False
+        release.set()
+        await asyncio.sleep(0.01)
+        assert stream.pending() == 0
+
+    asyncio.run(run())
+    assert evaluated == ["SLOW"]
@@ -0,0 +1,74 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+from alpaca.data.requests import NewsRequest, StockBarsRequest
+from alpaca.data.timeframe import TimeFrame
+
+from market_data import ACCOUNT_BUCKET, AsyncDataClient, TokenBucket, expected_bar_pages, expected_news_pages
+
+START = datetime.datetime(2025, 3, 6, 14, 30, tzinfo=datetime.timezone.utc)
+
+
+def bars_request(symbols, minutes: int, **kwargs) -> StockBarsRequest:
+    return StockBarsRequest(symbol_or_symbols=symbols, timeframe=TimeFrame.Minute, start=START,
+                            end=START + datetime.timedelta(minutes=minutes), **kwargs)
+
+
+def test_clients_share_the_account_bucket_by_default():
+    bars = AsyncDataClient(SimpleNamespace())
+    news = AsyncDataClient(SimpleNamespace(), max_concurrency=1)
+    assert bars.bucket is ACCOUNT_BUCKET
+    assert news.bucket is bars.bucket
+
+
+def test_explicit_rate_or_bucket_overrides_the_account_bucket():
+    own = AsyncDataClient(SimpleNamespace(), requests_per_minute=60)
+    assert own.bucket is not ACCOUNT_BUCKET
+    assert own.bucket.rate == 1.0
+    bucket = TokenBucket(120)
+    assert AsyncDataClient(SimpleNamespace(), bucket=bucket).bucket is bucket
+
+
+def test_shared_bucket_limits_requests_across_clients():
+    bucket = TokenBucket(60, burst=2)
+    calls = []
+    client = SimpleNamespace(get_stock_bars=lambda request: calls.append("bars"),
+                             get_news=lambda request: calls.append("news"))
+    bars = AsyncDataClient(client, bucket=bucket)
+    news = AsyncDataClient(client, bucket=bucket)
+
+    async def run():
+        await bars.get_stock_bars(bars_request("ABC", 5))
+        await news.get_news(NewsRequest(limit=10))
+        # the burst is spent by the two clients together
+        return bucket._tokens
+
+    assert asyncio.run(run()) < 1.0
+    assert calls == ["bars", "news"]
+
+
+def test_expected_pages_follow_alpaca_py_page_sizes():
+    symbols = [f"S{i}" for i in range(200)]
+    assert expected_bar_pages(bars_request("ABC", 240)) == 1
+    # 200 symbols x 240 minutes = 48,000 bars at 10,000 per page
+    assert expected_bar_pages(bars_request(symbols, 240)) == 5
+    assert expected_bar_pages(bars_request(symbols, 240, limit=10_000)) == 1
+    assert expected_bar_pages(StockBarsRequest(symbol_or_symbols=symbols, timeframe=TimeFrame.Minute)) == 1
+    assert expected_news_pages(NewsRequest(limit=2000)) == 40
+    assert expected_news_pages(NewsRequest()) == 1
+
+
+def test_a_paged_call_takes_a_token_per_page():
+    bucket = TokenBucket(6000, burst=10)
+    client = AsyncDataClient(SimpleNamespace(get_stock_bars=lambda request: "bars"), bucket=bucket)
+    symbols = [f"S{i}" for i in range(200)]
+
+    async def run():
+        result = await client.get_stock_bars(bars_request(symbols, 240))
+        return result, bucket._tokens
+
+    result, tokens = asyncio.run(run())
+    assert result == "bars"
+    assert (client.calls, client.requests_made) == (1, 5)
+    assert tokens < 6.0
@@ -0,0 +1,41 @@
+import threading
+
+from metrics import Counter, Histogram
+
+
+def test_render_while_another_thread_adds_series():
+    counter = Counter("test_total", "Test counter", label="endpoint")
+    histogram = Histogram("test_seconds", "Test histogram", label="stage", buckets=(0.1, 1.0))
+    done = threading.Event()
+    errors = []
+
+    def scrape():
+        try:
+            while not done.is_set():
+                counter.render()
+                histogram.render()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=scrape)
+    thread.start()
+    for i in range(20000):
+        counter.inc(label_value=f"e{i % 500}")
+        histogram.observe(0.5, f"s{i % 500}")
+    done.set()
+    thread.join()
+    assert errors == []
+    assert counter.total() == 20000
+    assert sum(histogram.count(f"s{i}") for i in range(500)) == 20000
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "Test histogram", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    lines = histogram.render()
+    assert 'test_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{le="1"} 3' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 4' in lines
+    assert "test_seconds_count 4" in lines
+    assert histogram.quantile(0.5) == 0.1 + 0.9 * (2 - 1) / 2
@@ -0,0 +1,117 @@
+import asyncio
+import datetime
+
+import pytest
+
+import news_fetcher
+from news_fetcher import KEYWORD_MATCHER, AsyncNewsClient, KeywordMatcher, make_headline
+
+
+def keywords(text: str):
+    return [kw for kw, _ in KEYWORD_MATCHER.match(text)]
+
+
+def test_whole_words_only():
+    assert keywords("Chip shortage eases") == []
+    assert keywords("Confederate bonds auctioned") == []
+    assert keywords("Short sellers pile in") == ["short"]
+    assert keywords("Fed holds rates") == ["fed"]
+
+
+def test_plurals_match_their_keyword():
+    assert keywords("Two lawsuits filed against maker") == ["lawsuit"]
+    assert keywords("Company wins new contracts") == ["contract"]
+    # an exact keyword wins over another keyword's plural
+    assert keywords("Company misses estimates") == ["misses"]
+
+
+def test_multi_word_phrases_win_over_their_first_word():
+    assert KEYWORD_MATCHER.match("Probe into insider trading widens") == [("insider trading", "legal")]
+    assert keywords("Insider buys shares") == ["insider", "buy"]
+    assert keywords("Data breach hits retailer; supply chain disrupted") == ["data breach", "supply chain"]
+
+
+def test_case_insensitive_distinct_in_order():
+    assert KEYWORD_MATCHER.match("FDA approval; fda APPROVAL again") == [("fda", "regulatory"), ("approval", "regulatory")]
+    assert not KEYWORD_MATCHER.search("Quiet day on the market")
+
+
+def test_unknown_category_is_other():
+    matcher = KeywordMatcher(["moonshot"], {})
+    assert matcher.match("A moonshot idea") == [("moonshot", "other")]
+
+
+def test_make_headline_tags_catalysts():
+    dt = datetime.datetime(2025, 3, 6, 9, 30)
+    headline = make_headline("Maker announces merger", dt, "https://example.com/a")
+    assert headline["headline"] == "Maker announces merger"
+    assert headline["url"] == "https://example.com/a"
+    assert headline["matched"]
+
+
+class CountingNewsClient(AsyncNewsClient):
+    """AsyncNewsClient answering from memory after a short delay, counting requests per key."""
+    def __init__(self, ttl_seconds: float):
+        super().__init__(ttl_seconds=ttl_seconds, requests_per_minute=10**9)
+        self.fetched = []
+
+    async def _get(self, ticker: str, days_back: int):
+        self.fetched.append(ticker)
+        await asyncio.sleep(0.01)
+        if ticker == "FAIL":
+            raise RuntimeError("HTTP 429")
+        return [{"headline": f"{ticker} wins contract", "datetime": 0, "url": ""}]
+
+
+@pytest.fixture
+def api_key(monkeypatch):
+    monkeypatch.setattr(news_fetcher, "FINNHUB_API_KEY", "test")
+
+
+def test_concurrent_lookups_share_one_request(api_key):
+    client = CountingNewsClient(ttl_seconds=60)
+
+    async def run():
+        return await asyncio.gather(*(client.company_news(t) for t in ("ABC", "ABC", "XYZ", "ABC")))
+
+    results = asyncio.run(run())
+    assert sorted(client.fetched) == ["ABC", "XYZ"]
+    assert results[0] is results[1] is results[3]
+    assert client._in_flight == {}
+    # served from the cache until the TTL runs out
+    asyncio.run(client.company_news("ABC"))
+    assert client.fetched.count("ABC") == 1
+
+
+def test_cancelled_caller_leaves_the_shared_request_running(api_key):
+    client = CountingNewsClient(ttl_seconds=60)
+
+    async def run():
+        first = asyncio.ensure_future(client.company_news("ABC"))
+        second = asyncio.ensure_future(client.company_news("ABC"))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run())[0]["headline"] == "ABC wins contract"
+    assert client.fetched == ["ABC"]
+
+
+def test_expired_entries_are_refetched_and_pruned(api_key):
+    client = CountingNewsClient(ttl_seconds=0.05)
+    asyncio.run(client.company_news("ABC"))
+    asyncio.run(client.company_news("XYZ", days_back=5))
+    assert set(client._cache) == {("ABC", 7), ("XYZ", 5)}
+    asyncio.run(asyncio.sleep(0.06))
+    asyncio.run(client.company_news("ABC"))
+    # the refetch replaced ABC's entry and dropped XYZ's expired one
+    assert client.fetched == ["ABC", "XYZ", "ABC"]
+    assert set(client._cache) == {("ABC", 7)}
+
+
+def test_failed_requests_are_not_cached(api_key):
+    client = CountingNewsClient(ttl_seconds=60)
+    assert asyncio.run(client.company_news("FAIL")) == []
+    assert asyncio.run(client.company_news("FAIL")) == []
+    assert client.fetched == ["FAIL", "FAIL"]
+    assert client._cache == {}
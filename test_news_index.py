@@ -0,0 +1,122 @@
+import asyncio
+import datetime
+import time
+from types import SimpleNamespace
+
+from news_index import NewsIndex, NewsIngester
+
+HOUR = 3600.0
+
+
+def titles(headlines):
+    return [h["headline"] for h in headlines]
+
+
+def test_lookup_is_newest_first_whatever_the_add_order():
+    index = NewsIndex(max_age_hours=48)
+    now = time.time()
+    index.add("2", now - 2 * HOUR, "second", "", ["abc"])
+    index.add("3", now - 1 * HOUR, "third", "", ["ABC"])
+    index.add("1", now - 3 * HOUR, "first", "", ["ABC", "XYZ"])
+    headlines, _ = index.lookup("abc")
+    assert titles(headlines) == ["third", "second", "first"]
+    assert titles(index.lookup("XYZ")[0]) == ["first"]
+    assert index.newest == now - 1 * HOUR
+
+
+def test_repeats_are_skipped_and_edits_replace():
+    index = NewsIndex(max_age_hours=48)
+    now = time.time()
+    assert index.add("1", now, "FDA approval for drug", "", ["ABC"])
+    assert not index.add("1", now, "FDA approval for drug", "", ["ABC"])
+    assert index.add("1", now, "Quarterly update", "", ["XYZ"])
+    assert len(index) == 1
+    assert index.lookup("ABC") == ([], False)
+    assert titles(index.lookup("XYZ")[0]) == ["Quarterly update"]
+
+
+def test_articles_past_the_max_age_are_rejected_and_evicted():
+    index = NewsIndex(max_age_hours=2)
+    now = time.time()
+    assert not index.add("old", now - 3 * HOUR, "too old", "", ["ABC"])
+    index.add("1", now - 1.5 * HOUR, "older", "", ["ABC", "XYZ"])
+    index.add("2", now - 0.5 * HOUR, "newer", "", ["ABC"])
+    assert index.evict(now + 1 * HOUR) == 1
+    assert titles(index.lookup("ABC")[0]) == ["newer"]
+    assert index.lookup("XYZ") == ([], False)
+    assert index.symbols() == 1
+    assert index.evict(now + 1 * HOUR) == 0
+
+
+def test_lookup_limits_count_and_age():
+    index = NewsIndex(max_age_hours=10 * 24)
+    now = time.time()
+    for day in range(8):
+        index.add(str(day), now - day * 86400 - 60, f"day {day}", "", ["ABC"])
+    assert titles(index.lookup("ABC", max_headlines=3)[0]) == ["day 0", "day 1", "day 2"]
+    assert titles(index.lookup("ABC", days_back=2, max_headlines=10)[0]) == ["day 0", "day 1"]
+    assert len(index.lookup("ABC", max_headlines=10)[0]) == 7
+
+
+def test_catalyst_flag_only_counts_returned_headlines():
+    index = NewsIndex(max_age_hours=48)
+    now = time.time()
+    index.add("1", now - 2 * HOUR, "Company announces FDA approval", "", ["ABC"])
+    index.add("2", now - 1 * HOUR, "Shares move higher", "", ["ABC"])
+    assert index.lookup("ABC", max_headlines=2)[1] is True
+    assert index.lookup("ABC", max_headlines=1)[1] is False
+
+
+def fake_news_client(articles):
+    """get_news over 'articles' like the feed: newest first, within the request's start/end, up to its limit."""
+    requests = []
+
+    async def get_news(request):
+        requests.append(request)
+        found = [a for a in sorted(articles, key=lambda a: a.created_at, reverse=True)
+                 if (request.start is None or a.created_at >= request.start)
+                 and (request.end is None or a.created_at <= request.end)]
+        return SimpleNamespace(data={"news": found[:request.limit]})
+
+    return SimpleNamespace(get_news=get_news), requests
+
+
+def article(i: int, created_at: datetime.datetime, headline: str = "Shares move") -> SimpleNamespace:
+    return SimpleNamespace(id=i, created_at=created_at, headline=headline, summary="", url="u", symbols=[f"S{i % 7}"])
+
+
+def test_backfill_pages_through_the_whole_window():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    # 120 articles over the last 100 hours, two sharing a page boundary's timestamp, one too old
+    articles = [article(i, now - datetime.timedelta(minutes=50 * i)) for i in range(120)]
+    articles.append(article(500, articles[49].created_at))
+    articles.append(article(501, now - datetime.timedelta(hours=200)))
+    client, requests = fake_news_client(articles)
+    ingester = NewsIngester(client, NewsIndex(max_age_hours=120), backfill_limit=10_000)
+    assert asyncio.run(ingester.poll_once()) == 121
+    assert ingester.ready
+    assert all(request.limit == 50 for request in requests)
+    assert len(requests) == 3
+    assert requests[0].end is None and requests[1].end == articles[49].created_at
+
+
+def test_backfill_stops_at_its_limit():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    client, requests = fake_news_client([article(i, now - datetime.timedelta(minutes=i)) for i in range(200)])
+    ingester = NewsIngester(client, NewsIndex(max_age_hours=120), backfill_limit=70)
+    # the limit counts articles received; the boundary article comes on both pages
+    assert asyncio.run(ingester.poll_once()) == 69
+    assert [request.limit for request in requests] == [50, 20]
+
+
+def test_polls_after_the_backfill_ask_for_articles_since_the_newest():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    articles = [article(1, now - datetime.timedelta(minutes=5), "Merger agreed")]
+    client, requests = fake_news_client(articles)
+    ingester = NewsIngester(client, NewsIndex(max_age_hours=48))
+    assert asyncio.run(ingester.poll_once()) == 1
+    articles.append(article(2, now - datetime.timedelta(minutes=1)))
+    assert asyncio.run(ingester.poll_once()) == 1
+    assert requests[-1].start < now - datetime.timedelta(minutes=5)
+    assert requests[-1].end is None
+    assert ingester.index.lookup("S1")[1] is True
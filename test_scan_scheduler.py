@@ -0,0 +1,62 @@
+from scan_scheduler import TieredScanScheduler
+
+UNIVERSE = [f"S{i}" for i in range(100)]
+
+
+def run_cycles(scheduler: TieredScanScheduler, cycles: int, hot=()) -> dict:
+    """Cycle number each symbol was last scanned at, after 'cycles' cycles (reporting 'hot' each time)."""
+    last_scanned = {}
+    for _ in range(cycles):
+        batch = scheduler.next_batch()
+        assert len(batch) <= scheduler.budget
+        for symbol in batch:
+            last_scanned[symbol] = scheduler.cycle
+        scheduler.feedback(batch, [s for s in hot if s in batch])
+    return last_scanned
+
+
+def test_cold_symbols_scanned_within_the_staleness_bound():
+    # the hot tier takes most of the budget; the cold tier still gets enough slots
+    scheduler = TieredScanScheduler(budget=30, max_staleness_cycles=5, hot_ttl_cycles=3)
+    scheduler.set_universe(UNIVERSE)
+    hot = UNIVERSE[:25]
+    scheduler.feedback(hot, hot)
+    gaps = {}
+    last = {}
+    for _ in range(20):
+        batch = scheduler.next_batch()
+        assert len(batch) <= 30
+        for symbol in batch:
+            if symbol in last:
+                gaps[symbol] = max(gaps.get(symbol, 0), scheduler.cycle - last[symbol])
+            last[symbol] = scheduler.cycle
+        scheduler.feedback(batch, [s for s in batch if s in hot])
+    cold = UNIVERSE[25:]
+    assert set(cold) <= set(last)
+    assert max(gaps[s] for s in cold) <= 5
+
+
+def test_hot_symbols_scanned_every_cycle_and_demoted_after_ttl():
+    scheduler = TieredScanScheduler(budget=20, max_staleness_cycles=10, hot_ttl_cycles=2)
+    scheduler.set_universe(UNIVERSE)
+    scheduler.feedback(["S50"], ["S50"])
+    assert scheduler.hot == ["S50"]
+    for _ in range(2):
+        assert "S50" in scheduler.next_batch()
+        scheduler.feedback(["S50"], [])
+    assert scheduler.hot == []
+
+
+def test_budget_too_small_for_the_bound_rotates_everything():
+    scheduler = TieredScanScheduler(budget=10, max_staleness_cycles=2)
+    scheduler.set_universe(UNIVERSE)
+    last_scanned = run_cycles(scheduler, 10)
+    assert set(last_scanned) == set(UNIVERSE)
+
+
+def test_deferred_cold_symbols_come_first():
+    scheduler = TieredScanScheduler(budget=10, max_staleness_cycles=10)
+    scheduler.set_universe(UNIVERSE)
+    scheduler.next_batch()
+    scheduler.defer(["S95", "S96"])
+    assert scheduler.next_batch()[:2] == ["S95", "S96"]
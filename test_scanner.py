@@ -0,0 +1,193 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import scanner
+from bar_cache import BarCache
+from indicators import compute_vwap
+
+# 09:30 ET
+SESSION_OPEN = pd.Timestamp("2025-03-06T14:30:00Z")
+MINUTE = pd.Timedelta(minutes=1)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """A fresh 120-bar cache and indicator state in place of the scanner's."""
+    cache = BarCache(capacity=120, initial_symbols=4)
+    monkeypatch.setattr(scanner, "_bar_cache", cache)
+    monkeypatch.setattr(scanner, "_indicator_states", {})
+    return cache
+
+
+def session_bars(count: int) -> pd.DataFrame:
+    """'count' minute bars from the open with float32-exact closes and volumes."""
+    index = pd.DatetimeIndex([SESSION_OPEN + i * MINUTE for i in range(count)])
+    closes = 5.0 + (np.arange(count) % 40) / 8.0
+    volumes = 1000.0 + (np.arange(count) % 7) * 250.0
+    return pd.DataFrame({"open": closes, "high": closes, "low": closes, "close": closes, "volume": volumes},
+                        index=index)
+
+
+def reference_vwap(df: pd.DataFrame) -> float:
+    return float(compute_vwap(df.rename(columns={"close": "price"})).iloc[-1])
+
+
+def push_frame(df: pd.DataFrame):
+    for ts, row in zip(df.index, df.itertuples(index=False)):
+        state = scanner.push_bar("ABC", ts, tuple(row))
+    return state
+
+
+def test_revised_bar_changes_vwap_by_its_delta_only(cache):
+    df = session_bars(200)
+    state = push_frame(df)
+    assert len(cache.view("ABC")) == 120
+    assert state.vwap == pytest.approx(reference_vwap(df), rel=1e-12)
+    pv, v = state._pv, state._v
+
+    # a one-share correction of the last bar
+    revised = df.copy()
+    revised.iloc[-1, revised.columns.get_loc("volume")] += 1
+    state = scanner.push_bar("ABC", df.index[-1], tuple(revised.iloc[-1]))
+    close = df["close"].iloc[-1]
+    assert state.vwap == pytest.approx((pv + close) / (v + 1), rel=1e-12)
+    assert state.vwap == pytest.approx(reference_vwap(revised), rel=1e-12)
+    assert state.count == 200
+
+    # a revised close further back, through a delta merge, moves MA20 too
+    ts = df.index[-5]
+    revised.loc[ts, "close"] = 20.0
+    appended, was_revised = cache.merge("ABC", revised.iloc[-5:])
+    state = scanner.update_indicator_state("ABC", appended, was_revised)
+    assert state.vwap == pytest.approx(reference_vwap(revised), rel=1e-12)
+    assert state.ma20 == pytest.approx(revised["close"].iloc[-20:].mean(), rel=1e-12)
+
+
+def test_back_filled_bar_is_added_to_the_session(cache):
+    df = session_bars(150)
+    push_frame(df.drop(df.index[-3]))
+    state = scanner.push_bar("ABC", df.index[-3], tuple(df.iloc[-3]))
+    assert state.count == 150
+    assert state.vwap == pytest.approx(reference_vwap(df), rel=1e-12)
+    assert state.last_close == df["close"].iloc[-1]
+
+
+def test_revisions_merged_before_new_bars_are_applied_once(cache):
+    df = session_bars(130)
+    push_frame(df.iloc[:125])
+    revised = df.copy()
+    revised.loc[df.index[-8], "volume"] = 5000.0
+    # a revision to a bar the state has and new bars in one response
+    appended, was_revised = cache.merge("ABC", revised.iloc[-8:])
+    assert (appended, was_revised) == (5, True)
+    state = scanner.update_indicator_state("ABC", appended, was_revised)
+    assert state.count == 130
+    assert state.vwap == pytest.approx(reference_vwap(revised), rel=1e-12)
+
+
+def test_select_fresh_orders_by_spike_and_survives_zero_average_volume():
+    signals = [{"symbol": "A", "last_volume": 300.0, "avg_volume": 100.0},
+               {"symbol": "B", "last_volume": 5.0, "avg_volume": 0.0},
+               {"symbol": "C", "last_volume": 900.0, "avg_volume": 100.0},
+               {"symbol": "D", "last_volume": 10.0, "avg_volume": 1.0}]
+    subscriptions = SimpleNamespace(wants=lambda values: values["symbol"] != "D")
+    assert [v["symbol"] for v in scanner.select_fresh(signals, subscriptions, max_results=2)] == ["C", "B"]
+
+
+def snapshot(price=None, bar_close=None, daily=None, previous=None):
+    """An alpaca Snapshot stand-in: latest trade price, minute bar close and daily bar volumes."""
+    return SimpleNamespace(latest_trade=SimpleNamespace(price=price) if price is not None else None,
+                           minute_bar=SimpleNamespace(close=bar_close) if bar_close is not None else None,
+                           daily_bar=SimpleNamespace(volume=daily) if daily is not None else None,
+                           previous_daily_bar=SimpleNamespace(volume=previous) if previous is not None else None)
+
+
+def test_snapshot_gate_boundaries_match_the_alert_rule():
+    # the rule wants close < MAX_PRICE and a 20-bar average of at least MIN_AVG_VOLUME
+    price, volume = scanner.MAX_PRICE, scanner.MIN_AVG_VOLUME * 20
+    below = price - 0.01
+    assert scanner._snapshot_gate(snapshot(below, daily=volume / 2, previous=volume / 2)) == 'pass'
+    assert scanner._snapshot_gate(snapshot(price, daily=volume, previous=volume)) == 'price'
+    assert scanner._snapshot_gate(snapshot(below, daily=volume / 2, previous=volume / 2 - 1)) == 'volume'
+    # the minute bar stands in for a missing latest trade
+    assert scanner._snapshot_gate(snapshot(bar_close=below, daily=volume)) == 'pass'
+    assert scanner._snapshot_gate(snapshot(bar_close=price, daily=volume)) == 'price'
+    assert scanner._snapshot_gate(snapshot(daily=volume)) == 'no_data'
+    assert scanner._snapshot_gate(None) == 'no_data'
+
+
+def test_snapshot_gate_counts_whichever_daily_bar_is_present():
+    below, volume = scanner.MAX_PRICE - 0.01, scanner.MIN_AVG_VOLUME * 20
+    # before the open there is no daily bar yet; a new listing has no previous one
+    assert scanner._snapshot_gate(snapshot(below, previous=volume)) == 'pass'
+    assert scanner._snapshot_gate(snapshot(below, daily=volume)) == 'pass'
+    assert scanner._snapshot_gate(snapshot(below, daily=volume - 1)) == 'volume'
+    assert scanner._snapshot_gate(snapshot(below)) == 'volume'
+
+
+def test_prefilter_keeps_input_order_and_passes_failed_batches_through(monkeypatch):
+    below, volume = scanner.MAX_PRICE - 0.01, scanner.MIN_AVG_VOLUME * 20
+    snapshots = {"A": snapshot(below, daily=volume), "B": snapshot(scanner.MAX_PRICE, daily=volume),
+                 "C": snapshot(below, daily=volume - 1), "E": snapshot(below, previous=volume)}
+
+    async def get_stock_snapshot(request):
+        if "F" in request.symbol_or_symbols:
+            raise RuntimeError("HTTP 500")
+        return {symbol: snapshots[symbol] for symbol in request.symbol_or_symbols if symbol in snapshots}
+
+    monkeypatch.setattr(scanner, "_data", SimpleNamespace(get_stock_snapshot=get_stock_snapshot))
+    survivors, removed = asyncio.run(scanner.prefilter_by_snapshot(["E", "A", "B", "C", "D", "F", "G"], batch_size=5))
+    assert survivors == ["E", "A", "F", "G"]
+    assert removed == {'price': 1, 'volume': 1, 'no_data': 1}
+
+
+def multi_symbol_bars(counts: Dict[str, int]) -> pd.DataFrame:
+    """An alpaca-style (symbol, timestamp) bars frame, shuffled; bar i of a symbol closes at i."""
+    keys, stamps, closes = [], [], []
+    for symbol, count in counts.items():
+        keys += [symbol] * count
+        stamps += [SESSION_OPEN + i * MINUTE for i in range(count)]
+        closes += [float(i) for i in range(count)]
+    index = pd.MultiIndex.from_arrays([keys, pd.DatetimeIndex(stamps)], names=["symbol", "timestamp"])
+    df = pd.DataFrame({"open": closes, "high": closes, "low": closes, "close": closes,
+                       "volume": np.full(len(closes), 100.0), "trade_count": 1.0, "vwap": closes}, index=index)
+    return df.sample(frac=1.0, random_state=3)
+
+
+def test_split_bars_by_symbol_sorts_each_symbol_by_time():
+    frames = scanner.split_bars_by_symbol(multi_symbol_bars({"B": 4, "A": 3, "C": 1}))
+    assert sorted(frames) == ["A", "B", "C"]
+    for symbol, count in (("A", 3), ("B", 4), ("C", 1)):
+        df = frames[symbol]
+        assert list(df.columns) == ["open", "high", "low", "close", "volume"]
+        assert df.index.tolist() == [SESSION_OPEN + i * MINUTE for i in range(count)]
+        assert df["close"].tolist() == [float(i) for i in range(count)]
+    assert scanner.split_bars_by_symbol(multi_symbol_bars({})) == {}
+    assert scanner.split_bars_by_symbol(None) == {}
+
+
+def test_fetch_bars_batch_drops_symbols_without_bars_and_failed_chunks(monkeypatch):
+    served = multi_symbol_bars({"A": 5, "B": 2, "D": 3})
+    requested = []
+
+    async def get_stock_bars(request):
+        chunk = request.symbol_or_symbols
+        requested.append(chunk)
+        if "D" in chunk:
+            raise RuntimeError("HTTP 500")
+        return SimpleNamespace(df=served[served.index.get_level_values("symbol").isin(chunk)])
+
+    monkeypatch.setattr(scanner, "_data", SimpleNamespace(get_stock_bars=get_stock_bars))
+    frames = asyncio.run(scanner.fetch_bars_batch(["A", "B", "NONE", "D"], limit=3, batch_size=3,
+                                                  start=SESSION_OPEN.to_pydatetime()))
+    assert requested == [["A", "B", "NONE"], ["D"]]
+    # at most 'limit' bars per symbol, the latest ones
+    assert sorted(frames) == ["A", "B"]
+    assert frames["A"]["close"].tolist() == [2.0, 3.0, 4.0]
+    assert frames["B"]["close"].tolist() == [0.0, 1.0]
+    assert asyncio.run(scanner.fetch_bars_batch([])) == {}
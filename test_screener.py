@@ -0,0 +1,73 @@
+import numpy as np
+
+import scanner
+from bar_cache import BarCache
+from indicators import StreamingIndicators
+from screener import LazyColumns, UniverseArrays, screen_universe
+from test_indicators import load_recorded_bars
+
+WIDTH = 120
+
+
+def recorded_universe() -> dict:
+    """One pseudo-symbol per end minute of the recorded bars, each holding every bar up to it
+    (the later ones more than WIDTH)."""
+    df = load_recorded_bars()[["open", "high", "low", "close", "volume"]]
+    frames = {f"S{end}": df.iloc[:end] for end in range(5, len(df) + 1)}
+    assert max(len(df) for df in frames.values()) > 2 * WIDTH
+    return frames
+
+
+def test_screen_universe_agrees_with_is_signal():
+    frames = recorded_universe()
+    arrays = UniverseArrays.from_frames(frames, WIDTH)
+    result = screen_universe(arrays)
+    expected = []
+    for symbol, df in frames.items():
+        state = StreamingIndicators()
+        state.update_frame(df)
+        expected.append(scanner.is_signal(scanner.indicator_values(symbol, state)))
+    assert result.mask.tolist() == expected
+    assert 0 < sum(expected) < len(expected)
+    assert [hit["symbol"] for hit in result.hits()] == [s for s, hit in zip(frames, expected) if hit]
+
+
+def test_lazy_columns_match_streaming_indicators():
+    frames = recorded_universe()
+    columns = LazyColumns(UniverseArrays.from_frames(frames, WIDTH))
+    for row, (symbol, df) in enumerate(frames.items()):
+        state = StreamingIndicators()
+        state.update_frame(df)
+        values = scanner.indicator_values(symbol, state)
+        for name in ("close", "vwap", "ma20", "ma50", "last_volume", "avg_volume", "bars"):
+            assert np.isclose(columns.get(name, np.array([row]))[0], values[name], rtol=1e-9), (symbol, name)
+
+
+def cache_and_states(frames: dict, step: int = 30):
+    """Feed each frame into a WIDTH-bar cache 'step' bars per cycle, as delta fetches would, and
+    return the last cycle's updates."""
+    scanner._bar_cache = BarCache(capacity=WIDTH, initial_symbols=len(frames))
+    scanner._indicator_states = {}
+    updates = {}
+    for symbol, df in frames.items():
+        for start in range(0, len(df), step):
+            appended, revised = scanner._bar_cache.merge(symbol, df.iloc[start:start + step])
+            if start + step < len(df):
+                scanner.update_indicator_state(symbol, appended, revised)
+        updates[symbol] = (appended, revised)
+    return updates
+
+
+def test_vectorized_and_per_symbol_screens_agree_past_the_cache_width(monkeypatch):
+    monkeypatch.setattr(scanner, "_bar_cache", scanner._bar_cache)
+    monkeypatch.setattr(scanner, "_indicator_states", scanner._indicator_states)
+    frames = recorded_universe()
+    signals, hot = scanner._screen_states(cache_and_states(frames))
+    vector_signals, vector_hot = scanner._screen_vectorized(cache_and_states(frames))
+    assert [v["symbol"] for v in vector_signals] == [v["symbol"] for v in signals]
+    assert 0 < len(signals) < len(frames)
+    by_symbol = {v["symbol"]: v for v in signals}
+    for values in vector_signals:
+        expected = by_symbol[values["symbol"]]
+        assert values["bars"] == expected["bars"]
+        assert np.isclose(values["vwap"], expected["vwap"], rtol=1e-6)
@@ -0,0 +1,57 @@
+import math
+
+import scanner
+import shard_worker
+from config import SCAN_BUDGET_PER_CYCLE, ALPACA_RATE_LIMIT_PER_MIN
+from market_data import ACCOUNT_BUCKET
+from shard_worker import configure_shard, rate_share_per_min, split_universe, shard_of
+
+
+def test_split_universe_is_stable_and_complete():
+    universe = [f"S{i}" for i in range(50)]
+    shards = split_universe(universe, 3)
+    assert sorted(s for shard in shards for s in shard) == sorted(universe)
+    for shard_id, shard in enumerate(shards):
+        assert all(shard_of(s, 3) == shard_id for s in shard)
+
+
+def test_worker_gets_its_share_of_budget_and_rate():
+    scheduler, data = scanner._scheduler, scanner._data
+    try:
+        configure_shard(scanner, 4)
+        assert scanner._scheduler.budget == math.ceil(SCAN_BUDGET_PER_CYCLE / 4)
+        assert scanner._data.bucket is not ACCOUNT_BUCKET
+        assert scanner._data.bucket.rate == max(1, ALPACA_RATE_LIMIT_PER_MIN // 5) / 60.0
+        assert scanner._data.client is scanner._data_client
+    finally:
+        scanner._scheduler, scanner._data = scheduler, data
+
+
+def test_workers_and_coordinator_stay_within_the_account_quota():
+    for n_shards in (1, 2, 4, 7):
+        assert (n_shards + 1) * rate_share_per_min(n_shards) <= max(ALPACA_RATE_LIMIT_PER_MIN, n_shards + 1)
+
+
+def test_worker_scans_its_shard_up_to_the_sent_deadline(monkeypatch):
+    seen = []
+
+    async def scan_candidates(shard, deadline=None):
+        seen.append((shard, deadline))
+        return [{"symbol": s} for s in shard]
+
+    class Queue(list):
+        def get(self):
+            return self.pop(0)
+
+        def put(self, item):
+            self.append(item)
+
+    monkeypatch.setattr(scanner, "scan_candidates", scan_candidates)
+    monkeypatch.setattr(scanner, "restore_state", lambda path: [])
+    monkeypatch.setattr(shard_worker, "configure_shard", lambda module, n_shards: None)
+    universe = [f"S{i}" for i in range(20)]
+    requests, responses = Queue([(1, universe, 123.0), (2, None, 456.0), None]), Queue()
+    shard_worker._worker_main(1, 2, requests, responses)
+    shard = split_universe(universe, 2)[1]
+    assert seen == [(shard, 123.0), (shard, 456.0)]
+    assert [(shard_id, cycle) for shard_id, cycle, _ in responses] == [(1, 1), (1, 2)]
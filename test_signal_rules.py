@@ -0,0 +1,85 @@
+import math
+
+import numpy as np
+import pytest
+
+from signal_rules import Condition, FIELD_COST, compile_rule, default_rule
+
+
+class Columns:
+    """columns.get(field, rows) over plain arrays, recording which rows each field was asked for."""
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.requested = {}
+
+    def get(self, field, rows):
+        self.requested.setdefault(field, []).append(len(rows))
+        return self.arrays[field][rows]
+
+
+def test_parses_terms_and_operators():
+    condition = Condition.parse("last_volume > 1.8 * avg_volume")
+    assert condition.fields == ("last_volume", "avg_volume")
+    assert condition.right == (1.8, "avg_volume", 0.0)
+    assert condition.test({"last_volume": 200.0, "avg_volume": 100.0})
+    assert not condition.test({"last_volume": 180.0, "avg_volume": 100.0})
+    assert Condition.parse("avg_volume * 2 <= close").left == (2.0, "avg_volume", 0.0)
+    assert Condition.parse("close >= 1e1").test({"close": 10.0})
+    assert Condition.parse("bars != 0").test({"bars": 3})
+
+
+def test_bare_field_is_true_when_non_zero():
+    plan = compile_rule("close < 10 and has_catalyst")
+    assert plan.matches({"close": 5.0, "has_catalyst": True})
+    assert not plan.matches({"close": 5.0, "has_catalyst": False})
+
+
+def test_nan_comparisons_are_false():
+    assert not Condition.parse("close > vwap").test({"close": 1.0, "vwap": math.nan})
+
+
+@pytest.mark.parametrize("rule", ["", " ; ", "close <", "close < 10; volume > 5", "close < 1.2.3",
+                                  "__import__('os').system('true') > 0", "close < abs(1)"])
+def test_invalid_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        compile_rule(rule)
+
+
+def test_cheapest_conditions_run_first():
+    plan = compile_rule("has_catalyst; close > vwap; ma20 > ma50; close < 10; avg_volume >= 100")
+    assert [c.cost for c in plan.order] == sorted(c.cost for c in plan.conditions)
+    assert plan.order[0].text == "close < 10" and plan.order[-1].text == "has_catalyst"
+    assert FIELD_COST["has_catalyst"] > FIELD_COST["vwap"]
+
+
+def test_equal_costs_order_by_observed_pass_rate():
+    plan = compile_rule("close < 100; last_volume > 50")
+    for close in range(10):
+        plan.matches({"close": float(close), "last_volume": 100.0 if close == 0 else 0.0})
+    plan.reorder()
+    assert [c.text for c in plan.order] == ["last_volume > 50", "close < 100"]
+
+
+def test_split_moves_news_conditions_to_the_second_plan():
+    market, news = compile_rule("close < 10; has_catalyst; close > vwap").split(["has_catalyst"])
+    assert {c.text for c in market.conditions} == {"close < 10", "close > vwap"}
+    assert [c.text for c in news.conditions] == ["has_catalyst"]
+
+
+def test_matches_and_mask_agree():
+    rng = np.random.default_rng(7)
+    size = 500
+    arrays = {"close": rng.uniform(1, 20, size), "bars": rng.integers(0, 40, size).astype(float),
+              "avg_volume": rng.uniform(1e4, 1e6, size), "vwap": rng.uniform(1, 20, size),
+              "ma20": rng.uniform(1, 20, size), "ma50": rng.uniform(1, 20, size),
+              "last_volume": rng.uniform(0, 3e6, size)}
+    arrays["vwap"][::17] = np.nan
+    columns = Columns(arrays)
+    mask = compile_rule(default_rule()).mask(columns, size)
+    scalar = compile_rule(default_rule())
+    expected = [scalar.matches({field: values[i] for field, values in arrays.items()}) for i in range(size)]
+    assert mask.tolist() == expected
+    assert 0 < mask.sum() < size
+    # later conditions only see the rows that survived the earlier ones
+    assert columns.requested["close"][0] == size
+    assert columns.requested["vwap"][0] < size
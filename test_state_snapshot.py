@@ -0,0 +1,82 @@
+import pytest
+
+import scanner
+import state_snapshot
+from bar_cache import BarCache
+from test_scanner import push_frame, reference_vwap, session_bars
+
+SESSION = "2025-03-06"
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """A fresh 120-bar cache and indicator state in place of the scanner's, on the 2025-03-06 session."""
+    cache = BarCache(capacity=120, initial_symbols=4)
+    monkeypatch.setattr(scanner, "_bar_cache", cache)
+    monkeypatch.setattr(scanner, "_indicator_states", {})
+    monkeypatch.setattr(state_snapshot, "_today_session", lambda: SESSION)
+    return cache
+
+
+def cold_start(monkeypatch) -> BarCache:
+    cache = BarCache(capacity=120, initial_symbols=4)
+    monkeypatch.setattr(scanner, "_bar_cache", cache)
+    monkeypatch.setattr(scanner, "_indicator_states", {})
+    return cache
+
+
+def test_round_trip_restores_bars_session_vwap_and_posted(cache, monkeypatch, tmp_path):
+    df = session_bars(200)
+    saved = push_frame(df)
+    path = str(tmp_path / "state.npz")
+    scanner.save_state(path, ["chan:ABC", "chan:XYZ"])
+
+    restored_cache = cold_start(monkeypatch)
+    assert scanner.restore_state(path, max_age_seconds=60) == ["chan:ABC", "chan:XYZ"]
+    view, before = restored_cache.view("ABC"), cache.view("ABC")
+    assert view.timestamps.tolist() == before.timestamps.tolist()
+    assert view.closes.tolist() == before.closes.tolist()
+    state = scanner._indicator_states["ABC"]
+    # VWAP still covers all 200 session bars, not just the 120 cached ones
+    assert state.count == saved.count == 200
+    assert state.vwap == pytest.approx(reference_vwap(df), rel=1e-12)
+    assert (state.ma20, state.ma50, state.avg_volume) == pytest.approx((saved.ma20, saved.ma50, saved.avg_volume))
+    assert state.last_timestamp == saved.last_timestamp
+
+    # the restored state keeps streaming from where the snapshot left off
+    more = session_bars(210)
+    state = push_frame(more.iloc[200:])
+    assert state.count == 210
+    assert state.vwap == pytest.approx(reference_vwap(more), rel=1e-12)
+
+
+def test_snapshot_from_an_earlier_session_is_rejected(cache, monkeypatch, tmp_path):
+    push_frame(session_bars(30))
+    path = str(tmp_path / "state.npz")
+    scanner.save_state(path, ["chan:ABC"])
+
+    restored_cache = cold_start(monkeypatch)
+    monkeypatch.setattr(state_snapshot, "_today_session", lambda: "2025-03-07")
+    assert scanner.restore_state(path, max_age_seconds=3600) == []
+    assert restored_cache.view("ABC") is None
+    assert scanner._indicator_states == {}
+
+
+def test_old_snapshot_restores_posted_tickers_only(cache, monkeypatch, tmp_path):
+    push_frame(session_bars(30))
+    path = str(tmp_path / "state.npz")
+    scanner.save_state(path, ["chan:ABC"])
+
+    restored_cache = cold_start(monkeypatch)
+    monkeypatch.setattr(state_snapshot.time, "time", lambda: 4_000_000_000.0)
+    assert scanner.restore_state(path, max_age_seconds=60) == ["chan:ABC"]
+    assert restored_cache.view("ABC") is None
+    assert scanner._indicator_states == {}
+
+
+def test_missing_or_unreadable_snapshot_starts_cold(cache, tmp_path):
+    assert scanner.restore_state(str(tmp_path / "missing.npz")) == []
+    broken = tmp_path / "broken.npz"
+    broken.write_bytes(b"not a snapshot")
+    assert scanner.restore_state(str(broken)) == []
+    assert scanner._indicator_states == {}
@@ -0,0 +1,107 @@
+import math
+
+from subscriptions import Subscription, SubscriptionRegistry, _ThresholdIndex, load_subscriptions
+
+
+def idea(symbol: str, price: float = 5.0, last_volume: float = 300.0, avg_volume: float = 100.0, **extra) -> dict:
+    return {"symbol": symbol, "price": price, "last_volume": last_volume, "avg_volume": avg_volume, **extra}
+
+
+def channels(subscriptions) -> list:
+    return sorted(s.channel_id for s in subscriptions)
+
+
+def test_threshold_index_bisect_boundaries():
+    subs = [Subscription(1, max_price=5, min_volume_multiple=3), Subscription(2, max_price=10, min_volume_multiple=2),
+            Subscription(3, min_volume_multiple=0)]
+    index = _ThresholdIndex(subs)
+    # price caps are strict: a price equal to a cap excludes that subscription
+    assert channels(index.candidates(10.0, math.inf)) == [3]
+    assert channels(index.candidates(9.99, math.inf)) == [2, 3]
+    # so are volume multiples: a spike equal to a multiple excludes it
+    assert channels(index.candidates(0.0, 2.0)) == [3]
+    assert channels(index.candidates(0.0, 2.01)) == [2, 3]
+    assert index.candidates(math.inf, math.inf) == []
+    assert _ThresholdIndex([]).candidates(1.0, 1.0) == []
+
+
+def test_candidates_cover_every_accepting_subscription():
+    subs = [Subscription(i, max_price=p, min_volume_multiple=m)
+            for i, (p, m) in enumerate([(1, 0), (5, 1), (5, 3), (10, 2), (20, 0.5), (math.inf, 4)])]
+    index = _ThresholdIndex(subs)
+    for price in (0.5, 1, 4.99, 5, 9, 10, 50):
+        for spike in (0, 0.5, 1, 2, 2.5, 3, 4, 10):
+            expected = [s.channel_id for s in subs if s.accepts(price, spike, 0.0)]
+            assert channels(s for s in index.candidates(price, spike) if s.accepts(price, spike, 0.0)) == expected
+
+
+def test_catalyst_only_matches_unknown_and_true_but_not_false():
+    registry = SubscriptionRegistry([Subscription(1), Subscription(2, catalyst_only=True)])
+    assert channels(registry.match(5.0, 300.0, 100.0)) == [1, 2]
+    assert channels(registry.match(5.0, 300.0, 100.0, has_catalyst=None)) == [1, 2]
+    assert channels(registry.match(5.0, 300.0, 100.0, has_catalyst=True)) == [1, 2]
+    assert channels(registry.match(5.0, 300.0, 100.0, has_catalyst=False)) == [1]
+
+
+def test_match_applies_every_threshold():
+    registry = SubscriptionRegistry([Subscription(1, max_price=10, min_volume_multiple=2, min_avg_volume=50)])
+    assert channels(registry.match(5.0, 300.0, 100.0)) == [1]
+    assert registry.match(5.0, 300.0, 40.0) == []
+    assert registry.match(5.0, 150.0, 100.0) == []
+    assert registry.match(math.nan, 300.0, 100.0) == []
+
+
+def test_fan_out_dedups_per_channel():
+    registry = SubscriptionRegistry([Subscription(1), Subscription(2, max_price=4)])
+    out = registry.fan_out([idea("AAA"), idea("BBB", price=3.0)])
+    assert {cid: [i["symbol"] for i in ideas] for cid, ideas in out.items()} == {1: ["AAA", "BBB"], 2: ["BBB"]}
+    assert registry.fan_out([idea("AAA"), idea("BBB", price=3.0)]) == {}
+    # a channel subscribing later still gets symbols posted elsewhere
+    registry.set(Subscription(3))
+    assert list(registry.fan_out([idea("AAA")])) == [3]
+    # replacing a subscription keeps what was posted to it
+    registry.set(Subscription(1, max_price=100))
+    assert registry.fan_out([idea("AAA")]) == {}
+
+
+def test_fan_out_treats_a_missing_catalyst_as_none_found():
+    registry = SubscriptionRegistry([Subscription(1, catalyst_only=True)])
+    assert registry.fan_out([idea("AAA")]) == {}
+    assert list(registry.fan_out([idea("AAA", has_catalyst=True)])) == [1]
+
+
+def test_wants_skips_symbols_posted_to_every_match():
+    registry = SubscriptionRegistry([Subscription(1), Subscription(2)])
+    values = {"symbol": "AAA", "close": 5.0, "last_volume": 300.0, "avg_volume": 100.0}
+    assert registry.wants(values)
+    registry.get(1).posted.add("AAA")
+    assert registry.wants(values)
+    registry.get(2).posted.add("AAA")
+    assert not registry.wants(values)
+
+
+def test_posted_round_trip_and_legacy_entries():
+    registry = SubscriptionRegistry([Subscription(1), Subscription(2)])
+    registry.fan_out([idea("AAA")])
+    entries = registry.posted_entries()
+    assert sorted(entries) == ["1:AAA", "2:AAA"]
+    restored = SubscriptionRegistry([Subscription(1), Subscription(2)])
+    # bare symbols (older snapshots) count as posted everywhere; unknown channels are ignored
+    restored.restore_posted(entries + ["BBB", "3:CCC", "x:DDD"])
+    assert restored.get(1).posted == {"AAA", "BBB"}
+    assert restored.get(2).posted == {"AAA", "BBB"}
+    assert restored.posted_count() == 4
+    restored.clear_posted()
+    assert restored.posted_count() == 0
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "subscriptions.json")
+    registry = SubscriptionRegistry([Subscription(1, 7, min_volume_multiple=2.5, catalyst_only=True),
+                                     Subscription(2, max_price=10, min_avg_volume=1000)])
+    registry.save(path)
+    loaded = load_subscriptions(path)
+    assert [s.to_dict() for s in loaded] == [s.to_dict() for s in registry]
+    assert loaded.get(1).max_price == math.inf
+    assert registry.remove(1) and not registry.remove(1)
+    assert len(registry) == 1
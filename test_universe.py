@@ -0,0 +1,110 @@
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import universe
+
+
+def asset(symbol: str, tradable: bool = True):
+    return SimpleNamespace(symbol=symbol, tradable=tradable, exchange=SimpleNamespace(value="NASDAQ"),
+                           shortable=True, fractionable=False)
+
+
+class FakeTradingClient:
+    """get_all_assets over a fixed asset list, counting calls; 'fail' makes them raise."""
+    def __init__(self, symbols, fail: bool = False):
+        self.assets = [asset(s) for s in symbols] + [asset("HALT", tradable=False)]
+        self.fail = fail
+        self.calls = 0
+
+    def get_all_assets(self, request):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("HTTP 503")
+        return self.assets
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory, where the default asset cache and symbols.txt paths point."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def make_stale(path):
+    yesterday = time.time() - 2 * 86400
+    os.utime(path, (yesterday, yesterday))
+
+
+def test_asset_cache_round_trip(workdir):
+    assets = universe.fetch_assets(FakeTradingClient(["ZZZ", "AAA"]))
+    assert [a["symbol"] for a in assets] == ["AAA", "ZZZ"]
+    universe.write_asset_cache(assets, "assets.csv")
+    assert universe.read_asset_cache("assets.csv") == assets
+    assert assets[0] == {"symbol": "AAA", "exchange": "NASDAQ", "shortable": True, "fractionable": False}
+    assert universe.asset_cache_is_fresh("assets.csv")
+    assert universe.read_asset_cache("missing.csv") is None
+    assert not universe.asset_cache_is_fresh("missing.csv")
+
+
+def test_load_assets_uses_todays_cache_and_refreshes_a_stale_one(workdir):
+    client = FakeTradingClient(["AAA", "BBB"])
+    path = "assets.csv"
+    assert [a["symbol"] for a in asyncio.run(universe.load_assets(client, path))] == ["AAA", "BBB"]
+    client.assets.append(asset("CCC"))
+    # written today: served from disk
+    assert [a["symbol"] for a in asyncio.run(universe.load_assets(client, path))] == ["AAA", "BBB"]
+    assert client.calls == 1
+    assert len(asyncio.run(universe.load_assets(client, path, force_refresh=True))) == 3
+    assert client.calls == 2
+
+    make_stale(path)
+    client.assets.append(asset("DDD"))
+    assert len(asyncio.run(universe.load_assets(client, path))) == 4
+    assert client.calls == 3
+    assert universe.asset_cache_is_fresh(path)
+
+
+def test_load_assets_falls_back_to_a_stale_cache_when_the_api_fails(workdir):
+    path = "assets.csv"
+    asyncio.run(universe.load_assets(FakeTradingClient(["AAA"]), path))
+    make_stale(path)
+    assert [a["symbol"] for a in asyncio.run(universe.load_assets(FakeTradingClient([], fail=True), path))] == ["AAA"]
+    assert asyncio.run(universe.load_assets(FakeTradingClient([], fail=True), "missing.csv")) == []
+
+
+def write_symbols(*symbols):
+    with open("symbols.txt", "w") as f:
+        f.write("\n".join(s.lower() for s in symbols) + "\n\n")
+
+
+def test_override_mode_uses_symbols_txt_without_loading_assets(workdir):
+    write_symbols("XYZ", "ABC")
+    client = FakeTradingClient(["AAA", "ABC"])
+    assert asyncio.run(universe.build_universe(client, "override")) == ["XYZ", "ABC"]
+    assert client.calls == 0
+    os.remove("symbols.txt")
+    assert asyncio.run(universe.build_universe(client, "override")) == ["AAA", "ABC"]
+
+
+def test_whitelist_mode_restricts_the_asset_universe(workdir):
+    write_symbols("XYZ", "ABC", "AAA")
+    # asset order, and only symbols that are tradable assets
+    assert asyncio.run(universe.build_universe(FakeTradingClient(["AAA", "ABC", "BBB"]), "whitelist")) == ["AAA", "ABC"]
+    os.remove("symbols.txt")
+    os.remove("assets_cache.csv")
+    assert asyncio.run(universe.build_universe(FakeTradingClient(["AAA", "BBB"]), "whitelist")) == ["AAA", "BBB"]
+
+
+def test_ignore_mode_skips_symbols_txt(workdir):
+    write_symbols("XYZ")
+    assert asyncio.run(universe.build_universe(FakeTradingClient(["AAA", "BBB"]), "ignore")) == ["AAA", "BBB"]
+
+
+def test_no_assets_falls_back_to_the_default_symbols(workdir):
+    assert asyncio.run(universe.build_universe(FakeTradingClient([], fail=True), "ignore")) == universe.FALLBACK_SYMBOLS
+    write_symbols("XYZ")
+    assert asyncio.run(universe.build_universe(FakeTradingClient([], fail=True), "whitelist")) == universe.FALLBACK_SYMBOLS
@@ -0,0 +1,111 @@
+# universe.py
+import asyncio
+import csv
+import datetime
+import logging
+import os
+from typing import Dict, List, Optional
+
+from alpaca.trading.enums import AssetClass, AssetStatus
+from alpaca.trading.requests import GetAssetsRequest
+
+from config import ASSET_CACHE_PATH, SYMBOLS_FILE, SYMBOLS_FILE_MODE
+from indicators import US_EASTERN
+
+logger = logging.getLogger("universe")
+
+ASSET_FIELDS = ["symbol", "exchange", "shortable", "fractionable"]
+FALLBACK_SYMBOLS = ['AAPL', 'TSLA', 'AMD', 'NVDA', 'MSFT', 'GOOGL', 'META', 'AMZN']
+
+
+def fetch_assets(trading_client) -> List[Dict]:
+    """All active, tradable US equities from Alpaca (blocking)."""
+    request = GetAssetsRequest(status=AssetStatus.ACTIVE, asset_class=AssetClass.US_EQUITY)
+    assets = []
+    for asset in trading_client.get_all_assets(request):
+        if not asset.tradable:
+            continue
+        exchange = getattr(asset.exchange, "value", asset.exchange)
+        assets.append({"symbol": asset.symbol, "exchange": str(exchange),
+                       "shortable": bool(asset.shortable), "fractionable": bool(asset.fractionable)})
+    assets.sort(key=lambda a: a["symbol"])
+    return assets
+
+
+def write_asset_cache(assets: List[Dict], path: str = ASSET_CACHE_PATH):
+    """Write the asset list as a compact CSV (booleans as 1/0), atomically."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(ASSET_FIELDS)
+        for a in assets:
+            writer.writerow([a["symbol"], a["exchange"], int(a["shortable"]), int(a["fractionable"])])
+    os.replace(tmp, path)
+
+
+def read_asset_cache(path: str = ASSET_CACHE_PATH) -> Optional[List[Dict]]:
+    """Cached asset list, or None if there is no readable cache."""
+    try:
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            next(reader)
+            return [{"symbol": symbol, "exchange": exchange, "shortable": shortable == "1",
+                     "fractionable": fractionable == "1"} for symbol, exchange, shortable, fractionable in reader]
+    except (OSError, StopIteration, ValueError):
+        return None
+
+
+def asset_cache_is_fresh(path: str = ASSET_CACHE_PATH, now: Optional[datetime.datetime] = None) -> bool:
+    """True if the cache file was written today (US/Eastern); the asset list is refreshed once a day."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return False
+    now = now or datetime.datetime.now(US_EASTERN)
+    return datetime.datetime.fromtimestamp(mtime, US_EASTERN).date() == now.date()
+
+
+def read_symbols_file(path: str = SYMBOLS_FILE) -> Optional[List[str]]:
+    """Symbols listed one per line in 'path' (upper-cased), or None if the file doesn't exist."""
+    try:
+        with open(path, 'r') as f:
+            return [line.strip().upper() for line in f if line.strip()]
+    except OSError:
+        return None
+
+
+async def load_assets(trading_client, path: str = ASSET_CACHE_PATH, force_refresh: bool = False) -> List[Dict]:
+    """Asset list from today's on-disk cache, else from Alpaca (then cached). A stale cache is
+    still used if the API call fails."""
+    if not force_refresh and asset_cache_is_fresh(path):
+        assets = read_asset_cache(path)
+        if assets:
+            return assets
+    try:
+        assets = await asyncio.to_thread(fetch_assets, trading_client)
+        write_asset_cache(assets, path)
+        logger.info(f"Fetched {len(assets)} tradable US equities from Alpaca")
+        return assets
+    except Exception as e:
+        logger.error(f"Error fetching assets from Alpaca: {e}")
+        return read_asset_cache(path) or []
+
+
+async def build_universe(trading_client, mode: str = SYMBOLS_FILE_MODE) -> List[str]:
+    """The scan universe. SYMBOLS_FILE_MODE decides how symbols.txt is used:
+    - override: symbols.txt, when present, is the universe (the asset list isn't loaded)
+    - whitelist: the asset universe restricted to symbols listed in symbols.txt
+    - ignore: the full asset universe"""
+    listed = read_symbols_file() if mode in ("override", "whitelist") else None
+    if mode == "override" and listed:
+        logger.info(f"Loaded {len(listed)} symbols from {SYMBOLS_FILE}")
+        return listed
+    symbols = [a["symbol"] for a in await load_assets(trading_client)]
+    if mode == "whitelist" and listed:
+        allowed = set(listed)
+        symbols = [s for s in symbols if s in allowed]
+    if not symbols:
+        logger.warning("No assets available; using fallback symbols")
+        return list(FALLBACK_SYMBOLS)
+    logger.info(f"Universe: {len(symbols)} symbols")
+    return symbols
@@ -1,27 +1,20 @@
-import asyncio
 import datetime
-import pytz
 
-# ───────────────────────────────────────────────
-# Sleep helper: aligns scanning cycle intervals
-# ───────────────────────────────────────────────
-async def sleep_until_next_cycle(interval_seconds: int = 60):
-    """
-    Sleeps until the next scan interval to keep scan timing consistent.
-    """
-    now = datetime.datetime.now(pytz.UTC)
-    seconds_since_minute = now.second + now.microsecond / 1_000_000
-    remainder = interval_seconds - (seconds_since_minute % interval_seconds)
-    await asyncio.sleep(remainder)
+import pytz
 
 # ───────────────────────────────────────────────
 # Market window checker (pre/post-market inclusive)
 # ───────────────────────────────────────────────
-def is_market_window() -> bool:
+US_EASTERN = pytz.timezone("US/Eastern")
+
+def is_market_window(now: datetime.datetime = None) -> bool:
     """
-    Returns True if current time is within 4 AM – 8 PM Eastern (pre, reg, after hours)
+    Returns True on weekdays between 4 AM and 8 PM Eastern (pre, reg, after hours).
+    Exchange holidays are not excluded. Cycle timing lives in cycle_scheduler.CycleScheduler.
     """
-    now = datetime.datetime.now(pytz.timezone("US/Eastern"))
+    now = now.astimezone(US_EASTERN) if now is not None else datetime.datetime.now(US_EASTERN)
+    if now.weekday() >= 5:
+        return False
     market_open = now.replace(hour=4, minute=0, second=0, microsecond=0)
     market_close = now.replace(hour=20, minute=0, second=0, microsecond=0)
     return market_open <= now <= market_close
@@ -32,16 +25,3 @@ def is_market_window() -> bool:
 def logger(msg: str):
     now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{now}] {msg}")
-
-# ───────────────────────────────────────────────
-# Simple memory store for tickers already posted
-# ───────────────────────────────────────────────
-class PostedTickerStore:
-    def __init__(self):
-        self._posted = set()
-
-    def add(self, symbol: str):
-        self._posted.add(symbol)
-
-    def has(self, symbol: str) -> bool:
-        return symbol in self._posted